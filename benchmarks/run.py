@@ -0,0 +1,277 @@
+import argparse, json, math, os, platform, random, statistics, struct, sys, tempfile, time, wave
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main"))
+
+from PyQt6.QtCore import QStandardPaths, PYQT_VERSION_STR, QT_VERSION_STR
+from PyQt6.QtMultimedia import QMediaPlayer
+from PyQt6.QtWidgets import QApplication
+
+from main import MediaPlayer
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+DEFAULT_SIZES = (1000, 10000, 100000)
+SAMPLE_RATE = 22050
+FILES_PER_DIR = 500
+
+
+def wav_bytes(seconds, frequency=440.0):
+    frames = int(SAMPLE_RATE * seconds)
+    samples = (int(12000 * math.sin(2 * math.pi * frequency * i / SAMPLE_RATE)) for i in range(frames))
+    return struct.pack(f"<{frames}h", *samples)
+
+
+def write_wav(path, frames):
+    with wave.open(path, "wb") as output:
+        output.setnchannels(1)
+        output.setsampwidth(2)
+        output.setframerate(SAMPLE_RATE)
+        output.writeframes(frames)
+
+
+def generate_library(root, count, seconds=0.05):
+    frames = wav_bytes(seconds)
+    paths = []
+    for i in range(count):
+        directory = os.path.join(root, f"album_{i // FILES_PER_DIR:04d}")
+        if i % FILES_PER_DIR == 0:
+            os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"track_{i:06d}.wav")
+        write_wav(path, frames)
+        paths.append(path)
+    return paths
+
+
+def rss_kb():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    # ru_maxrss is the peak rather than the current size, but it is all macOS offers
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage // 1024 if sys.platform == "darwin" else usage
+
+
+def timed_ms(action):
+    started = time.perf_counter()
+    action()
+    return (time.perf_counter() - started) * 1000
+
+
+def wait_until(app, condition, timeout_ms=30000):
+    deadline = time.perf_counter() + timeout_ms / 1000
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        app.processEvents()
+        time.sleep(0.001)
+    return True
+
+
+def latency_stats(samples):
+    ordered = sorted(samples)
+    return {
+        "median_ms": statistics.median(ordered),
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+    }
+
+
+class Suite:
+    def __init__(self, app, window, workdir, sizes, rounds):
+        self.app = app
+        self.window = window
+        self.workdir = workdir
+        self.sizes = sizes
+        self.rounds = rounds
+        self.results = {}
+
+    def record(self, name, value):
+        self.results[name] = round(value, 4)
+        print(f"{name}: {value:.3f}")
+
+    def reset(self):
+        self.window.clear_playlist()
+        self.settle()
+
+    def settle(self):
+        # metadata probes with their SQLite writes, search indexing and waveform decoding started by one
+        # step are finished here, so they are not timed as part of the next one
+        window = self.window
+        if not wait_until(self.app, lambda: window.metadata_service.is_idle() and not window.waveforms.pending
+                          and not window.search_index_timer.isActive(), timeout_ms=600000):
+            raise RuntimeError("background work did not settle")
+        self.app.processEvents()
+
+    def run(self):
+        started_rss = rss_kb()
+        self.bench_playlist()
+        self.bench_navigation()
+        self.bench_visualizer()
+        self.bench_themes()
+        self.record("rss.growth_kb", rss_kb() - started_rss)
+        return self.results
+
+    def bench_playlist(self):
+        for size in self.sizes:
+            root = os.path.join(self.workdir, f"library_{size}")
+            paths = generate_library(root, size)
+
+            self.reset()
+            elapsed = timed_ms(lambda: [self.window.add_to_playlist(path) for path in paths])
+            self.record(f"add_to_playlist.{size}.ms", elapsed)
+
+            self.reset()
+            self.record(f"add_files_to_playlist.{size}.ms", timed_ms(lambda: self.window.add_files_to_playlist(paths)))
+
+            for label in ("cold", "warm"):
+                self.reset()
+                elapsed = timed_ms(lambda: self.scan(root, size))
+                self.record(f"open_folder.{label}.{size}.ms", elapsed)
+            self.record(f"rss.after_{size}_kb", rss_kb())
+
+    def scan(self, root, size):
+        self.window.scan_folder(root)
+        if not wait_until(self.app, lambda: self.window.folder_scanner is None, timeout_ms=600000):
+            raise RuntimeError(f"scan of {root} did not finish")
+        if len(self.window.playlist) != size:
+            raise RuntimeError(f"scan found {len(self.window.playlist)} of {size} files")
+
+    def bench_navigation(self):
+        paths = generate_library(os.path.join(self.workdir, "playback"), 50, seconds=5)
+        self.reset()
+        self.window.add_files_to_playlist(paths)
+        self.window.toggle_shuffle()
+        self.window.toggle_repeat()
+
+        switches = []
+        playing = []
+        for index in range(self.rounds):
+            started = time.perf_counter()
+            self.window.play_media(index % len(paths))
+            switches.append((time.perf_counter() - started) * 1000)
+            if wait_until(self.app, lambda: self.window.player.playbackState()
+                          == QMediaPlayer.PlaybackState.PlayingState, timeout_ms=5000):
+                playing.append((time.perf_counter() - started) * 1000)
+        for key, value in latency_stats(switches).items():
+            self.record(f"play_media.{key}", value)
+        if playing:
+            for key, value in latency_stats(playing).items():
+                self.record(f"play_media.to_playing.{key}", value)
+
+        for name, step in (("next_media", self.window.next_media), ("prev_media", self.window.prev_media)):
+            samples = []
+            for _ in range(self.rounds):
+                samples.append(timed_ms(step))
+                self.app.processEvents()
+            for key, value in latency_stats(samples).items():
+                self.record(f"{name}.shuffle.{key}", value)
+
+        self.window.toggle_shuffle()
+        self.window.player.stop()
+
+    def bench_visualizer(self):
+        self.reset()
+        visualizer = self.window.visualizer
+        visualizer.show()
+        rng = random.Random(0)
+        for mode in ("cached", "direct"):
+            visualizer.render_mode = mode
+            visualizer.paint_frames = 0
+            visualizer.average_paint_ms = 0.0
+            visualizer.peak_paint_ms = 0.0
+            for _ in range(self.rounds * 10):
+                visualizer.update_bars([rng.randint(5, 60) for _ in range(visualizer.bar_count)])
+                visualizer.repaint()
+            stats = visualizer.paint_stats()
+            self.record(f"visualizer.{mode}.average_ms", stats["average_ms"])
+            self.record(f"visualizer.{mode}.peak_ms", stats["peak_ms"])
+        visualizer.render_mode = "cached"
+
+    def bench_themes(self):
+        self.reset()
+        self.window.add_files_to_playlist([f"/benchmark/track_{i:06d}.mp3" for i in range(max(self.sizes))])
+        self.settle()
+        samples = []
+        for _ in range(self.rounds):
+            for name in ("light", "neon", "dark"):
+                samples.append(timed_ms(lambda: (self.window.apply_theme(name), self.app.processEvents())))
+        for key, value in latency_stats(samples).items():
+            self.record(f"theme_switch.{key}", value)
+        self.reset()
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, previous in sorted(baseline.get("results", {}).items()):
+        current = results.get(name)
+        if current is None or previous <= 0:
+            continue
+        change = (current - previous) / previous
+        flag = " REGRESSION" if change > tolerance else ""
+        print(f"{name}: {previous:.3f} -> {current:.3f} ({change:+.1%}){flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmarks for Neon Media Player Pro")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma separated playlist sizes")
+    parser.add_argument("--rounds", type=int, default=20, help="samples per latency benchmark")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before flagging")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    app = QApplication(sys.argv[:1])
+    QStandardPaths.setTestModeEnabled(True)
+
+    with tempfile.TemporaryDirectory(prefix="neon-bench-") as workdir:
+        window = MediaPlayer()
+        window.resize(1200, 800)
+        window.show()
+        if not wait_until(app, lambda: window.startup_finished):
+            raise RuntimeError("window did not finish starting up")
+        try:
+            results = Suite(app, window, workdir, sizes, args.rounds).run()
+        finally:
+            window.close()
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "qt": QT_VERSION_STR,
+            "pyqt": PYQT_VERSION_STR,
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+    if args.save_baseline:
+        with open(args.baseline, "w") as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline:
+            regressions = compare(results, json.load(baseline), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} benchmarks regressed by more than {args.tolerance:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
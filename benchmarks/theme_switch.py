@@ -0,0 +1,47 @@
+import os, sys, time, statistics
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main"))
+
+from PyQt6.QtCore import QStandardPaths
+from PyQt6.QtWidgets import QApplication
+
+from main import MediaPlayer
+from themes import set_state
+
+ROWS = 100000
+ROUNDS = 5
+THEMES = ("light", "neon", "dark")
+
+
+def elapsed_ms(app, action):
+    started = time.perf_counter()
+    action()
+    app.processEvents()
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    app = QApplication(sys.argv)
+    QStandardPaths.setTestModeEnabled(True)
+
+    window = MediaPlayer()
+    window.resize(1200, 800)
+    window.show()
+    window.add_files_to_playlist([f"/benchmark/track_{i:06d}.mp3" for i in range(ROWS)])
+    app.processEvents()
+
+    switches = [elapsed_ms(app, lambda name=name: window.apply_theme(name))
+                for _ in range(ROUNDS) for name in THEMES]
+    toggles = [elapsed_ms(app, lambda state=state: set_state(window.shuffle_btn, state))
+               for _ in range(ROUNDS * 10) for state in ("on", None)]
+
+    print(f"rows: {ROWS}")
+    print(f"theme switch: median {statistics.median(switches):.1f} ms, max {max(switches):.1f} ms")
+    print(f"button state: median {statistics.median(toggles):.2f} ms, max {max(toggles):.2f} ms")
+
+    window.close()
+
+
+if __name__ == "__main__":
+    main()
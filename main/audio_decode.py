@@ -0,0 +1,157 @@
+import multiprocessing, os, shutil, subprocess, tempfile, wave
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+BLOCK_FRAMES = 65536
+FFMPEG_RATE = 48000
+
+
+def pcm_to_float(raw, sample_width, channels):
+    if sample_width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif sample_width == 2:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768
+    elif sample_width == 3:
+        # widen 24-bit samples into the top of an int32 so the shift back sign-extends them
+        padded = np.zeros((len(raw) // 3, 4), dtype=np.uint8)
+        padded[:, 1:] = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+        samples = (padded.view("<i4").ravel() >> 8).astype(np.float32) / 8388608
+    elif sample_width == 4:
+        samples = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"unsupported sample width: {sample_width}")
+    return samples.reshape(-1, channels)
+
+
+def downmix(block, mono):
+    if mono and block.shape[1] > 1:
+        return block.mean(axis=1, keepdims=True)
+    return block
+
+
+def decode_wave(path, consume, mono):
+    with wave.open(path, "rb") as f:
+        channels, sample_width, rate = f.getnchannels(), f.getsampwidth(), f.getframerate()
+        while True:
+            raw = f.readframes(BLOCK_FRAMES)
+            if not raw:
+                break
+            consume(downmix(pcm_to_float(raw, sample_width, channels), mono), rate)
+    return rate
+
+
+def decode_ffmpeg(path, consume, sample_rate, mono):
+    rate = sample_rate or FFMPEG_RATE
+    channels = 1 if mono else 2
+    command = [shutil.which("ffmpeg"), "-nostdin", "-v", "error", "-i", path, "-vn",
+               "-f", "f32le", "-ac", str(channels), "-ar", str(rate), "pipe:1"]
+    block_bytes = BLOCK_FRAMES * channels * 4
+    # a damaged file can log more than a pipe holds, and ffmpeg would stall writing it while stdout
+    # is being read here, so the log goes to a file that is only read once the process has ended
+    with tempfile.TemporaryFile() as log, \
+            subprocess.Popen(command, stdout=subprocess.PIPE, stderr=log) as process:
+        leftover = b""
+        while True:
+            raw = process.stdout.read(block_bytes)
+            if not raw:
+                break
+            raw = leftover + raw
+            usable = len(raw) - len(raw) % (channels * 4)
+            leftover = raw[usable:]
+            if usable:
+                consume(np.frombuffer(raw[:usable], dtype="<f4").reshape(-1, channels), rate)
+        if process.wait() != 0:
+            log.seek(0)
+            lines = log.read().decode(errors="replace").strip().splitlines()
+            message = lines[-1] if lines else f"exit status {process.returncode}"
+            raise ValueError(f"ffmpeg could not decode {path}: {message}")
+    return rate
+
+
+def decode_qt(path, consume, sample_rate, mono):
+    from PyQt6.QtCore import QCoreApplication, QEventLoop, QUrl
+    from PyQt6.QtMultimedia import QAudioDecoder, QAudioFormat
+    from spectrum_analyzer import SAMPLE_DTYPES
+
+    # QAudioDecoder delivers its buffers through the event loop, so a worker process needs an application
+    app = QCoreApplication.instance() or QCoreApplication([])
+    audio_format = QAudioFormat()
+    audio_format.setSampleFormat(QAudioFormat.SampleFormat.Float)
+    audio_format.setChannelCount(1 if mono else 2)
+    if sample_rate:
+        audio_format.setSampleRate(sample_rate)
+    decoder = QAudioDecoder()
+    decoder.setAudioFormat(audio_format)
+    decoder.setSource(QUrl.fromLocalFile(os.path.abspath(path)))
+    loop = QEventLoop()
+    state = {"rate": None, "error": None}
+
+    def on_buffer_ready():
+        buffer = decoder.read()
+        buffer_format = buffer.format()
+        dtype = SAMPLE_DTYPES.get(buffer_format.sampleFormat())
+        if not buffer.isValid() or dtype is None:
+            return
+        raw = buffer.constData().asstring(buffer.byteCount())
+        if dtype is np.float32:
+            block = np.frombuffer(raw, dtype=np.float32).reshape(-1, buffer_format.channelCount())
+        else:
+            block = pcm_to_float(raw, np.dtype(dtype).itemsize, buffer_format.channelCount())
+        state["rate"] = buffer_format.sampleRate()
+        consume(downmix(block, mono), state["rate"])
+
+    def on_error(error):
+        state["error"] = decoder.errorString()
+        loop.quit()
+
+    decoder.bufferReady.connect(on_buffer_ready)
+    decoder.finished.connect(loop.quit)
+    decoder.error.connect(on_error)
+    decoder.start()
+    loop.exec()
+    decoder.stop()
+    if state["error"]:
+        raise ValueError(f"could not decode {path}: {state['error']}")
+    return state["rate"]
+
+
+def lower_priority(initializer=None, *args):
+    if hasattr(os, "nice"):
+        try:
+            os.nice(10)
+        except OSError:
+            pass
+    if initializer is not None:
+        initializer(*args)
+
+
+def start_pool(max_workers, initializer=None, *args):
+    # spawned workers share no Qt or audio state with the player process, and decode at lowered priority
+    return ProcessPoolExecutor(max_workers, multiprocessing.get_context("spawn"),
+                               initializer=lower_priority, initargs=(initializer, *args))
+
+
+def stop_pool(executor):
+    # a worker still decoding a long file would otherwise hold up interpreter exit until it finished
+    terminate = getattr(executor, "terminate_workers", None)
+    if terminate is not None:
+        terminate()
+        return
+    processes = list((executor._processes or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+
+def decode(path, consume, sample_rate=None, mono=True):
+    # consume receives float32 blocks shaped (frames, channels) in [-1, 1] along with their sample rate;
+    # sample_rate is a preference, plain WAV files are always read at their own rate
+    if path.lower().endswith(".wav"):
+        try:
+            return decode_wave(path, consume, mono)
+        except (wave.Error, EOFError, ValueError):
+            pass
+    if shutil.which("ffmpeg"):
+        return decode_ffmpeg(path, consume, sample_rate, mono)
+    return decode_qt(path, consume, sample_rate, mono)
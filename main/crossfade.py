@@ -0,0 +1,72 @@
+import math
+
+from PyQt6.QtCore import Qt, QObject, QTimer, QElapsedTimer, pyqtSignal
+
+
+class CrossfadeEngine(QObject):
+    fade_finished = pyqtSignal(object)
+
+    def __init__(self, volume_provider, interval_ms=10, parent=None):
+        super().__init__(parent)
+        self.volume_provider = volume_provider
+        self.duration_ms = 0
+        self.outgoing_player = None
+        self.outgoing_output = None
+        self.incoming_output = None
+        self.outgoing_gain = None
+        self.started_ms = 0
+        self.clock = QElapsedTimer()
+        self.clock.start()
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.tick)
+
+    def is_enabled(self):
+        return self.duration_ms > 0
+
+    def is_active(self):
+        return self.outgoing_player is not None
+
+    def is_fading(self, audio_output):
+        return self.is_active() and audio_output is self.incoming_output
+
+    def set_duration(self, duration_ms):
+        self.duration_ms = max(0, duration_ms)
+
+    def start(self, outgoing_player, outgoing_output, incoming_output, outgoing_gain=None):
+        self.finish()
+        self.outgoing_player = outgoing_player
+        self.outgoing_output = outgoing_output
+        self.incoming_output = incoming_output
+        # the outgoing track keeps its own normalization gain, but follows volume and mute changes like the incoming one
+        self.outgoing_gain = outgoing_gain
+        self.started_ms = self.clock.elapsed()
+        self.apply(0.0)
+        self.timer.start()
+
+    def apply(self, progress):
+        angle = progress * math.pi / 2
+        self.outgoing_output.setVolume(self.volume_provider(self.outgoing_gain) * math.cos(angle))
+        self.incoming_output.setVolume(self.volume_provider() * math.sin(angle))
+
+    def tick(self):
+        if not self.is_active():
+            self.timer.stop()
+            return
+        progress = (self.clock.elapsed() - self.started_ms) / max(1, self.duration_ms)
+        if progress >= 1.0:
+            self.finish()
+        else:
+            self.apply(progress)
+
+    def finish(self):
+        if not self.is_active():
+            return
+        self.timer.stop()
+        self.apply(1.0)
+        outgoing_player = self.outgoing_player
+        self.outgoing_player = None
+        self.outgoing_output = None
+        self.incoming_output = None
+        self.fade_finished.emit(outgoing_player)
@@ -0,0 +1,88 @@
+import time
+from collections import deque
+
+from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtMultimedia import QMediaDevices
+
+
+def device_key(device):
+    return bytes(device.id())
+
+
+class AudioDeviceManager(QObject):
+    device_changed = pyqtSignal(object)
+
+    def __init__(self, combo, parent=None):
+        super().__init__(parent)
+        self.combo = combo
+        self.media_devices = None
+        self.current = None
+        self.follow_default = True
+        self.latencies = deque(maxlen=20)
+        combo.activated.connect(self.select)
+
+    def start(self):
+        if self.media_devices is None:
+            self.media_devices = QMediaDevices(self)
+            self.media_devices.audioOutputsChanged.connect(self.on_outputs_changed)
+        self.sync()
+        default = QMediaDevices.defaultAudioOutput()
+        # outputs are created on the default device, so the first pass only has to select it
+        if self.current is None and not default.isNull():
+            self.current = default
+        self.select_current()
+
+    def sync(self):
+        devices = QMediaDevices.audioOutputs()
+        added = {device_key(device): device for device in devices}
+        self.combo.blockSignals(True)
+        for row in reversed(range(self.combo.count())):
+            device = added.pop(device_key(self.combo.itemData(row)), None)
+            if device is None:
+                self.combo.removeItem(row)
+                continue
+            if device.description() != self.combo.itemText(row):
+                self.combo.setItemText(row, device.description())
+            self.combo.setItemData(row, device)
+        for device in devices:
+            if device_key(device) in added:
+                self.combo.addItem(device.description(), device)
+        self.combo.blockSignals(False)
+        return {device_key(device) for device in devices}
+
+    def on_outputs_changed(self):
+        started = time.perf_counter()
+        available = self.sync()
+        default = QMediaDevices.defaultAudioOutput()
+        lost = self.current is None or device_key(self.current) not in available
+        if lost:
+            self.follow_default = True
+        if (lost or self.follow_default) and not default.isNull() and default != self.current:
+            self.switch(default, started)
+        self.select_current()
+
+    def select(self, row):
+        device = self.combo.itemData(row)
+        if device is None:
+            return
+        self.follow_default = device == QMediaDevices.defaultAudioOutput()
+        if device != self.current:
+            self.switch(device, time.perf_counter())
+
+    def switch(self, device, started):
+        self.current = device
+        self.device_changed.emit(device)
+        latency_ms = (time.perf_counter() - started) * 1000
+        self.latencies.append(latency_ms)
+        print(f"Audio output changed to: {device.description()} ({latency_ms:.1f} ms)")
+
+    def select_current(self):
+        if self.current is None:
+            return
+        key = device_key(self.current)
+        for row in range(self.combo.count()):
+            if device_key(self.combo.itemData(row)) == key:
+                self.combo.blockSignals(True)
+                self.combo.setCurrentIndex(row)
+                self.combo.blockSignals(False)
+                break
@@ -0,0 +1,55 @@
+import hashlib, os, tempfile
+
+
+def cache_key(path, suffix):
+    # a file that is replaced or edited in place gets a new entry rather than a stale one
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}\0{stat.st_size}\0{stat.st_mtime_ns}"
+    return hashlib.sha1(key.encode("utf-8", "surrogateescape")).hexdigest() + suffix
+
+
+def write_atomic(cache_path, *chunks):
+    directory = os.path.dirname(cache_path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=".cache-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(temp_path, cache_path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def touch(cache_path):
+    # reading an entry keeps it out of the eviction order
+    try:
+        os.utime(cache_path)
+    except OSError:
+        pass
+
+
+def prune_cache(directory, limit_bytes, suffix):
+    entries = []
+    total = 0
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name.endswith(suffix):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+    except OSError:
+        return
+    for _, size, path in sorted(entries):
+        if total <= limit_bytes:
+            break
+        try:
+            os.unlink(path)
+            total -= size
+        except OSError:
+            pass
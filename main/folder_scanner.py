@@ -0,0 +1,86 @@
+import os, sqlite3, time
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from media_formats import MEDIA_EXTENSIONS
+from library import MediaLibrary
+
+
+class FolderScanner(QThread):
+    batch_found = pyqtSignal(list)
+    progress = pyqtSignal(int, int)
+
+    def __init__(self, folder, library_path=None, recursive=True, batch_size=500, batch_interval=0.1, parent=None):
+        super().__init__(parent)
+        self.folder = folder
+        self.library_path = library_path
+        self.recursive = recursive
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.dirs_scanned = 0
+        self.files_found = 0
+        self.dirs_reused = 0
+
+    def cancel(self):
+        self.requestInterruption()
+
+    def run(self):
+        library = None
+        scan_directory = self.scan_directory
+        if self.library_path:
+            try:
+                library = MediaLibrary(self.library_path)
+                scan_directory = library.scan_directory
+            except (sqlite3.Error, OSError) as e:
+                print(f"Library unavailable, scanning without it: {e}")
+        try:
+            self.walk(scan_directory)
+        finally:
+            if library is not None:
+                self.dirs_reused = library.dirs_reused
+                library.close()
+
+    def walk(self, scan_directory):
+        batch = []
+        last_flush = time.monotonic()
+        pending_dirs = [self.folder]
+
+        while pending_dirs and not self.isInterruptionRequested():
+            directory = pending_dirs.pop()
+            files, subdirs = scan_directory(directory)
+            self.dirs_scanned += 1
+            batch.extend(files)
+            self.files_found += len(files)
+            if self.recursive:
+                pending_dirs.extend(reversed(subdirs))
+
+            now = time.monotonic()
+            if len(batch) >= self.batch_size or now - last_flush >= self.batch_interval:
+                if batch:
+                    self.batch_found.emit(batch)
+                    batch = []
+                self.progress.emit(self.dirs_scanned, self.files_found)
+                last_flush = now
+
+        if batch and not self.isInterruptionRequested():
+            self.batch_found.emit(batch)
+        self.progress.emit(self.dirs_scanned, self.files_found)
+
+    def scan_directory(self, directory):
+        files = []
+        subdirs = []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.name.lower().endswith(MEDIA_EXTENSIONS):
+                            files.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"Folder scan error: {directory} - {e}")
+        files.sort()
+        subdirs.sort()
+        return files, subdirs
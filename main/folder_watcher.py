@@ -0,0 +1,209 @@
+import os, sqlite3
+from collections import Counter
+
+from PyQt6.QtCore import QObject, QThread, QTimer, QFileSystemWatcher, pyqtSignal
+
+from library import MediaLibrary
+
+
+def pair_renames(added, removed):
+    # a rename keeps size and mtime, so a file that vanished and one that appeared with the
+    # same unique pair are taken to be the same track
+    added_counts = Counter(added.values())
+    removed_by_stat = {}
+    for path, stat in removed.items():
+        removed_by_stat.setdefault(stat, []).append(path)
+    renamed = []
+    for path, stat in list(added.items()):
+        candidates = removed_by_stat.get(stat)
+        if candidates and len(candidates) == 1 and added_counts[stat] == 1:
+            old_path = candidates[0]
+            renamed.append((old_path, path))
+            del added[path]
+            del removed[old_path]
+    return renamed
+
+
+class DeltaWorker(QThread):
+    def __init__(self, library_path, directories, roots, generation, parent=None):
+        super().__init__(parent)
+        self.library_path = library_path
+        self.directories = directories
+        self.roots = roots
+        self.generation = generation
+        self.added = []
+        self.removed = []
+        self.renamed = []
+        self.new_dirs = []
+        self.gone_dirs = []
+
+    def run(self):
+        try:
+            library = MediaLibrary(self.library_path)
+        except (sqlite3.Error, OSError) as e:
+            print(f"Folder watcher cannot open the library: {e}")
+            return
+        try:
+            added, removed = {}, {}
+            directories = list(self.directories)
+            for root, check in self.roots:
+                subtree = library.subtree_directories(root)
+                self.new_dirs.extend(subtree)
+                if check:
+                    directories.extend(subtree)
+            for directory in directories:
+                if self.isInterruptionRequested():
+                    return
+                self.collect(library, directory, added, removed)
+            self.renamed = pair_renames(added, removed)
+            self.added = sorted(added)
+            self.removed = sorted(removed)
+        except sqlite3.Error as e:
+            print(f"Folder watcher library error: {e}")
+        finally:
+            library.close()
+
+    def collect(self, library, directory, added, removed):
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        if mtime_ns is not None and mtime_ns == library.directory_mtime(directory):
+            return
+
+        before = library.directory_tracks(directory)
+        if mtime_ns is None:
+            before.update(library.directory_tracks(directory, recursive=True))
+            self.gone_dirs.extend(library.subtree_directories(directory))
+            library.forget_directory(directory)
+            removed.update(before)
+            return
+
+        known_subdirs = set(library.subdirectories(directory))
+        for subdir in known_subdirs:
+            if not os.path.isdir(subdir):
+                before.update(library.directory_tracks(subdir, recursive=True))
+                self.gone_dirs.extend(library.subtree_directories(subdir))
+
+        _, subdirs = library.scan_directory(directory)
+        after = library.directory_tracks(directory)
+        # a directory that appeared (or was moved in) is walked once to pick up its contents
+        pending = [subdir for subdir in subdirs if subdir not in known_subdirs]
+        while pending:
+            subdir = pending.pop()
+            self.new_dirs.append(subdir)
+            _, children = library.scan_directory(subdir)
+            after.update(library.directory_tracks(subdir))
+            pending.extend(children)
+
+        for path in after.keys() - before.keys():
+            added[path] = after[path]
+        for path in before.keys() - after.keys():
+            removed[path] = before[path]
+
+
+class FolderWatcher(QObject):
+    changes_found = pyqtSignal(list, list, list)
+
+    def __init__(self, library_path, debounce_ms=500, poll_interval_ms=5000, max_watches=4096, parent=None):
+        super().__init__(parent)
+        self.library_path = library_path
+        self.max_watches = max_watches
+        self.roots = set()
+        self.watched = set()
+        self.polled = set()
+        self.dirty = set()
+        self.pending_roots = []
+        self.worker = None
+        self.generation = 0
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(debounce_ms)
+        self.debounce_timer.timeout.connect(self.flush)
+
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(poll_interval_ms)
+        self.poll_timer.timeout.connect(self.poll)
+
+    def watch(self, folder, check=False):
+        folder = os.path.normpath(folder)
+        if folder in self.roots:
+            return
+        self.roots.add(folder)
+        self.pending_roots.append((folder, check))
+        self.flush()
+
+    def clear(self):
+        self.generation += 1
+        self.debounce_timer.stop()
+        self.poll_timer.stop()
+        if self.worker is not None:
+            self.worker.requestInterruption()
+        if self.watched:
+            self.watcher.removePaths(list(self.watched))
+        self.roots.clear()
+        self.watched.clear()
+        self.polled.clear()
+        self.dirty.clear()
+        self.pending_roots.clear()
+
+    def shutdown(self):
+        self.clear()
+        if self.worker is not None:
+            self.worker.wait()
+
+    def on_directory_changed(self, directory):
+        self.dirty.add(directory)
+        self.debounce_timer.start()
+
+    def poll(self):
+        self.dirty.update(self.polled)
+        self.flush()
+
+    def flush(self):
+        if self.worker is not None or not (self.dirty or self.pending_roots):
+            return
+        worker = DeltaWorker(self.library_path, sorted(self.dirty), self.pending_roots,
+                             self.generation, self)
+        worker.finished.connect(lambda: self.on_worker_finished(worker))
+        self.dirty = set()
+        self.pending_roots = []
+        self.worker = worker
+        worker.start()
+
+    def on_worker_finished(self, worker):
+        self.worker = None
+        if worker.generation == self.generation:
+            self.remove_watches(worker.gone_dirs)
+            self.add_watches(worker.new_dirs)
+            if worker.added or worker.removed or worker.renamed:
+                self.changes_found.emit(worker.added, worker.removed, worker.renamed)
+        worker.deleteLater()
+        if self.dirty or self.pending_roots:
+            self.debounce_timer.start()
+
+    def add_watches(self, directories):
+        fresh = [directory for directory in dict.fromkeys(directories)
+                 if directory not in self.watched and directory not in self.polled]
+        room = max(0, self.max_watches - len(self.watched))
+        native = fresh[:room]
+        # anything the platform refuses to watch, or beyond the watch budget, is polled instead
+        failed = set(self.watcher.addPaths(native)) if native else set()
+        self.watched.update(directory for directory in native if directory not in failed)
+        self.polled.update(failed)
+        self.polled.update(fresh[room:])
+        if self.polled and not self.poll_timer.isActive():
+            self.poll_timer.start()
+
+    def remove_watches(self, directories):
+        native = [directory for directory in directories if directory in self.watched]
+        if native:
+            self.watcher.removePaths(native)
+        self.watched.difference_update(directories)
+        self.polled.difference_update(directories)
+        if not self.polled:
+            self.poll_timer.stop()
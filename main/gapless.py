@@ -0,0 +1,101 @@
+import time
+from collections import deque
+
+from PyQt6.QtCore import QObject, QUrl, pyqtSignal
+from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
+
+
+class TrackPreloader(QObject):
+    transition_measured = pyqtSignal(float, bool)
+
+    def __init__(self, preload_ms=10000, parent=None):
+        super().__init__(parent)
+        self.preload_ms = preload_ms
+        self.enabled = True
+        self.busy = False
+        self.standby_player = self.standby_output = None
+        self.preloaded_path = None
+        self.transition_started = None
+        self.transition_preloaded = False
+        self.gaps = deque(maxlen=50)
+
+    def start(self):
+        if self.standby_player is None:
+            self.standby_player, self.standby_output = self.create_pair()
+
+    def create_pair(self):
+        player = QMediaPlayer(self)
+        audio_output = QAudioOutput(self)
+        player.setAudioOutput(audio_output)
+        return player, audio_output
+
+    def set_device(self, device):
+        if self.standby_output is not None:
+            self.standby_output.setDevice(device)
+
+    def should_preload(self, position, duration, lead_ms=0):
+        return self.enabled and duration > 0 and duration - position <= self.preload_ms + lead_ms
+
+    def preload(self, file_path):
+        if not self.enabled or self.busy or self.standby_player is None or file_path == self.preloaded_path:
+            return
+        self.preloaded_path = file_path
+        self.standby_output.setVolume(0.0)
+        self.standby_player.setSource(QUrl.fromLocalFile(file_path))
+
+    def discard(self):
+        if self.preloaded_path is not None:
+            self.preloaded_path = None
+            self.standby_player.setSource(QUrl())
+
+    def is_ready(self, file_path):
+        return (not self.busy and file_path == self.preloaded_path
+                and self.standby_player.mediaStatus() in (QMediaPlayer.MediaStatus.LoadedMedia,
+                                                          QMediaPlayer.MediaStatus.BufferedMedia))
+
+    def take(self, file_path, active_player, active_output):
+        if not self.is_ready(file_path):
+            return None
+        player, audio_output = self.standby_player, self.standby_output
+        self.standby_player, self.standby_output = active_player, active_output
+        self.preloaded_path = None
+        return player, audio_output
+
+    def hold(self):
+        self.busy = True
+
+    def release(self, player):
+        self.busy = False
+        player.stop()
+        player.setVideoOutput(None)
+        player.setSource(QUrl())
+
+    def begin_transition(self):
+        self.transition_started = time.perf_counter()
+        self.transition_preloaded = False
+
+    def cancel_transition(self):
+        self.transition_started = None
+
+    def mark_preloaded(self):
+        self.transition_preloaded = True
+
+    def track_started(self, position):
+        if self.transition_started is None or position <= 0:
+            return
+        gap_ms = max(0.0, (time.perf_counter() - self.transition_started) * 1000 - position)
+        self.transition_started = None
+        self.gaps.append((gap_ms, self.transition_preloaded))
+        self.transition_measured.emit(gap_ms, self.transition_preloaded)
+
+    def gap_stats(self):
+        stats = {}
+        for preloaded in (True, False):
+            gaps = [gap for gap, was_preloaded in self.gaps if was_preloaded == preloaded]
+            if gaps:
+                stats["preloaded" if preloaded else "cold"] = {
+                    "count": len(gaps),
+                    "average_ms": round(sum(gaps) / len(gaps), 1),
+                    "max_ms": round(max(gaps), 1),
+                }
+        return stats
@@ -0,0 +1,250 @@
+import os, sqlite3
+
+from media_formats import MEDIA_EXTENSIONS
+
+METADATA_FIELDS = ("duration_ms", "codec", "title", "artist", "album")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS directories_parent ON directories (parent);
+
+CREATE TABLE IF NOT EXISTS tracks (
+    path TEXT PRIMARY KEY,
+    directory TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    duration_ms INTEGER,
+    codec TEXT,
+    title TEXT,
+    artist TEXT,
+    album TEXT
+);
+CREATE INDEX IF NOT EXISTS tracks_directory ON tracks (directory);
+
+CREATE TABLE IF NOT EXISTS loudness (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    album_key TEXT,
+    loudness REAL,
+    peak REAL NOT NULL,
+    histogram BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS loudness_album ON loudness (album_key);
+
+CREATE TABLE IF NOT EXISTS album_loudness (
+    album_key TEXT PRIMARY KEY,
+    loudness REAL,
+    peak REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS watched_folders (
+    path TEXT PRIMARY KEY
+);
+
+CREATE TABLE IF NOT EXISTS session_playlist (
+    position INTEGER PRIMARY KEY,
+    path TEXT NOT NULL
+);
+"""
+
+
+class MediaLibrary:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(db_path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.dirs_reused = 0
+        self.dirs_rescanned = 0
+
+    def close(self):
+        self.connection.close()
+
+    def scan_directory(self, directory):
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError as e:
+            print(f"Library scan error: {directory} - {e}")
+            self.forget_directory(directory)
+            return [], []
+
+        row = self.connection.execute(
+            "SELECT mtime_ns FROM directories WHERE path = ?", (directory,)).fetchone()
+        if row is not None and row[0] == mtime_ns:
+            self.dirs_reused += 1
+            return self.indexed_directory(directory)
+
+        self.dirs_rescanned += 1
+        return self.rescan_directory(directory, mtime_ns)
+
+    def indexed_directory(self, directory):
+        files = [path for (path,) in self.connection.execute(
+            "SELECT path FROM tracks WHERE directory = ? ORDER BY path", (directory,))]
+        subdirs = [path for (path,) in self.connection.execute(
+            "SELECT path FROM directories WHERE parent = ? ORDER BY path", (directory,))]
+        return files, subdirs
+
+    def rescan_directory(self, directory, mtime_ns):
+        files = {}
+        subdirs = []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.name.lower().endswith(MEDIA_EXTENSIONS):
+                            stat = entry.stat()
+                            files[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"Library scan error: {directory} - {e}")
+            return [], []
+
+        known = {path: (size, mtime) for path, size, mtime in self.connection.execute(
+            "SELECT path, size, mtime_ns FROM tracks WHERE directory = ?", (directory,))}
+        changed = [(path, directory, size, mtime) for path, (size, mtime) in files.items()
+                   if known.get(path) != (size, mtime)]
+        removed = [(path,) for path in known if path not in files]
+        known_subdirs = {path for (path,) in self.connection.execute(
+            "SELECT path FROM directories WHERE parent = ?", (directory,))}
+
+        with self.connection:
+            # a changed file keeps its row but loses the metadata probed from the old contents
+            self.connection.executemany(
+                "INSERT INTO tracks (path, directory, size, mtime_ns) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (path) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns, "
+                "duration_ms = NULL, codec = NULL, title = NULL, artist = NULL, album = NULL",
+                changed)
+            self.connection.executemany("DELETE FROM tracks WHERE path = ?", removed)
+            self.connection.executemany("DELETE FROM loudness WHERE path = ?", removed)
+            for subdir in known_subdirs.difference(subdirs):
+                self.delete_subtree(subdir)
+            # subdirectories get a placeholder mtime so their first visit always rescans them
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO directories (path, parent, mtime_ns) VALUES (?, ?, -1)",
+                [(subdir, directory) for subdir in subdirs])
+            self.connection.execute(
+                "INSERT INTO directories (path, parent, mtime_ns) VALUES (?, ?, ?) "
+                "ON CONFLICT (path) DO UPDATE SET mtime_ns = excluded.mtime_ns",
+                (directory, os.path.dirname(directory), mtime_ns))
+
+        return sorted(files), sorted(subdirs)
+
+    def subtree_bounds(self, directory):
+        prefix = directory.rstrip(os.sep) + os.sep
+        # every path below the directory sorts between "dir/" and "dir0" ("0" follows "/")
+        return directory, prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+    def directory_mtime(self, directory):
+        row = self.connection.execute(
+            "SELECT mtime_ns FROM directories WHERE path = ?", (directory,)).fetchone()
+        return row[0] if row else None
+
+    def subdirectories(self, directory):
+        return [path for (path,) in self.connection.execute(
+            "SELECT path FROM directories WHERE parent = ?", (directory,))]
+
+    def subtree_directories(self, directory):
+        return [path for (path,) in self.connection.execute(
+            "SELECT path FROM directories WHERE path = ? OR (path >= ? AND path < ?) ORDER BY path",
+            self.subtree_bounds(directory))]
+
+    def directory_tracks(self, directory, recursive=False):
+        if recursive:
+            rows = self.connection.execute(
+                "SELECT path, size, mtime_ns FROM tracks WHERE directory = ? OR (directory >= ? AND directory < ?)",
+                self.subtree_bounds(directory))
+        else:
+            rows = self.connection.execute(
+                "SELECT path, size, mtime_ns FROM tracks WHERE directory = ?", (directory,))
+        return {path: (size, mtime_ns) for path, size, mtime_ns in rows}
+
+    def forget_directory(self, directory):
+        with self.connection:
+            self.delete_subtree(directory)
+
+    def delete_subtree(self, directory):
+        # leaves the commit to the caller, so a rescan removes vanished subdirectories in its own transaction
+        bounds = self.subtree_bounds(directory)
+        self.connection.execute(
+            "DELETE FROM tracks WHERE directory = ? OR (directory >= ? AND directory < ?)", bounds)
+        self.connection.execute(
+            "DELETE FROM directories WHERE path = ? OR (path >= ? AND path < ?)", bounds)
+        self.connection.execute("DELETE FROM loudness WHERE path >= ? AND path < ?", bounds[1:])
+
+    def cached_metadata(self, path, size, mtime_ns):
+        row = self.connection.execute(
+            "SELECT duration_ms, codec, title, artist, album FROM tracks "
+            "WHERE path = ? AND size = ? AND mtime_ns = ? AND codec IS NOT NULL",
+            (path, size, mtime_ns)).fetchone()
+        if row is None:
+            return None
+        return {key: value for key, value in zip(METADATA_FIELDS, row) if value is not None}
+
+    def store_metadata(self, path, size, mtime_ns, metadata):
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO tracks (path, directory, size, mtime_ns, duration_ms, codec, title, artist, album) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (path) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns, "
+                "duration_ms = excluded.duration_ms, codec = excluded.codec, title = excluded.title, "
+                "artist = excluded.artist, album = excluded.album",
+                (path, os.path.dirname(path), size, mtime_ns)
+                + tuple(metadata.get(key) for key in METADATA_FIELDS))
+
+    def cached_loudness(self, path, size, mtime_ns):
+        return self.connection.execute(
+            "SELECT t.loudness, t.peak, t.album_key, a.loudness, a.peak FROM loudness t "
+            "LEFT JOIN album_loudness a ON a.album_key = t.album_key "
+            "WHERE t.path = ? AND t.size = ? AND t.mtime_ns = ?",
+            (path, size, mtime_ns)).fetchone()
+
+    def store_loudness(self, path, size, mtime_ns, album_key, loudness, peak, histogram, combine_album):
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO loudness (path, size, mtime_ns, album_key, loudness, peak, histogram) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (path) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns, "
+                "album_key = excluded.album_key, loudness = excluded.loudness, peak = excluded.peak, "
+                "histogram = excluded.histogram",
+                (path, size, mtime_ns, album_key, loudness, peak, histogram))
+            if album_key is None:
+                return loudness, peak, None, None, None
+            # the insert holds the write lock, so no other worker can add a track to the album in between
+            album_loudness, album_peak = combine_album(self.connection.execute(
+                "SELECT histogram, peak FROM loudness WHERE album_key = ?", (album_key,)).fetchall())
+            self.connection.execute(
+                "INSERT INTO album_loudness (album_key, loudness, peak) VALUES (?, ?, ?) "
+                "ON CONFLICT (album_key) DO UPDATE SET loudness = excluded.loudness, peak = excluded.peak",
+                (album_key, album_loudness, album_peak))
+        return loudness, peak, album_key, album_loudness, album_peak
+
+    def watched_folders(self):
+        return [path for (path,) in self.connection.execute("SELECT path FROM watched_folders ORDER BY path")]
+
+    def set_watched_folders(self, folders):
+        with self.connection:
+            self.connection.execute("DELETE FROM watched_folders")
+            self.connection.executemany("INSERT OR IGNORE INTO watched_folders (path) VALUES (?)",
+                                        [(folder,) for folder in folders])
+
+    def save_session(self, paths):
+        with self.connection:
+            self.connection.execute("DELETE FROM session_playlist")
+            self.connection.executemany(
+                "INSERT INTO session_playlist (position, path) VALUES (?, ?)", enumerate(paths))
+
+    def load_session(self):
+        return [path for (path,) in self.connection.execute(
+            "SELECT path FROM session_playlist ORDER BY position")]
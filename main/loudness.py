@@ -0,0 +1,337 @@
+import heapq, itertools, math, os, sqlite3
+
+import numpy as np
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from audio_decode import decode, start_pool, stop_pool
+from library import MediaLibrary
+from media_formats import AUDIO_EXTENSIONS
+from metadata_service import BACKGROUND_PRIORITY
+from tag_reader import read_tags
+
+REFERENCE_LOUDNESS = -18.0
+ABSOLUTE_GATE = -70.0
+RELATIVE_GATE = -10.0
+SEGMENT_SECONDS = 0.1
+SEGMENTS_PER_BLOCK = 4
+HISTOGRAM_STEP = 0.1
+HISTOGRAM_BINS = 1000
+# BS.1770 weights for L, R, C, LFE, Ls, Rs; other layouts count every channel once
+SURROUND_WEIGHTS = (1.0, 1.0, 1.0, 0.0, 1.41, 1.41)
+OVERSAMPLE = 4
+HALF_TAPS = 6
+KAISER_BETA = 6.0
+MODES = ("off", "track", "album")
+
+
+def biquad_power(b, a, freqs, rate):
+    z = np.exp(-2j * np.pi * freqs / rate)
+    return np.abs(np.polyval(b[::-1], z) / np.polyval(a[::-1], z)) ** 2
+
+
+def k_weighting_power(freqs, rate):
+    # the BS.1770 high shelf and high-pass stages, redesigned for the stream's own sample rate;
+    # at 48 kHz these reproduce the coefficients tabulated in the standard
+    k = math.tan(math.pi * 1681.974450955533 / rate)
+    q = 0.7071752369554196
+    vh = 10 ** (3.999843853973347 / 20)
+    vb = vh ** 0.4996667741545416
+    shelf_b = (vh + vb * k / q + k * k, 2 * (k * k - vh), vh - vb * k / q + k * k)
+    shelf_a = (1 + k / q + k * k, 2 * (k * k - 1), 1 - k / q + k * k)
+    k = math.tan(math.pi * 38.13547087602444 / rate)
+    q = 0.5003270373238773
+    highpass_b = (1.0, -2.0, 1.0)
+    highpass_a = (1 + k / q + k * k, 2 * (k * k - 1), 1 - k / q + k * k)
+    highpass_b = tuple(coefficient * highpass_a[0] for coefficient in highpass_b)
+    return (biquad_power(np.array(shelf_b), np.array(shelf_a), freqs, rate)
+            * biquad_power(np.array(highpass_b), np.array(highpass_a), freqs, rate))
+
+
+def interpolation_matrix():
+    # Kaiser-windowed sinc taps for the three points between each pair of samples at 4x oversampling
+    offsets = np.arange(-HALF_TAPS + 1, HALF_TAPS + 1)
+    t = (np.arange(1, OVERSAMPLE) / OVERSAMPLE)[:, None] - offsets[None, :]
+    taps = np.sinc(t) * np.i0(KAISER_BETA * np.sqrt(1 - (t / HALF_TAPS) ** 2)) / np.i0(KAISER_BETA)
+    return offsets, (taps / taps.sum(axis=1, keepdims=True)).T.astype(np.float32)
+
+
+class TruePeakMeter:
+    def __init__(self, channels):
+        self.offsets, self.taps = interpolation_matrix()
+        self.carry = np.zeros((2 * HALF_TAPS, channels), dtype=np.float32)
+        self.peak = 0.0
+
+    def feed(self, block):
+        self.peak = max(self.peak, float(np.abs(block).max(initial=0.0)))
+        buffer = np.concatenate((self.carry, block))
+        self.carry = buffer[-2 * HALF_TAPS:]
+        start, stop = HALF_TAPS, len(buffer) - HALF_TAPS
+        threshold = 0.5 * self.peak
+        for channel in range(buffer.shape[1]):
+            samples = buffer[:, channel]
+            loud = np.abs(samples) >= threshold
+            # an inter-sample peak well above both neighbours is not band-limited audio,
+            # so only the gaps next to loud samples need interpolating
+            positions = np.nonzero(loud[start:stop] | loud[start + 1:stop + 1])[0] + start
+            if len(positions):
+                windows = samples[positions[:, None] + self.offsets]
+                self.peak = max(self.peak, float(np.abs(windows @ self.taps).max()))
+
+    def finish(self):
+        self.feed(np.zeros_like(self.carry))
+        return self.peak
+
+
+class LoudnessMeter:
+    def __init__(self, rate, channels):
+        self.segment = max(1, round(rate * SEGMENT_SECONDS))
+        freqs = np.fft.rfftfreq(self.segment, 1 / rate)
+        # Parseval: one-sided bins count twice except DC and Nyquist
+        bins = np.full(len(freqs), 2.0)
+        bins[0] = 1.0
+        if self.segment % 2 == 0:
+            bins[-1] = 1.0
+        self.spectrum_weights = k_weighting_power(freqs, rate) * bins / self.segment ** 2
+        self.channel_weights = np.array(SURROUND_WEIGHTS if channels == 6 else (1.0,) * channels)
+        self.leftover = np.zeros((0, channels), dtype=np.float32)
+        self.energies = []
+        self.true_peak = TruePeakMeter(channels)
+
+    def feed(self, block):
+        self.true_peak.feed(block)
+        if len(self.leftover):
+            block = np.concatenate((self.leftover, block))
+        count = len(block) // self.segment
+        usable = count * self.segment
+        self.leftover = block[usable:].copy()
+        if not count:
+            return
+        # K-weighted mean square of every 100 ms segment from its spectrum, all segments at once
+        spectrum = np.fft.rfft(block[:usable].reshape(count, self.segment, -1), axis=1)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        self.energies.append(np.einsum("nkc,k->nc", power, self.spectrum_weights) @ self.channel_weights)
+
+    def finish(self):
+        peak = self.true_peak.finish()
+        energies = np.concatenate(self.energies) if self.energies else np.zeros(0)
+        histogram = np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+        if len(energies) < SEGMENTS_PER_BLOCK:
+            return None, peak, histogram
+        # 400 ms gating blocks overlapping by 75% are the mean of four consecutive segments
+        blocks = np.convolve(energies, np.full(SEGMENTS_PER_BLOCK, 1 / SEGMENTS_PER_BLOCK), "valid")
+        with np.errstate(divide="ignore"):
+            levels = -0.691 + 10 * np.log10(blocks)
+        gated = levels > ABSOLUTE_GATE
+        if not gated.any():
+            return None, peak, histogram
+        bins = np.clip(((levels[gated] - ABSOLUTE_GATE) / HISTOGRAM_STEP).astype(np.int64), 0, HISTOGRAM_BINS - 1)
+        histogram += np.bincount(bins, minlength=HISTOGRAM_BINS)
+        relative = -0.691 + 10 * math.log10(blocks[gated].mean()) + RELATIVE_GATE
+        gated &= levels > relative
+        return -0.691 + 10 * math.log10(blocks[gated].mean()), peak, histogram
+
+
+def measure(path):
+    meters = {}
+
+    def consume(block, rate):
+        meter = meters.get("meter")
+        if meter is None:
+            meter = meters["meter"] = LoudnessMeter(rate, block.shape[1])
+        meter.feed(block)
+
+    decode(path, consume, mono=False)
+    if "meter" not in meters:
+        raise ValueError(f"no audio decoded from {path}")
+    return meters["meter"].finish()
+
+
+def pack_histogram(histogram):
+    # only occupied bins are stored: (bin, count) pairs
+    bins = np.nonzero(histogram)[0]
+    return bins.astype("<u2").tobytes() + histogram[bins].astype("<u4").tobytes()
+
+
+def unpack_histogram(blob):
+    count = len(blob) // 6
+    histogram = np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+    bins = np.frombuffer(blob, dtype="<u2", count=count)
+    histogram[bins] = np.frombuffer(blob, dtype="<u4", count=count, offset=count * 2)
+    return histogram
+
+
+def histogram_loudness(histogram):
+    if not histogram.any():
+        return None
+    levels = ABSOLUTE_GATE + (np.arange(HISTOGRAM_BINS) + 0.5) * HISTOGRAM_STEP
+    energies = 10 ** ((levels + 0.691) / 10)
+    relative = -0.691 + 10 * math.log10((histogram * energies).sum() / histogram.sum()) + RELATIVE_GATE
+    gated = histogram * (levels > relative)
+    return -0.691 + 10 * math.log10((gated * energies).sum() / gated.sum())
+
+
+def combine_album(rows):
+    histogram = sum((unpack_histogram(blob) for blob, _ in rows), np.zeros(HISTOGRAM_BINS, dtype=np.int64))
+    return histogram_loudness(histogram), max((peak for _, peak in rows), default=0.0)
+
+
+def album_key(path, metadata):
+    album = (metadata or {}).get("album")
+    if not album:
+        return None
+    return f"{os.path.dirname(path)}\0{album}"
+
+
+def gain_factor(loudness, peak, reference=REFERENCE_LOUDNESS):
+    if loudness is None:
+        return 1.0
+    factor = 10 ** ((reference - loudness) / 20)
+    # never raise a track past the point where its true peak would clip
+    if peak > 0:
+        factor = min(factor, 1.0 / peak)
+    return factor
+
+
+worker_library = None
+
+
+def open_worker_library(library_path):
+    global worker_library
+    if library_path:
+        try:
+            worker_library = MediaLibrary(library_path)
+        except (sqlite3.Error, OSError) as e:
+            print(f"Loudness cache unavailable: {e}")
+
+
+def analyze(path):
+    stat = os.stat(path)
+    library = worker_library
+    if library is not None:
+        try:
+            row = library.cached_loudness(path, stat.st_size, stat.st_mtime_ns)
+            if row is not None:
+                return row
+        except sqlite3.Error as e:
+            print(f"Loudness cache read error: {path} - {e}")
+    loudness, peak, histogram = measure(path)
+    metadata = None
+    if library is not None:
+        metadata = library.cached_metadata(path, stat.st_size, stat.st_mtime_ns)
+    key = album_key(path, metadata if metadata is not None else read_tags(path))
+    if library is not None:
+        try:
+            return library.store_loudness(path, stat.st_size, stat.st_mtime_ns, key, loudness, peak,
+                                          pack_histogram(histogram), combine_album)
+        except sqlite3.Error as e:
+            print(f"Loudness cache write error: {path} - {e}")
+    return loudness, peak, key, None, None
+
+
+def analyze_paths(paths):
+    # runs in a worker process; cached tracks only cost a library lookup
+    results = []
+    for path in paths:
+        try:
+            results.append((path, analyze(path)))
+        except (OSError, ValueError, sqlite3.Error) as e:
+            print(f"Loudness analysis failed: {path} - {e}")
+            results.append((path, None))
+    return results
+
+
+class LoudnessService(QObject):
+    analyzed = pyqtSignal(str)
+    batch_done = pyqtSignal(object)
+
+    def __init__(self, library_path=None, max_workers=None, batch_size=8, parent=None):
+        super().__init__(parent)
+        self.library_path = library_path
+        self.max_workers = max_workers or max(1, min(4, (os.cpu_count() or 1) - 1))
+        self.batch_size = batch_size
+        self.executor = None
+        self.tracks = {}
+        self.albums = {}
+        self.queue = []
+        self.queued_priority = {}
+        self.counter = itertools.count()
+        self.in_flight = 0
+        self.running = True
+        self.batch_done.connect(self.on_batch_done)
+
+    def request(self, paths, priority=BACKGROUND_PRIORITY):
+        for path in paths:
+            if path in self.tracks or not path.lower().endswith(AUDIO_EXTENSIONS):
+                continue
+            if self.queued_priority.get(path, priority + 1) <= priority:
+                continue
+            self.queued_priority[path] = priority
+            heapq.heappush(self.queue, (priority, next(self.counter), path))
+        self.pump()
+
+    def clear(self):
+        self.queue.clear()
+        self.queued_priority.clear()
+
+    def pump(self):
+        # a bounded number of batches in flight keeps a current-track request from queueing behind the playlist
+        while self.running and self.queue and self.in_flight < self.max_workers * 2:
+            batch = []
+            while self.queue and len(batch) < self.batch_size:
+                priority, _, path = heapq.heappop(self.queue)
+                if self.queued_priority.get(path) != priority:
+                    continue
+                del self.queued_priority[path]
+                batch.append(path)
+                if priority < BACKGROUND_PRIORITY:
+                    break
+            if not batch:
+                continue
+            if self.executor is None:
+                self.executor = start_pool(self.max_workers, open_worker_library, self.library_path)
+            self.in_flight += 1
+            self.executor.submit(analyze_paths, batch).add_done_callback(self.on_future_done)
+
+    def on_future_done(self, future):
+        if not self.running:
+            return
+        results = []
+        if not future.cancelled():
+            try:
+                results = future.result()
+            except Exception as e:
+                print(f"Loudness worker failed: {e}")
+        self.batch_done.emit(results)
+
+    def on_batch_done(self, results):
+        self.in_flight -= 1
+        for path, result in results:
+            if result is None:
+                self.tracks[path] = None
+            else:
+                loudness, peak, key, album_loudness, album_peak = result
+                self.tracks[path] = (loudness, peak, key)
+                if key is not None and album_peak is not None:
+                    self.albums[key] = (album_loudness, album_peak)
+            self.analyzed.emit(path)
+        self.pump()
+
+    def shares_album(self, path, other_path):
+        track, other = self.tracks.get(path), self.tracks.get(other_path)
+        return track is not None and other is not None and track[2] is not None and track[2] == other[2]
+
+    def gain(self, path, mode):
+        track = self.tracks.get(path) if mode != "off" else None
+        if track is None:
+            return 1.0
+        loudness, peak, key = track
+        if mode == "album" and key in self.albums:
+            loudness, peak = self.albums[key]
+        return gain_factor(loudness, peak)
+
+    def shutdown(self):
+        self.running = False
+        self.clear()
+        if self.executor is not None:
+            stop_pool(self.executor)
@@ -1,61 +1,317 @@
+from startup import StartupTimeline
+
+STARTUP = StartupTimeline()
+
+import sys
+from single_instance import forward_to_running_instance, SingleInstanceServer
+
+if __name__ == "__main__" and forward_to_running_instance(sys.argv[1:]):
+    sys.exit(0)
+
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QPushButton, QVBoxLayout, QLabel, QFileDialog,
-    QListWidget, QSlider, QHBoxLayout, QToolBar, QFrame, QGraphicsDropShadowEffect,
-    QSpacerItem, QSizePolicy, QProgressBar, QComboBox, QCheckBox, QGroupBox
+    QListView, QSlider, QHBoxLayout, QToolBar, QFrame, QGraphicsDropShadowEffect,
+    QSpacerItem, QSizePolicy, QProgressBar, QComboBox, QCheckBox, QGroupBox, QSpinBox, QLineEdit,
+    QStyle, QStyleOptionSlider
 )
 from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput, QAudioDevice, QMediaDevices
 from PyQt6.QtMultimedia import QMediaDevices, QMediaPlayer, QAudioOutput
 from PyQt6.QtMultimediaWidgets import QVideoWidget
-from PyQt6.QtCore import Qt, QUrl, QTimer, QPropertyAnimation, QEasingCurve, pyqtSignal, QThread, QSize
-from PyQt6.QtGui import QPalette, QColor, QFont, QAction, QIcon, QPainter, QPen, QBrush
-import sys, os, random, math
+from PyQt6.QtCore import Qt, QEvent, QPoint, QUrl, QTimer, QStandardPaths, QPropertyAnimation, QEasingCurve, pyqtSignal, QThread, QSize, QLineF
+from PyQt6.QtGui import QPalette, QColor, QFont, QAction, QPainter, QPen, QBrush, QPixmap
+import os, math, time, bisect, itertools, sqlite3
+
+from playlist import Playlist
+from playlist_model import PlaylistModel
+from shuffle_order import ShuffleOrder
+from folder_scanner import FolderScanner
+from media_formats import AUDIO_EXTENSIONS
+from library import MediaLibrary
+from metadata_service import MetadataService, VISIBLE_PRIORITY, CURRENT_PRIORITY
+from spectrum_analyzer import AudioSpectrumSource
+from gapless import TrackPreloader
+from crossfade import CrossfadeEngine
+from seek_controller import SeekController
+from resources import icon_cache
+from themes import ThemeEngine, set_state
+from devices import AudioDeviceManager
+from folder_watcher import FolderWatcher
+from search_index import SearchIndex
+from playlist_io import PlaylistImporter, export_playlist, PLAYLIST_EXTENSIONS, PLAYLIST_FILTER, EXPORT_FILTERS
+from waveform import WaveformService
+from loudness import LoudnessService, MODES as NORMALIZATION_MODES
+from thumbnails import ThumbnailService, ICON_SIZE as THUMBNAIL_ICON_SIZE
+from previews import PreviewService
+from subtitles import SubtitleLoader
+
+STARTUP.mark("import")
+
+VISUALIZER_COLORS = {
+    "dark": ("#45b7d1", "#4ecdc4", "#ff6b6b"),
+    "light": ("#90caf9", "#42a5f5", "#1565c0"),
+    "neon": ("#00ffff", "#ff00ff", "#ffffff"),
+}
+
+WAVEFORM_COLORS = {
+    "dark": ("#4ecdc4", "#5a5a5a"),
+    "light": ("#1976d2", "#bdbdbd"),
+    "neon": ("#ff00ff", "#2d6b6b"),
+}
+
+MIN_BAR_HEIGHT = 5
+MAX_BAR_HEIGHT = 60
+
 
 class AudioVisualizerWidget(QWidget):
-    def __init__(self):
+    bar_count_changed = pyqtSignal(int)
+    sprite_cache = {}
+    sprite_cache_size = 8
+
+    def __init__(self, bar_count=32):
         super().__init__()
         self.setFixedHeight(80)
-        self.bars = [random.randint(5, 60) for _ in range(32)]
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_bars)
+        self.bar_count = bar_count
+        self.bars = [MIN_BAR_HEIGHT] * bar_count
         self.is_playing = False
+        self.theme = "dark"
+        self.render_mode = "cached"
+        self.profile_paint = bool(os.environ.get("NEON_PROFILE_PAINT"))
+        self.paint_frames = 0
+        self.last_paint_ms = 0.0
+        self.average_paint_ms = 0.0
+        self.peak_paint_ms = 0.0
+        
+    def set_bar_count(self, bar_count):
+        self.bar_count = bar_count
+        self.bars = [MIN_BAR_HEIGHT] * bar_count
+        self.bar_count_changed.emit(bar_count)
+        self.update()
+        
+    def set_theme(self, theme_name):
+        self.theme = theme_name
+        self.update()
         
     def start_visualization(self):
         self.is_playing = True
-        self.timer.start(50)
         
     def stop_visualization(self):
         self.is_playing = False
-        self.timer.stop()
-        self.bars = [5] * 32
-        self.update()
+        self.update_bars([MIN_BAR_HEIGHT] * self.bar_count)
+        if self.profile_paint and self.paint_frames:
+            print(f"Visualizer paint cost: {self.paint_stats()}")
         
-    def update_bars(self):
-        if self.is_playing:
-            for i in range(len(self.bars)):
-                self.bars[i] = max(5, self.bars[i] + random.randint(-15, 15))
-                self.bars[i] = min(60, self.bars[i])
-        self.update()
+    def set_spectrum(self, levels):
+        if not self.is_playing or len(levels) != self.bar_count:
+            return
+        if not self.isVisible() or self.window().isMinimized():
+            return
+        self.update_bars((MIN_BAR_HEIGHT + levels * (MAX_BAR_HEIGHT - MIN_BAR_HEIGHT)).astype(int).tolist())
+        
+    def update_bars(self, bars):
+        changed = [i for i, (old, new) in enumerate(zip(self.bars, bars)) if old != new]
+        tallest = max([self.bars[i] for i in changed] + [bars[i] for i in changed], default=0)
+        self.bars = bars
+        if not changed or not self.isVisible():
+            return
+        step = self.bar_width() + 2
+        first, last = changed[0], changed[-1]
+        self.update(first * step, self.height() - tallest, (last - first + 1) * step, tallest)
+        
+    def bar_width(self):
+        return max(1, self.width() // max(1, len(self.bars)) - 2)
+        
+    def bar_sprites(self, bar_width):
+        ratio = self.devicePixelRatioF()
+        key = (self.theme, bar_width, ratio)
+        sprites = self.sprite_cache.get(key)
+        if sprites is None:
+            low, mid, high = (QColor(c) for c in VISUALIZER_COLORS.get(self.theme, VISUALIZER_COLORS["dark"]))
+            sprites = [None]
+            for height in range(1, MAX_BAR_HEIGHT + 1):
+                pixmap = QPixmap(math.ceil(bar_width * ratio), math.ceil(height * ratio))
+                pixmap.setDevicePixelRatio(ratio)
+                pixmap.fill(Qt.GlobalColor.transparent)
+                painter = QPainter(pixmap)
+                painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+                painter.setPen(Qt.PenStyle.NoPen)
+                painter.setBrush(high if height > 40 else mid if height > 25 else low)
+                painter.drawRoundedRect(0, 0, bar_width, height, 2, 2)
+                painter.end()
+                sprites.append(pixmap)
+            if len(self.sprite_cache) >= self.sprite_cache_size:
+                del self.sprite_cache[next(iter(self.sprite_cache))]
+            self.sprite_cache[key] = sprites
+        return sprites
+        
+    def paint_stats(self):
+        return {
+            "frames": self.paint_frames,
+            "last_ms": round(self.last_paint_ms, 4),
+            "average_ms": round(self.average_paint_ms, 4),
+            "peak_ms": round(self.peak_paint_ms, 4),
+        }
         
     def paintEvent(self, event):
+        started = time.perf_counter()
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         
-        width = self.width()
-        bar_width = width // len(self.bars) - 2
-        
-        for i, height in enumerate(self.bars):
-            x = i * (bar_width + 2)
-            y = self.height() - height
-            
-            if height > 40:
-                painter.setBrush(QBrush(QColor("#ff6b6b")))
-            elif height > 25:
-                painter.setBrush(QBrush(QColor("#4ecdc4")))
-            else:
-                painter.setBrush(QBrush(QColor("#45b7d1")))
-                
+        bar_width = self.bar_width()
+        step = bar_width + 2
+        rect = event.rect()
+        first = max(0, rect.left() // step)
+        last = min(len(self.bars) - 1, rect.right() // step)
+        
+        if self.render_mode == "cached":
+            sprites = self.bar_sprites(bar_width)
+            for i in range(first, last + 1):
+                height = min(self.bars[i], MAX_BAR_HEIGHT)
+                painter.drawPixmap(i * step, self.height() - height, sprites[height])
+        else:
+            low, mid, high = VISUALIZER_COLORS.get(self.theme, VISUALIZER_COLORS["dark"])
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
             painter.setPen(Qt.PenStyle.NoPen)
-            painter.drawRoundedRect(x, y, bar_width, height, 2, 2)
+            for i in range(first, last + 1):
+                height = self.bars[i]
+                painter.setBrush(QBrush(QColor(high if height > 40 else mid if height > 25 else low)))
+                painter.drawRoundedRect(i * step, self.height() - height, bar_width, height, 2, 2)
+        painter.end()
+        
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.paint_frames += 1
+        self.last_paint_ms = elapsed_ms
+        self.average_paint_ms += (elapsed_ms - self.average_paint_ms) / min(self.paint_frames, 60)
+        self.peak_paint_ms = max(self.peak_paint_ms, elapsed_ms)
+
+class WaveformSlider(QSlider):
+    def __init__(self):
+        super().__init__(Qt.Orientation.Horizontal)
+        self.setMinimumHeight(44)
+        self.setMouseTracking(True)
+        self.waveform = None
+        self.theme = "dark"
+        self.layers = None
+        self.layers_key = None
+        self.preview = None
+        self.preview_popup = None
+
+    def set_waveform(self, waveform):
+        if waveform is self.waveform:
+            return
+        self.waveform = waveform
+        self.layers = None
+        # the stylesheet drops the groove fill while a waveform is drawn in its place
+        set_state(self, "waveform" if waveform is not None and len(waveform) else None)
+        self.update()
+
+    def set_preview(self, preview):
+        self.preview = preview
+        if preview is None:
+            self.hide_preview()
+
+    def set_theme(self, theme_name):
+        self.theme = theme_name
+        self.layers = None
+        self.update()
+
+    def slider_span(self):
+        option = QStyleOptionSlider()
+        self.initStyleOption(option)
+        groove = self.style().subControlRect(QStyle.ComplexControl.CC_Slider, option,
+                                             QStyle.SubControl.SC_SliderGroove, self)
+        handle = self.style().subControlRect(QStyle.ComplexControl.CC_Slider, option,
+                                             QStyle.SubControl.SC_SliderHandle, self)
+        return groove.left() + handle.width() // 2, groove.width() - handle.width()
+
+    def show_preview(self, x):
+        if self.preview is None or not len(self.preview) or self.maximum() <= 0:
+            return
+        left, span = self.slider_span()
+        if self.isSliderDown():
+            position = self.sliderPosition()
+        else:
+            position = QStyle.sliderValueFromPosition(self.minimum(), self.maximum(), x - left, span)
+        # the frame comes from the preview index already in memory; the player is never asked to seek
+        pixmap = self.preview.frame_at(position)
+        if pixmap is None or pixmap.isNull():
+            return
+        if self.preview_popup is None:
+            self.preview_popup = QLabel(self, Qt.WindowType.ToolTip)
+            self.preview_popup.setObjectName("seekPreview")
+        self.preview_popup.setPixmap(pixmap)
+        self.preview_popup.adjustSize()
+        handle_x = left + QStyle.sliderPositionFromValue(self.minimum(), self.maximum(), position, span)
+        self.preview_popup.move(self.mapToGlobal(QPoint(handle_x - self.preview_popup.width() // 2,
+                                                        -self.preview_popup.height() - 6)))
+        self.preview_popup.show()
+
+    def hide_preview(self):
+        if self.preview_popup is not None:
+            self.preview_popup.hide()
+
+    def mouseMoveEvent(self, event):
+        super().mouseMoveEvent(event)
+        self.show_preview(int(event.position().x()))
+
+    def mouseReleaseEvent(self, event):
+        super().mouseReleaseEvent(event)
+        if not self.rect().contains(event.position().toPoint()):
+            self.hide_preview()
+
+    def leaveEvent(self, event):
+        if not self.isSliderDown():
+            self.hide_preview()
+        super().leaveEvent(event)
+
+    def groove_rect(self, option):
+        groove = self.style().subControlRect(QStyle.ComplexControl.CC_Slider, option,
+                                             QStyle.SubControl.SC_SliderGroove, self)
+        return groove.adjusted(0, -groove.top(), 0, self.height() - groove.bottom() - 1)
+
+    def waveform_layers(self, rect):
+        ratio = self.devicePixelRatioF()
+        key = (rect.width(), rect.height(), ratio, self.theme, self.maximum())
+        if self.layers is not None and self.layers_key == key:
+            return self.layers
+        columns = self.waveform.columns(rect.width(), self.maximum())
+        middle = rect.height() / 2
+        peak_lines = [QLineF(x + 0.5, middle - high * middle, x + 0.5, middle - low * middle)
+                      for x, (low, high, _) in enumerate(columns.tolist())]
+        rms_lines = [QLineF(x + 0.5, middle - rms * middle, x + 0.5, middle + rms * middle)
+                     for x, (_, _, rms) in enumerate(columns.tolist())]
+        layers = []
+        # drawn once per size, theme and duration; painting the slider only blits the two layers
+        for color in WAVEFORM_COLORS.get(self.theme, WAVEFORM_COLORS["dark"]):
+            pixmap = QPixmap(math.ceil(rect.width() * ratio), math.ceil(rect.height() * ratio))
+            pixmap.setDevicePixelRatio(ratio)
+            pixmap.fill(Qt.GlobalColor.transparent)
+            painter = QPainter(pixmap)
+            pen_color = QColor(color)
+            pen_color.setAlpha(110)
+            painter.setPen(QPen(pen_color, 1))
+            painter.drawLines(peak_lines)
+            painter.setPen(QPen(QColor(color), 1))
+            painter.drawLines(rms_lines)
+            painter.end()
+            layers.append(pixmap)
+        self.layers = layers
+        self.layers_key = key
+        return layers
+
+    def paintEvent(self, event):
+        if self.waveform is not None and len(self.waveform) and self.maximum() > 0:
+            option = QStyleOptionSlider()
+            self.initStyleOption(option)
+            rect = self.groove_rect(option)
+            played, unplayed = self.waveform_layers(rect)
+            handle = self.style().subControlRect(QStyle.ComplexControl.CC_Slider, option,
+                                                 QStyle.SubControl.SC_SliderHandle, self)
+            split = min(max(handle.center().x() - rect.left(), 0), rect.width())
+            painter = QPainter(self)
+            painter.drawPixmap(rect.topLeft(), unplayed)
+            ratio = played.devicePixelRatio()
+            painter.drawPixmap(rect.left(), rect.top(), played, 0, 0, math.ceil(split * ratio), played.height())
+            painter.end()
+        super().paintEvent(event)
 
 class ModernButton(QPushButton):
     def __init__(self, text="", icon_path=""):
@@ -65,10 +321,12 @@ class ModernButton(QPushButton):
         self.setMinimumSize(50, 50)
         self.setMaximumSize(80, 80)
         
-        if icon_path and os.path.exists(icon_path):
-            self.setIcon(QIcon(icon_path))
+        icon = icon_cache().icon(icon_path) if icon_path else None
+        if icon:
+            self.setIcon(icon)
             self.setIconSize(QSize(32, 32))
-        
+
+    def add_shadow(self):
         shadow = QGraphicsDropShadowEffect()
         shadow.setBlurRadius(15)
         shadow.setColor(QColor(0, 0, 0, 80))
@@ -76,12 +334,21 @@ class ModernButton(QPushButton):
         self.setGraphicsEffect(shadow)
 
 class MediaPlayer(QWidget):
-    def __init__(self):
+    def __init__(self, startup=STARTUP):
         super().__init__()
+        self.startup = startup
+        self.startup_finished = False
+        self.pending_commands = []
         self.setWindowTitle("Neon Media Player Pro")
         self.setGeometry(100, 100, 1200, 800)
         self.setMinimumSize(800, 600)
 
+        self.icons = icon_cache()
+        self.themes = ThemeEngine()
+        font = self.font()
+        font.setFamily("Segoe UI")
+        self.setFont(font)
+
         self.player = QMediaPlayer(self)
         self.audio_output = QAudioOutput(self)
         
@@ -89,32 +356,179 @@ class MediaPlayer(QWidget):
         
         self.player.setAudioOutput(self.audio_output)
 
-        self.video_widget = QVideoWidget(self)
-        self.player.setVideoOutput(self.video_widget)
+        self.video_widget = None
+        self.subtitle_loader = None
+        self.subtitle_track = None
+        self.subtitle_segment = (0, 0)
+        self.subtitle_text = ""
+
+        self.preloader = TrackPreloader(parent=self)
+        self.preloader.transition_measured.connect(self.on_transition_measured)
 
-        self.playlist = []
+        self.crossfade = CrossfadeEngine(self.effective_volume, parent=self)
+        self.crossfade.fade_finished.connect(self.preloader.release)
+        self.crossfade_pending = False
+
+        self.playlist = Playlist()
         self.current_index = -1
         self.is_fullscreen = False
         self.current_theme = "dark"
 
-        self.timer = QTimer(self)
-        self.timer.setInterval(1000)
-        self.timer.timeout.connect(self.update_time_slider)
+        self.seek_controller = SeekController(self.seek_position, parent=self)
+        self.displayed_second = None
 
         self.visualizer = AudioVisualizerWidget()
+        self.spectrum_source = AudioSpectrumSource(self.visualizer.bar_count, self)
+        self.spectrum_source.attach(self.player)
+        self.spectrum_source.spectrum_ready.connect(self.visualizer.set_spectrum)
+        self.visualizer.bar_count_changed.connect(self.spectrum_source.analyzer.set_bar_count)
 
         self.shuffle_enabled = False
-        self.shuffled_indices = []
+        self.shuffle_order = ShuffleOrder(seed=os.environ.get("NEON_SHUFFLE_SEED"))
         self.repeat_mode = 0
         self.is_muted = False
         self.previous_volume = 70
 
+        self.folder_scanner = None
+        self.playlist_importer = None
+        self.queued_playlists = []
+        self.library_path = os.path.join(
+            QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation), "library.sqlite3")
+        try:
+            self.library = MediaLibrary(self.library_path)
+        except (sqlite3.Error, OSError) as e:
+            print(f"Media library unavailable: {e}")
+            self.library = None
+            self.library_path = None
+
+        self.folder_watcher = None
+        if self.library_path:
+            self.folder_watcher = FolderWatcher(self.library_path, parent=self)
+            self.folder_watcher.changes_found.connect(self.on_folder_changes)
+
+        self.metadata_service = MetadataService(self.library_path, parent=self)
+        self.metadata_service.metadata_ready.connect(self.on_metadata_ready)
+        self.thumbnails = ThumbnailService(os.path.join(
+            QStandardPaths.writableLocation(QStandardPaths.StandardLocation.CacheLocation), "thumbnails"), parent=self)
+        self.thumbnails.thumbnail_ready.connect(self.on_thumbnail_ready)
+        self.playlist_model = PlaylistModel(self.playlist, self.metadata_service.get, self, self.thumbnails.get)
+
+        self.search_index = SearchIndex(self.playlist.path_of_id, self.metadata_service.get)
+
+        self.waveforms = WaveformService(os.path.join(
+            QStandardPaths.writableLocation(QStandardPaths.StandardLocation.CacheLocation), "waveforms"), parent=self)
+        self.waveforms.waveform_ready.connect(self.on_waveform_ready)
+
+        self.previews = PreviewService(os.path.join(
+            QStandardPaths.writableLocation(QStandardPaths.StandardLocation.CacheLocation), "previews"), parent=self)
+        self.previews.preview_ready.connect(self.on_preview_ready)
+
+        self.loudness = LoudnessService(self.library_path, parent=self)
+        self.loudness.analyzed.connect(self.on_loudness_analyzed)
+        self.normalization_mode = "off"
+        self.track_gain = 1.0
+        self.search_index_timer = QTimer(self)
+        self.search_index_timer.setInterval(0)
+        self.search_index_timer.timeout.connect(self.drain_search_index)
+
+        self.visible_metadata_timer = QTimer(self)
+        self.visible_metadata_timer.setSingleShot(True)
+        self.visible_metadata_timer.setInterval(50)
+        self.visible_metadata_timer.timeout.connect(self.request_visible_metadata)
+
         self.create_ui()
         self.apply_theme("dark")
         
-        self.player.playbackStateChanged.connect(self.on_playback_state_changed)
-        self.player.mediaStatusChanged.connect(self.on_media_status_changed)
-        self.player.errorOccurred.connect(self.on_error_occurred)
+        self.connect_player(self.player)
+        self.startup.mark("construct")
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.startup.mark("first paint") is not None:
+            QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        # none of these are needed for the first paint, and together they cost a player, several
+        # worker threads and their SQLite connections
+        self.preloader.start()
+        self.spectrum_source.start()
+        self.metadata_service.start()
+        self.thumbnails.start()
+        self.devices.start()
+        for button in self.findChildren(ModernButton):
+            button.add_shadow()
+        self.restore_session()
+        self.startup_finished = True
+        for message in self.pending_commands:
+            self.handle_remote_command(message)
+        self.pending_commands.clear()
+        self.startup.mark("interactive")
+        if self.startup.profile:
+            print(self.startup.summary())
+
+    def handle_remote_command(self, message):
+        command = message["command"]
+        if command in ("open", "enqueue"):
+            if not self.startup_finished:
+                self.pending_commands.append(message)
+                return {"ok": True, "queued": True}
+            paths = [path for path in message.get("paths", []) if os.path.isfile(path)]
+            playlists = [path for path in paths if path.lower().endswith(PLAYLIST_EXTENSIONS)]
+            if playlists:
+                self.load_playlist_files(playlists)
+                paths = [path for path in paths if path not in playlists]
+            self.add_files_to_playlist(paths)
+            if command == "open":
+                if paths:
+                    self.play_media(self.playlist.index_of(paths[0]))
+                self.raise_window()
+            return {"ok": True, "added": len(paths), "playlists": len(playlists)}
+        if command == "play":
+            if self.player.playbackState() != QMediaPlayer.PlaybackState.PlayingState:
+                self.toggle_play()
+        elif command == "pause":
+            self.crossfade.finish()
+            self.player.pause()
+        elif command == "toggle":
+            self.toggle_play()
+        elif command == "stop":
+            self.player.stop()
+        elif command == "next":
+            self.next_media()
+        elif command == "prev":
+            self.prev_media()
+        elif command == "seek":
+            self.player.setPosition(max(0, int(message.get("position_ms", 0))))
+        elif command == "raise":
+            self.raise_window()
+        current = self.playlist[self.current_index] if self.current_index >= 0 else None
+        return {
+            "ok": True,
+            "track": current,
+            "position_ms": self.player.position(),
+            "duration_ms": self.player.duration(),
+            "playing": self.player.playbackState() == QMediaPlayer.PlaybackState.PlayingState,
+        }
+
+    def raise_window(self):
+        if self.isMinimized():
+            self.showNormal()
+        self.raise_()
+        self.activateWindow()
+
+    def ensure_video_widget(self):
+        if self.video_widget is None:
+            self.video_widget = QVideoWidget(self)
+            self.video_frame.layout().insertWidget(0, self.video_widget)
+        self.player.setVideoOutput(self.video_widget)
+
+    @property
+    def current_index(self):
+        return self.playlist.current_index
+
+    @current_index.setter
+    def current_index(self, index):
+        self.playlist.current_index = index
 
     def create_ui(self):
         header_layout = QHBoxLayout()
@@ -131,8 +545,8 @@ class MediaPlayer(QWidget):
         header_layout.addWidget(title_label)
         header_layout.addStretch()
         theme_icon = QLabel()
-        if os.path.exists("icon_theme.png"):
-            theme_icon.setPixmap(QIcon("icon_theme.png").pixmap(QSize(20, 20)))
+        if self.icons.icon("icon_theme.png"):
+            theme_icon.setPixmap(self.icons.pixmap("icon_theme.png", 20))
         header_layout.addWidget(theme_icon)
         header_layout.addWidget(self.theme_combo)
 
@@ -155,7 +569,6 @@ class MediaPlayer(QWidget):
 
         self.video_frame = QFrame()
         video_layout = QVBoxLayout()
-        video_layout.addWidget(self.video_widget)
         
         self.fullscreen_btn = ModernButton("⛶")
         self.fullscreen_btn.clicked.connect(self.toggle_fullscreen)
@@ -176,9 +589,10 @@ class MediaPlayer(QWidget):
 
         progress_layout = QVBoxLayout()
         
-        self.time_slider = QSlider(Qt.Orientation.Horizontal)
+        self.time_slider = WaveformSlider()
         self.time_slider.setRange(0, 0)
-        self.time_slider.sliderMoved.connect(self.seek_position)
+        self.time_slider.sliderMoved.connect(self.seek_controller.request)
+        self.time_slider.sliderReleased.connect(lambda: self.seek_controller.release(self.time_slider.value()))
         
         time_info_layout = QHBoxLayout()
         self.current_time_label = QLabel("00:00")
@@ -202,9 +616,7 @@ class MediaPlayer(QWidget):
         
         self.play_btn.setMinimumSize(70, 70)
         self.play_btn.setMaximumSize(70, 70)
-        if os.path.exists("icon_play.png"):
-            self.play_btn.setIcon(QIcon("icon_play.png"))
-            self.play_btn.setIconSize(QSize(40, 40))
+        self.set_icon(self.play_btn, "icon_play.png", 40)
         
         self.shuffle_btn.clicked.connect(self.toggle_shuffle)
         self.prev_btn.clicked.connect(self.prev_media)
@@ -223,10 +635,7 @@ class MediaPlayer(QWidget):
         
         self.speed_icon_btn = QPushButton()
         self.speed_icon_btn.setMaximumSize(30, 30)
-        if os.path.exists("icon_speed.png"):
-            self.speed_icon_btn.setIcon(QIcon("icon_speed.png"))
-            self.speed_icon_btn.setIconSize(QSize(20, 20))
-        else:
+        if not self.set_icon(self.speed_icon_btn, "icon_speed.png", 20):
             self.speed_icon_btn.setText("🚀")
         
         speed_layout.addWidget(self.speed_icon_btn)
@@ -249,9 +658,7 @@ class MediaPlayer(QWidget):
         self.volume_icon_btn = QPushButton()
         self.volume_icon_btn.setMaximumSize(30, 30)
         self.volume_icon_btn.clicked.connect(self.toggle_mute)
-        if os.path.exists("icon_audio_on.png"):
-            self.volume_icon_btn.setIcon(QIcon("icon_audio_on.png"))
-            self.volume_icon_btn.setIconSize(QSize(20, 20))
+        self.set_icon(self.volume_icon_btn, "icon_audio_on.png", 20)
         
         volume_layout.addWidget(self.volume_icon_btn)
         
@@ -271,13 +678,13 @@ class MediaPlayer(QWidget):
 
         audio_device_layout = QHBoxLayout()
         device_icon = QLabel()
-        if os.path.exists("icon_output.png"):
-            device_icon.setPixmap(QIcon("icon_output.png").pixmap(QSize(20, 20)))
+        if self.icons.icon("icon_output.png"):
+            device_icon.setPixmap(self.icons.pixmap("icon_output.png", 20))
         audio_device_layout.addWidget(device_icon)
         
         self.audio_device_combo = QComboBox()
-        self.populate_audio_devices()
-        self.audio_device_combo.currentTextChanged.connect(self.change_audio_device)
+        self.devices = AudioDeviceManager(self.audio_device_combo, self)
+        self.devices.device_changed.connect(self.switch_audio_device)
         self.audio_device_combo.setMaximumWidth(200)
         
         audio_device_layout.addWidget(self.audio_device_combo)
@@ -286,44 +693,77 @@ class MediaPlayer(QWidget):
         file_ops_layout = QHBoxLayout()
         
         self.open_file_btn = QPushButton("Open File")
-        if os.path.exists("icon_open_file.png"):
-            self.open_file_btn.setIcon(QIcon("icon_open_file.png"))
-            self.open_file_btn.setIconSize(QSize(20, 20))
+        self.set_icon(self.open_file_btn, "icon_open_file.png", 20)
         
         self.open_folder_btn = QPushButton("Open Folder")
-        if os.path.exists("icon_open_folder.png"):
-            self.open_folder_btn.setIcon(QIcon("icon_open_folder.png"))
-            self.open_folder_btn.setIconSize(QSize(20, 20))
+        self.set_icon(self.open_folder_btn, "icon_open_folder.png", 20)
         
         self.clear_playlist_btn = QPushButton("Clear Playlist")
-        if os.path.exists("icon_clear.png"):
-            self.clear_playlist_btn.setIcon(QIcon("icon_clear.png"))
-            self.clear_playlist_btn.setIconSize(QSize(20, 20))
+        self.set_icon(self.clear_playlist_btn, "icon_clear.png", 20)
+
+        self.import_playlist_btn = QPushButton("Import Playlist")
+        self.export_playlist_btn = QPushButton("Export Playlist")
         
         self.open_file_btn.clicked.connect(self.open_file)
         self.open_folder_btn.clicked.connect(self.open_folder)
         self.clear_playlist_btn.clicked.connect(self.clear_playlist)
+        self.import_playlist_btn.clicked.connect(self.import_playlist)
+        self.export_playlist_btn.clicked.connect(self.export_playlist)
         
         file_ops_layout.addWidget(self.open_file_btn)
         file_ops_layout.addWidget(self.open_folder_btn)
+        file_ops_layout.addWidget(self.import_playlist_btn)
+        file_ops_layout.addWidget(self.export_playlist_btn)
         file_ops_layout.addWidget(self.clear_playlist_btn)
         file_ops_layout.addStretch()
 
+        scan_layout = QHBoxLayout()
+
+        self.scan_progress = QProgressBar()
+        self.scan_progress.setTextVisible(True)
+        self.scan_progress.hide()
+
+        self.cancel_scan_btn = QPushButton("Cancel Scan")
+        self.cancel_scan_btn.clicked.connect(self.cancel_scans)
+        self.cancel_scan_btn.hide()
+
+        scan_layout.addWidget(self.scan_progress)
+        scan_layout.addWidget(self.cancel_scan_btn)
+
         playlist_layout = QVBoxLayout()
         
         playlist_header = QHBoxLayout()
         playlist_label = QLabel("Playlist")
-        if os.path.exists("icon_playlist.png"):
+        if self.icons.icon("icon_playlist.png"):
             playlist_icon_label = QLabel()
-            playlist_icon_label.setPixmap(QIcon("icon_playlist.png").pixmap(QSize(20, 20)))
+            playlist_icon_label.setPixmap(self.icons.pixmap("icon_playlist.png", 20))
             playlist_header.addWidget(playlist_icon_label)
         playlist_header.addWidget(playlist_label)
         playlist_header.addStretch()
+
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Search playlist...")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.setMaximumWidth(250)
+        self.search_box.textChanged.connect(self.apply_search)
+        playlist_header.addWidget(self.search_box)
+
+        self.filtered_navigation_check = QCheckBox("Navigate filtered")
+        self.filtered_navigation_check.setToolTip("Next and previous only step through tracks matching the search")
+        playlist_header.addWidget(self.filtered_navigation_check)
         
         playlist_layout.addLayout(playlist_header)
         
-        self.track_list = QListWidget()
-        self.track_list.itemDoubleClicked.connect(self.track_selected)
+        self.track_list = QListView()
+        self.track_list.setUniformItemSizes(True)
+        self.track_list.setLayoutMode(QListView.LayoutMode.Batched)
+        self.track_list.setBatchSize(5000)
+        self.track_list.setIconSize(QSize(THUMBNAIL_ICON_SIZE, THUMBNAIL_ICON_SIZE))
+        self.track_list.setModel(self.playlist_model)
+        self.track_list.doubleClicked.connect(self.track_selected)
+        self.track_list.verticalScrollBar().valueChanged.connect(self.visible_metadata_timer.start)
+        self.playlist_model.rowsInserted.connect(self.visible_metadata_timer.start)
+        self.playlist_model.modelReset.connect(self.visible_metadata_timer.start)
         
         playlist_layout.addWidget(self.track_list)
 
@@ -333,7 +773,41 @@ class MediaPlayer(QWidget):
         self.visualizer_check.setChecked(True)
         self.visualizer_check.toggled.connect(self.toggle_visualizer)
         
+        self.subtitles_check = QCheckBox("Show Subtitles")
+        self.subtitles_check.setChecked(True)
+        self.subtitles_check.toggled.connect(self.toggle_subtitles)
+        
+        self.gapless_check = QCheckBox("Gapless Playback")
+        self.gapless_check.setChecked(True)
+        self.gapless_check.toggled.connect(self.toggle_gapless)
+        
+        crossfade_layout = QHBoxLayout()
+        crossfade_layout.addWidget(QLabel("Crossfade"))
+        
+        self.crossfade_spin = QSpinBox()
+        self.crossfade_spin.setRange(0, 12)
+        self.crossfade_spin.setSuffix(" s")
+        self.crossfade_spin.setSpecialValueText("Off")
+        self.crossfade_spin.valueChanged.connect(self.change_crossfade)
+        
+        crossfade_layout.addWidget(self.crossfade_spin)
+        crossfade_layout.addStretch()
+
+        normalization_layout = QHBoxLayout()
+        normalization_layout.addWidget(QLabel("Volume Normalization"))
+
+        self.normalization_combo = QComboBox()
+        self.normalization_combo.addItems(["Off", "Track", "Album"])
+        self.normalization_combo.currentIndexChanged.connect(self.change_normalization)
+
+        normalization_layout.addWidget(self.normalization_combo)
+        normalization_layout.addStretch()
+        
         audio_options_layout.addWidget(self.visualizer_check)
+        audio_options_layout.addWidget(self.subtitles_check)
+        audio_options_layout.addWidget(self.gapless_check)
+        audio_options_layout.addLayout(crossfade_layout)
+        audio_options_layout.addLayout(normalization_layout)
 
         left_panel = QVBoxLayout()
         left_panel.addLayout(header_layout)
@@ -346,6 +820,7 @@ class MediaPlayer(QWidget):
         left_panel.addLayout(volume_layout)
         left_panel.addLayout(audio_device_layout)
         left_panel.addLayout(file_ops_layout)
+        left_panel.addLayout(scan_layout)
         left_panel.addLayout(audio_options_layout)
 
         right_panel = QVBoxLayout()
@@ -357,30 +832,42 @@ class MediaPlayer(QWidget):
 
         self.setLayout(main_layout)
 
-        self.player.positionChanged.connect(self.update_time_display)
-        self.player.durationChanged.connect(self.set_duration)
-        self.player.mediaStatusChanged.connect(self.handle_media_finished)
+    def connect_player(self, player):
+        player.positionChanged.connect(self.update_time_display)
+        player.positionChanged.connect(self.preload_upcoming_track)
+        player.positionChanged.connect(self.update_subtitles)
+        player.durationChanged.connect(self.set_duration)
+        player.mediaStatusChanged.connect(self.handle_media_finished)
+        player.playbackStateChanged.connect(self.on_playback_state_changed)
+        player.mediaStatusChanged.connect(self.on_media_status_changed)
+        player.errorOccurred.connect(self.on_error_occurred)
 
-    def populate_audio_devices(self):
-        self.audio_device_combo.clear()
-        
-        audio_devices = QMediaDevices.audioOutputs()
-        
-        for device in audio_devices:
-            self.audio_device_combo.addItem(device.description(), device)
-        
-        default_device = QMediaDevices.defaultAudioOutput()
-        if default_device:
-            for i in range(self.audio_device_combo.count()):
-                if self.audio_device_combo.itemData(i) == default_device:
-                    self.audio_device_combo.setCurrentIndex(i)
-                    break
+    def disconnect_player(self, player):
+        player.positionChanged.disconnect(self.update_time_display)
+        player.positionChanged.disconnect(self.preload_upcoming_track)
+        player.positionChanged.disconnect(self.update_subtitles)
+        player.durationChanged.disconnect(self.set_duration)
+        player.mediaStatusChanged.disconnect(self.handle_media_finished)
+        player.playbackStateChanged.disconnect(self.on_playback_state_changed)
+        player.mediaStatusChanged.disconnect(self.on_media_status_changed)
+        player.errorOccurred.disconnect(self.on_error_occurred)
 
-    def change_audio_device(self):
-        current_device = self.audio_device_combo.currentData()
-        if current_device:
-            self.audio_output.setDevice(current_device)
-            print(f"Audio output changed to: {current_device.description()}")
+    def set_icon(self, widget, name, size=None):
+        icon = self.icons.icon(name)
+        if icon is None:
+            return False
+        if widget.property("iconName") != name:
+            widget.setIcon(icon)
+            widget.setProperty("iconName", name)
+        if size:
+            widget.setIconSize(QSize(size, size))
+        return True
+
+    def switch_audio_device(self, device):
+        self.audio_output.setDevice(device)
+        self.preloader.set_device(device)
+        if self.crossfade.is_active():
+            self.crossfade.outgoing_output.setDevice(device)
 
     def change_speed(self, value):
         speed = value / 100.0
@@ -390,299 +877,11 @@ class MediaPlayer(QWidget):
 
     def apply_theme(self, theme_name):
         self.current_theme = theme_name
-        
-        if theme_name == "dark":
-            self.apply_dark_theme()
-        elif theme_name == "light":
-            self.apply_light_theme()
-        elif theme_name == "neon":
-            self.apply_neon_theme()
-
-    def apply_dark_theme(self):
-        self.setStyleSheet("""
-            QWidget {
-                background-color: #1a1a1a;
-                color: #ffffff;
-                font-family: 'Segoe UI';
-            }
-            
-            QFrame {
-                background-color: #2d2d2d;
-                border-radius: 10px;
-                padding: 10px;
-                margin: 5px;
-            }
-            
-            QPushButton {
-                background-color: #3d3d3d;
-                color: #ffffff;
-                border: none;
-                border-radius: 25px;
-                padding: 10px;
-                font-weight: bold;
-            }
-            
-            QPushButton:hover {
-                background-color: #4d4d4d;
-                transform: scale(1.05);
-            }
-            
-            QPushButton:pressed {
-                background-color: #2d2d2d;
-            }
-            
-            QSlider::groove:horizontal {
-                border: none;
-                height: 6px;
-                background: #3d3d3d;
-                border-radius: 3px;
-            }
-            
-            QSlider::handle:horizontal {
-                background: #4ecdc4;
-                border: none;
-                width: 18px;
-                height: 18px;
-                margin: -6px 0;
-                border-radius: 9px;
-            }
-            
-            QSlider::sub-page:horizontal {
-                background: #4ecdc4;
-                border-radius: 3px;
-            }
-            
-            QListWidget {
-                background-color: #2d2d2d;
-                border-radius: 10px;
-                border: none;
-                padding: 5px;
-            }
-            
-            QListWidget::item {
-                padding: 8px;
-                border-radius: 5px;
-                margin: 2px;
-            }
-            
-            QListWidget::item:selected {
-                background-color: #4ecdc4;
-                color: #000000;
-            }
-            
-            QListWidget::item:hover {
-                background-color: #3d3d3d;
-            }
-            
-            QComboBox {
-                background-color: #3d3d3d;
-                border-radius: 5px;
-                padding: 5px;
-                color: #ffffff;
-            }
-            
-            QComboBox::drop-down {
-                border: none;
-            }
-            
-            QComboBox::down-arrow {
-                border: none;
-            }
-            
-            QCheckBox {
-                spacing: 5px;
-            }
-            
-            QCheckBox::indicator {
-                width: 18px;
-                height: 18px;
-                border-radius: 3px;
-                background-color: #3d3d3d;
-            }
-            
-            QCheckBox::indicator:checked {
-                background-color: #4ecdc4;
-            }
-        """)
-
-    def apply_light_theme(self):
-        self.setStyleSheet("""
-            QWidget {
-                background-color: #f5f5f5;
-                color: #333333;
-                font-family: 'Segoe UI';
-            }
-            
-            QFrame {
-                background-color: #ffffff;
-                border-radius: 10px;
-                padding: 10px;
-                margin: 5px;
-                border: 1px solid #e0e0e0;
-            }
-            
-            QPushButton {
-                background-color: #e3f2fd;
-                color: #1976d2;
-                border: 2px solid #1976d2;
-                border-radius: 25px;
-                padding: 10px;
-                font-weight: bold;
-            }
-            
-            QPushButton:hover {
-                background-color: #1976d2;
-                color: #ffffff;
-            }
-            
-            QPushButton:pressed {
-                background-color: #1565c0;
-            }
-            
-            QSlider::groove:horizontal {
-                border: none;
-                height: 6px;
-                background: #e0e0e0;
-                border-radius: 3px;
-            }
-            
-            QSlider::handle:horizontal {
-                background: #1976d2;
-                border: none;
-                width: 18px;
-                height: 18px;
-                margin: -6px 0;
-                border-radius: 9px;
-            }
-            
-            QSlider::sub-page:horizontal {
-                background: #1976d2;
-                border-radius: 3px;
-            }
-            
-            QListWidget {
-                background-color: #ffffff;
-                border-radius: 10px;
-                border: 1px solid #e0e0e0;
-                padding: 5px;
-            }
-            
-            QListWidget::item {
-                padding: 8px;
-                border-radius: 5px;
-                margin: 2px;
-            }
-            
-            QListWidget::item:selected {
-                background-color: #1976d2;
-                color: #ffffff;
-            }
-            
-            QListWidget::item:hover {
-                background-color: #e3f2fd;
-            }
-            
-            QComboBox {
-                background-color: #ffffff;
-                border: 1px solid #e0e0e0;
-                border-radius: 5px;
-                padding: 5px;
-            }
-        """)
-
-    def apply_neon_theme(self):
-        self.setStyleSheet("""
-            QWidget {
-                background-color: #0a0a0a;
-                color: #00ffff;
-                font-family: 'Segoe UI';
-            }
-            
-            QFrame {
-                background-color: #1a0d1a;
-                border: 2px solid #ff00ff;
-                border-radius: 15px;
-                padding: 10px;
-                margin: 5px;
-            }
-            
-            QPushButton {
-                background-color: #2d1b2d;
-                color: #00ffff;
-                border: 2px solid #00ffff;
-                border-radius: 25px;
-                padding: 10px;
-                font-weight: bold;
-            }
-            
-            QPushButton:hover {
-                background-color: #00ffff;
-                color: #0a0a0a;
-                box-shadow: 0 0 20px #00ffff;
-            }
-            
-            QPushButton:pressed {
-                background-color: #ff00ff;
-                border-color: #ff00ff;
-            }
-            
-            QSlider::groove:horizontal {
-                border: none;
-                height: 8px;
-                background: #2d1b2d;
-                border-radius: 4px;
-            }
-            
-            QSlider::handle:horizontal {
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 #ff00ff, stop:1 #00ffff);
-                border: 2px solid #ffffff;
-                width: 20px;
-                height: 20px;
-                margin: -8px 0;
-                border-radius: 12px;
-            }
-            
-            QSlider::sub-page:horizontal {
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 #ff00ff, stop:1 #00ffff);
-                border-radius: 4px;
-            }
-            
-            QListWidget {
-                background-color: #1a0d1a;
-                border: 2px solid #ff00ff;
-                border-radius: 10px;
-                padding: 5px;
-            }
-            
-            QListWidget::item {
-                padding: 8px;
-                border-radius: 5px;
-                margin: 2px;
-                color: #00ffff;
-            }
-            
-            QListWidget::item:selected {
-                background-color: #ff00ff;
-                color: #000000;
-            }
-            
-            QListWidget::item:hover {
-                background-color: #2d1b2d;
-                border: 1px solid #00ffff;
-            }
-            
-            QComboBox {
-                background-color: #2d1b2d;
-                border: 2px solid #00ffff;
-                border-radius: 5px;
-                padding: 5px;
-                color: #00ffff;
-            }
-            
-            QLabel {
-                color: #00ffff;
-            }
-        """)
+        self.visualizer.set_theme(theme_name)
+        self.time_slider.set_theme(theme_name)
+        started = time.perf_counter()
+        if self.themes.apply(self, theme_name):
+            print(f"Theme switched to {theme_name} in {(time.perf_counter() - started) * 1000:.1f} ms")
 
     def change_theme(self, theme_text):
         if theme_text == "Dark Theme":
@@ -693,6 +892,8 @@ class MediaPlayer(QWidget):
             self.apply_theme("neon")
 
     def toggle_fullscreen(self):
+        if self.video_widget is None:
+            return
         if not self.is_fullscreen:
             self.video_widget.setParent(None)
             self.video_widget.showFullScreen()
@@ -706,97 +907,222 @@ class MediaPlayer(QWidget):
 
     def toggle_visualizer(self, checked):
         self.visualizer_frame.setVisible(checked)
+        self.update_spectrum_source()
+
+    def toggle_subtitles(self, checked):
+        if self.video_widget is not None:
+            self.video_widget.videoSink().setSubtitleText(self.subtitle_text if checked else "")
+
+    def update_spectrum_source(self):
+        playing = self.player.playbackState() == QMediaPlayer.PlaybackState.PlayingState
+        self.spectrum_source.set_enabled(playing and self.is_audio_file() and self.visualizer_check.isChecked()
+                                         and not self.isMinimized())
+
+    def effective_volume(self, gain=None):
+        if self.is_muted:
+            return 0.0
+        if gain is None:
+            gain = self.track_gain
+        # QAudioOutput cannot amplify, so a gain above unity only helps while the slider is below 100%
+        return min(1.0, self.volume_slider.value() / 100.0 * gain)
+
+    def apply_volume(self):
+        if self.crossfade.is_fading(self.audio_output):
+            # both sides of the fade read the volume on every step; this takes the next one now
+            self.crossfade.tick()
+        else:
+            self.audio_output.setVolume(self.effective_volume())
+
+    def change_normalization(self, index):
+        self.normalization_mode = NORMALIZATION_MODES[index]
+        if self.normalization_mode != "off":
+            self.loudness.request(self.playlist.paths)
+            self.request_loudness()
+        self.update_track_gain()
+        print(f"Volume normalization: {self.normalization_mode}")
+
+    def request_loudness(self):
+        if self.current_index < 0:
+            return
+        # the upcoming track is measured ahead so its gain is known by the time it starts
+        upcoming = self.upcoming_track()
+        if upcoming is None and self.current_index + 1 < len(self.playlist):
+            upcoming = self.current_index + 1
+        rows = [self.current_index] if upcoming is None else [self.current_index, upcoming]
+        self.loudness.request([self.playlist[row] for row in rows], CURRENT_PRIORITY)
+
+    def on_loudness_analyzed(self, file_path):
+        if self.normalization_mode == "off" or not 0 <= self.current_index < len(self.playlist):
+            return
+        # a newly measured album track moves the album's loudness, and with it the playing track's gain
+        current_path = self.playlist[self.current_index]
+        if file_path == current_path or (self.normalization_mode == "album"
+                                         and self.loudness.shares_album(file_path, current_path)):
+            self.update_track_gain()
+
+    def update_track_gain(self):
+        file_path = self.playlist[self.current_index] if 0 <= self.current_index < len(self.playlist) else None
+        self.track_gain = self.loudness.gain(file_path, self.normalization_mode) if file_path else 1.0
+        if not self.is_muted:
+            self.apply_volume()
+
+    def change_crossfade(self, seconds):
+        self.crossfade.set_duration(seconds * 1000)
+        if seconds and not self.gapless_check.isChecked():
+            self.gapless_check.setChecked(True)
 
     def change_volume(self, value):
         if not self.is_muted:
-            self.audio_output.setVolume(value / 100.0)
+            self.apply_volume()
         self.volume_label.setText(f"{value}%")
         
         if value == 0 or self.is_muted:
-            if os.path.exists("icon_audio_off.png"):
-                self.volume_icon_btn.setIcon(QIcon("icon_audio_off.png"))
+            self.set_icon(self.volume_icon_btn, "icon_audio_off.png")
         else:
-            if os.path.exists("icon_audio_on.png"):
-                self.volume_icon_btn.setIcon(QIcon("icon_audio_on.png"))
+            self.set_icon(self.volume_icon_btn, "icon_audio_on.png")
 
     def toggle_mute(self):
         if self.is_muted:
             self.volume_slider.setValue(self.previous_volume)
-            self.audio_output.setVolume(self.previous_volume / 100.0)
             self.is_muted = False
-            if os.path.exists("icon_audio_on.png"):
-                self.volume_icon_btn.setIcon(QIcon("icon_audio_on.png"))
+            self.apply_volume()
+            self.set_icon(self.volume_icon_btn, "icon_audio_on.png")
         else:
             self.previous_volume = self.volume_slider.value()
-            self.audio_output.setVolume(0.0)
             self.is_muted = True
-            if os.path.exists("icon_audio_off.png"):
-                self.volume_icon_btn.setIcon(QIcon("icon_audio_off.png"))
+            self.apply_volume()
+            self.set_icon(self.volume_icon_btn, "icon_audio_off.png")
 
     def toggle_repeat(self):
         self.repeat_mode = (self.repeat_mode + 1) % 3
         if self.repeat_mode == 0:
-            self.repeat_btn.setStyleSheet("")
-            if os.path.exists("icon_repeat.png"):
-                self.repeat_btn.setIcon(QIcon("icon_repeat.png"))
+            set_state(self.repeat_btn, None)
+            self.set_icon(self.repeat_btn, "icon_repeat.png")
         elif self.repeat_mode == 1:
-            self.repeat_btn.setStyleSheet("background-color: #4ecdc4; color: #000000;")
-            if os.path.exists("icon_repeat.png"):
-                self.repeat_btn.setIcon(QIcon("icon_repeat.png"))
+            set_state(self.repeat_btn, "on")
+            self.set_icon(self.repeat_btn, "icon_repeat.png")
         elif self.repeat_mode == 2:
-            self.repeat_btn.setStyleSheet("background-color: #ff6b6b; color: #000000;")
-            if os.path.exists("repeat_one.png"):
-                self.repeat_btn.setIcon(QIcon("repeat_one.png"))
-            else:
+            set_state(self.repeat_btn, "one")
+            if not self.set_icon(self.repeat_btn, "repeat_one.png"):
                 self.repeat_btn.setText("1")
 
     def toggle_shuffle(self):
         self.shuffle_enabled = not self.shuffle_enabled
         if self.shuffle_enabled:
-            self.shuffled_indices = list(range(len(self.playlist)))
-            random.shuffle(self.shuffled_indices)
-            self.shuffle_btn.setStyleSheet(self.shuffle_btn.styleSheet() + "background-color: #4ecdc4; color: #000000;")
+            self.shuffle_order.reset(len(self.playlist), first=self.current_index)
+            set_state(self.shuffle_btn, "on")
         else:
-            self.shuffled_indices = []
-            self.shuffle_btn.setStyleSheet("")
+            self.shuffle_order.reset(0)
+            set_state(self.shuffle_btn, None)
 
     def get_random_track(self):
-        if len(self.playlist) <= 1:
+        rows = self.navigation_rows()
+        for _ in range(len(self.playlist)):
+            next_index = self.shuffle_order.next(wrap=True)
+            if next_index is None:
+                break
+            if rows is None or self.playlist_model.view_row(next_index) >= 0:
+                return next_index
+        return self.current_index
+
+    def toggle_gapless(self, checked):
+        self.preloader.enabled = checked
+        if not checked:
+            self.preloader.discard()
+            self.crossfade_spin.setValue(0)
+
+    def upcoming_track(self):
+        # the track advance_after_end moves to, found the same way but without moving the shuffle cursor
+        if self.repeat_mode == 2 or not self.playlist:
+            return None
+        rows = self.navigation_rows()
+        if self.shuffle_enabled:
+            for index in itertools.islice(self.shuffle_order.upcoming(wrap=True), len(self.playlist)):
+                if rows is None or self.playlist_model.view_row(index) >= 0:
+                    return index
             return self.current_index
-            
-        available_indices = list(range(len(self.playlist)))
-        if self.current_index in available_indices:
-            available_indices.remove(self.current_index)
-        return random.choice(available_indices)
+        if self.repeat_mode != 1:
+            return None
+        if rows is not None:
+            return self.step_filtered(rows, 1)
+        return (self.current_index + 1) % len(self.playlist)
+
+    def preload_upcoming_track(self, position):
+        self.preloader.track_started(position)
+        duration = self.player.duration()
+        if not self.preloader.should_preload(position, duration, self.crossfade.duration_ms):
+            return
+        upcoming = self.upcoming_track()
+        if upcoming is None:
+            return
+        file_path = self.playlist[upcoming]
+        self.preloader.preload(file_path)
+
+        if (self.crossfade.is_enabled() and not self.crossfade.is_active()
+                and duration - position <= self.crossfade.duration_ms
+                and self.preloader.is_ready(file_path)):
+            self.crossfade_pending = True
+            self.advance_after_end()
+            self.crossfade_pending = False
+
+    def swap_to_preloaded(self, file_path, outgoing_gain=None):
+        preloaded = self.preloader.take(file_path, self.player, self.audio_output)
+        if preloaded is None:
+            return False
+        old_player, old_output = self.player, self.audio_output
+        self.disconnect_player(old_player)
+        if self.crossfade_pending:
+            old_player.setVideoOutput(None)
+            self.preloader.hold()
+            self.crossfade.start(old_player, old_output, preloaded[1], outgoing_gain)
+        else:
+            self.preloader.release(old_player)
+        self.player, self.audio_output = preloaded
+        self.connect_player(self.player)
+        self.player.setVideoOutput(self.video_widget)
+        self.player.setPlaybackRate(self.speed_slider.value() / 100.0)
+        self.spectrum_source.attach(self.player)
+        self.preloader.mark_preloaded()
+        return True
+
+    def on_transition_measured(self, gap_ms, preloaded):
+        print(f"Track transition gap: {gap_ms:.1f} ms ({'preloaded' if preloaded else 'cold'})")
 
     def handle_media_finished(self, status):
         if status == QMediaPlayer.MediaStatus.EndOfMedia:
-            if self.repeat_mode == 2:
-                self.player.setPosition(0)
-                self.player.play()
-            elif self.repeat_mode == 1:
-                if self.shuffle_enabled:
-                    self.play_media(self.get_random_track())
-                else:
-                    self.next_media()
-            elif self.shuffle_enabled:
+            self.preloader.begin_transition()
+            if not self.advance_after_end():
+                self.preloader.cancel_transition()
+
+    def advance_after_end(self):
+        if self.repeat_mode == 2:
+            self.player.setPosition(0)
+            self.player.play()
+        elif self.repeat_mode == 1:
+            if self.shuffle_enabled:
                 self.play_media(self.get_random_track())
+            else:
+                self.next_media()
+        elif self.shuffle_enabled:
+            self.play_media(self.get_random_track())
+        else:
+            return False
+        return True
 
     def on_playback_state_changed(self, state):
         if state == QMediaPlayer.PlaybackState.PlayingState:
-            if os.path.exists("icon_stop.png"):
-                self.play_btn.setIcon(QIcon("icon_stop.png"))
+            self.set_icon(self.play_btn, "icon_stop.png")
             if self.is_audio_file():
                 self.visualizer.start_visualization()
         else:
-            if os.path.exists("icon_play.png"):
-                self.play_btn.setIcon(QIcon("icon_play.png"))
+            self.set_icon(self.play_btn, "icon_play.png")
             self.visualizer.stop_visualization()
+        self.update_spectrum_source()
 
     def is_audio_file(self):
         if self.current_index >= 0 and self.current_index < len(self.playlist):
             file_path = self.playlist[self.current_index]
-            return file_path.lower().endswith(('.mp3', '.wav', '.flac', '.aac', '.ogg'))
+            return file_path.lower().endswith(AUDIO_EXTENSIONS)
         return False
 
     def open_file(self):
@@ -808,57 +1134,318 @@ class MediaPlayer(QWidget):
         )
         if file:
             self.add_to_playlist(file)
-            self.play_media(len(self.playlist) - 1)
+            self.play_media(self.playlist.index_of(file))
 
     def open_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "Open Folder")
         if folder:
-            extensions = ('.mp3', '.mp4', '.wav', '.avi', '.mkv', '.flac', '.aac', '.ogg', '.mov', '.wmv')
-            files = [os.path.join(folder, f) for f in os.listdir(folder)
-                     if f.lower().endswith(extensions)]
-            for f in sorted(files):
-                self.add_to_playlist(f)
+            self.scan_folder(folder)
+
+    def scan_folder(self, folder):
+        self.cancel_folder_scan()
+
+        scanner = FolderScanner(folder, self.library_path, parent=self)
+        scanner.batch_found.connect(lambda files: self.on_scan_batch(scanner, files))
+        scanner.progress.connect(self.on_scan_progress)
+        scanner.finished.connect(lambda: self.on_scan_finished(scanner))
+        self.folder_scanner = scanner
+
+        self.scan_progress.setRange(0, 0)
+        self.scan_progress.setFormat(f"Scanning {os.path.basename(folder) or folder}...")
+        self.scan_progress.show()
+        self.cancel_scan_btn.show()
+
+        scanner.start()
+
+    def import_playlist(self):
+        file, _ = QFileDialog.getOpenFileName(self, "Import Playlist", "", PLAYLIST_FILTER)
+        if file:
+            self.load_playlist_file(file)
+
+    def load_playlist_file(self, path):
+        self.load_playlist_files([path])
+
+    def load_playlist_files(self, paths):
+        # playlists are imported one after another, alongside any folder scan that is still running
+        self.cancel_playlist_import()
+        self.queued_playlists = list(paths)
+        self.start_next_import()
+
+    def start_next_import(self):
+        if not self.queued_playlists:
+            self.hide_scan_progress()
+            return
+        path = self.queued_playlists.pop(0)
+        importer = PlaylistImporter(path, parent=self)
+        importer.batch_found.connect(lambda files: self.on_scan_batch(importer, files))
+        importer.progress.connect(self.on_import_progress)
+        importer.finished.connect(lambda: self.on_import_finished(importer))
+        self.playlist_importer = importer
+
+        self.scan_progress.setRange(0, 0)
+        self.scan_progress.setFormat(f"Importing {os.path.basename(path)}...")
+        self.scan_progress.show()
+        self.cancel_scan_btn.show()
+
+        importer.start()
+
+    def on_import_progress(self, entries_read, files_found):
+        self.scan_progress.setFormat(f"Importing... {files_found} of {entries_read} entries found")
+
+    def on_import_finished(self, importer):
+        if importer is self.playlist_importer:
+            self.playlist_importer = None
+            if importer.error:
+                self.artist_label.setText(f"Playlist import failed: {importer.error}")
+            else:
+                missing = importer.entries_read - importer.files_found
+                self.artist_label.setText(f"Imported {importer.files_found} tracks"
+                                          + (f" ({missing} missing or unsupported)" if missing else ""))
+            self.start_next_import()
+        importer.deleteLater()
+
+    def export_playlist(self):
+        if not self.playlist:
+            self.artist_label.setText("Playlist is empty")
+            return
+        file, _ = QFileDialog.getSaveFileName(self, "Export Playlist", "playlist.m3u8", EXPORT_FILTERS)
+        if not file:
+            return
+        if not file.lower().endswith(PLAYLIST_EXTENSIONS):
+            file += ".m3u8"
+        try:
+            export_playlist(file, self.playlist.paths, self.metadata_service.get)
+        except (OSError, ValueError) as e:
+            print(f"Playlist export error: {file} - {e}")
+            self.artist_label.setText(f"Could not export playlist: {e}")
+            return
+        self.artist_label.setText(f"Exported {len(self.playlist)} tracks to {os.path.basename(file)}")
+
+    def cancel_folder_scan(self):
+        if self.folder_scanner is not None:
+            self.folder_scanner.cancel()
+            self.folder_scanner = None
+            self.hide_scan_progress()
+
+    def cancel_playlist_import(self):
+        self.queued_playlists = []
+        if self.playlist_importer is not None:
+            self.playlist_importer.cancel()
+            self.playlist_importer = None
+            self.hide_scan_progress()
+
+    def cancel_scans(self):
+        self.cancel_folder_scan()
+        self.cancel_playlist_import()
+
+    def hide_scan_progress(self):
+        if self.folder_scanner is None and self.playlist_importer is None:
+            self.scan_progress.hide()
+            self.cancel_scan_btn.hide()
+
+    def on_scan_batch(self, scanner, files):
+        if scanner is self.folder_scanner or scanner is self.playlist_importer:
+            self.add_files_to_playlist(files)
+
+    def on_scan_progress(self, dirs_scanned, files_found):
+        self.scan_progress.setFormat(f"Scanning... {files_found} files in {dirs_scanned} folders")
+
+    def on_scan_finished(self, scanner):
+        if scanner is self.folder_scanner:
+            self.folder_scanner = None
+            self.hide_scan_progress()
+            self.artist_label.setText(f"Found {scanner.files_found} files in {scanner.dirs_scanned} folders "
+                                      f"({scanner.dirs_reused} unchanged since last scan)")
+            if self.folder_watcher is not None:
+                self.folder_watcher.watch(scanner.folder)
+        scanner.deleteLater()
+
+    def on_folder_changes(self, added, removed, renamed):
+        # the lists came through a signal and may still belong to the watcher, so extend copies
+        added, removed = list(added), list(removed)
+        current_path = self.playlist[self.current_index] if self.current_index >= 0 else None
+        stale = set(removed).union(old_path for old_path, _ in renamed)
+        if self.preloader.preloaded_path in stale:
+            self.preloader.discard()
+
+        renamed_paths = []
+        for old_path, new_path in renamed:
+            row = self.playlist_model.rename_path(old_path, new_path)
+            if row >= 0:
+                renamed_paths.append(new_path)
+                self.search_index.refresh(self.playlist.entry_id(row), new_path)
+            else:
+                removed.append(old_path)
+                added.append(new_path)
+
+        self.search_index.remove([self.playlist.entry_id(row) for row in self.playlist.rows_of(removed)])
+        rows = self.playlist_model.remove_paths(removed)
+        if self.shuffle_enabled:
+            self.shuffle_order.remove(rows)
+        self.add_files_to_playlist(added)
+        self.metadata_service.request(renamed_paths)
+
+        if current_path in stale and self.current_index >= 0:
+            self.show_track_info()
+        print(f"Folder changes: {len(added)} added, {len(rows)} removed, {len(renamed_paths)} renamed")
 
     def clear_playlist(self):
-        self.playlist.clear()
-        self.track_list.clear()
+        self.crossfade.finish()
+        if self.folder_watcher is not None:
+            self.folder_watcher.clear()
+        self.playlist_model.clear()
+        self.search_index.clear()
+        self.metadata_service.clear()
+        self.thumbnails.clear()
+        self.loudness.clear()
+        self.preloader.discard()
+        if self.shuffle_enabled:
+            self.shuffle_order.reset(0)
         self.current_index = -1
         self.player.stop()
+        self.time_slider.set_waveform(None)
+        self.time_slider.set_preview(None)
+        self.subtitle_track = None
+        self.set_subtitle_text("")
         self.current_track_label.setText("🎶 No media loaded")
         self.artist_label.setText("Playlist cleared")
 
     def add_to_playlist(self, file_path):
-        if file_path not in self.playlist:
-            self.playlist.append(file_path)
-            filename = os.path.basename(file_path)
-            self.track_list.addItem(f"{len(self.playlist)}. {filename}")
+        added = self.add_files_to_playlist([file_path])
+        return added.start if added else -1
+
+    def add_files_to_playlist(self, file_paths):
+        added = self.playlist_model.add_paths(file_paths)
+        self.search_index.queue(self.playlist.ids[added.start:added.stop])
+        if added:
+            self.search_index_timer.start()
+        if self.shuffle_enabled:
+            self.shuffle_order.insert(added)
+        self.metadata_service.request(self.playlist.paths[added.start:added.stop])
+        if self.normalization_mode != "off":
+            self.loudness.request(self.playlist.paths[added.start:added.stop])
+        return added
 
-    def track_selected(self, item):
-        index = self.track_list.row(item)
-        self.play_media(index)
+    def request_visible_metadata(self):
+        if not self.playlist:
+            return
+        viewport = self.track_list.viewport()
+        first = self.track_list.indexAt(QPoint(0, 0)).row()
+        last = self.track_list.indexAt(QPoint(0, viewport.height() - 1)).row()
+        if first < 0:
+            first = 0
+        if last < 0:
+            last = self.playlist_model.rowCount() - 1
+        source_row = self.playlist_model.source_row
+        visible_paths = [self.playlist[source_row(row)] for row in range(first, last + 1)]
+        self.metadata_service.request(visible_paths, VISIBLE_PRIORITY)
+        self.thumbnails.request(visible_paths)
+
+    def drain_search_index(self):
+        indexed = self.search_index.drain(2000)
+        if indexed and self.playlist_model.is_filtered():
+            # queued rows sit at the end of the playlist and stay hidden until indexed, so the
+            # filtered view fills in behind the search as indexing catches up
+            matches = self.search_index.matching(self.search_box.text(), indexed)
+            index_of_id = self.playlist.index_of_id
+            self.playlist_model.show_rows(sorted(index_of_id(entry_id) for entry_id in matches))
+        if not self.search_index.pending:
+            self.search_index_timer.stop()
+
+    def apply_search(self, text):
+        matches = self.search_index.search(text)
+        self.playlist_model.set_filter(matches)
+        if self.current_index >= 0:
+            self.track_list.setCurrentIndex(self.playlist_model.index(self.playlist_model.view_row(self.current_index)))
+        self.visible_metadata_timer.start()
+
+    def navigation_rows(self):
+        if self.filtered_navigation_check.isChecked() and self.playlist_model.is_filtered():
+            return self.playlist_model.visible_rows
+        return None
+
+    def step_filtered(self, rows, step):
+        if not rows:
+            return None
+        if step > 0:
+            position = bisect.bisect_right(rows, self.current_index)
+        else:
+            position = bisect.bisect_left(rows, self.current_index) - 1
+        if 0 <= position < len(rows):
+            return rows[position]
+        if self.repeat_mode == 1:
+            return rows[0] if step > 0 else rows[-1]
+        if self.repeat_mode == 2 and self.current_index >= 0:
+            return self.current_index
+        return None
+
+    def step_shuffled(self, rows, step):
+        wrap = self.repeat_mode == 1
+        for _ in range(len(self.playlist)):
+            index = self.shuffle_order.next(wrap) if step > 0 else self.shuffle_order.prev(wrap)
+            if index is None or rows is None or self.playlist_model.view_row(index) >= 0:
+                return index
+        return None
+
+    def on_thumbnail_ready(self, file_path):
+        self.playlist_model.refresh_path(file_path, Qt.ItemDataRole.DecorationRole)
+
+    def on_metadata_ready(self, file_path, metadata):
+        self.playlist_model.refresh_path(file_path)
+        index = self.playlist.index_of(file_path)
+        if index >= 0:
+            self.search_index.refresh(self.playlist.entry_id(index), file_path)
+        if self.current_index >= 0 and self.playlist[self.current_index] == file_path:
+            self.show_track_info()
+
+    def show_track_info(self):
+        index = self.current_index
+        if index < 0:
+            return
+        file_path = self.playlist[index]
+        metadata = self.metadata_service.get(file_path) or {}
+        self.current_track_label.setText(f"🎵 {metadata.get('title') or os.path.basename(file_path)}")
+        details = [metadata[key] for key in ("artist", "album") if metadata.get(key)]
+        details.append(f"Track {index + 1} of {len(self.playlist)}")
+        self.artist_label.setText(" • ".join(details))
+
+    def track_selected(self, index):
+        self.play_media(self.playlist_model.source_row(index.row()))
 
     def play_media(self, index):
         if index < 0 or index >= len(self.playlist):
             return
             
+        if not self.crossfade_pending:
+            self.crossfade.finish()
         self.current_index = index
+        if self.shuffle_enabled:
+            self.shuffle_order.seek(index)
         file_path = self.playlist[index]
-        filename = os.path.basename(file_path)
-        
-        self.player.stop()
-        
-        self.player.setSource(QUrl.fromLocalFile(file_path))
+        self.metadata_service.request([file_path], CURRENT_PRIORITY)
+        self.time_slider.set_waveform(self.waveforms.request(file_path))
+        self.load_subtitles(file_path)
+        outgoing_gain = self.track_gain
+        self.track_gain = self.loudness.gain(file_path, self.normalization_mode)
+        if self.normalization_mode != "off":
+            self.request_loudness()
+        
+        if not self.swap_to_preloaded(file_path, outgoing_gain):
+            self.player.stop()
+            self.player.setSource(QUrl.fromLocalFile(file_path))
+        self.request_preview()
+        if not self.is_audio_file():
+            self.ensure_video_widget()
         
         self.player.setAudioOutput(self.audio_output)
         if not self.is_muted:
-            self.audio_output.setVolume(self.volume_slider.value() / 100.0)
+            self.apply_volume()
         
         self.player.play()
         
-        self.current_track_label.setText(f"🎵 {filename}")
-        self.artist_label.setText(f"Track {index + 1} of {len(self.playlist)}")
+        self.show_track_info()
         
-        self.track_list.setCurrentRow(index)
+        self.track_list.setCurrentIndex(self.playlist_model.index(self.playlist_model.view_row(index)))
         
         if self.is_audio_file():
             self.video_frame.hide()
@@ -867,14 +1454,71 @@ class MediaPlayer(QWidget):
         else:
             self.visualizer_frame.hide()
             self.video_frame.show()
-        
-        self.timer.start()
+
+    def on_waveform_ready(self, file_path, waveform):
+        if 0 <= self.current_index < len(self.playlist) and self.playlist[self.current_index] == file_path:
+            self.time_slider.set_waveform(waveform)
+
+    def request_preview(self):
+        # a preloaded player already knows its duration; a cold one asks again from set_duration
+        if self.current_index < 0 or self.is_audio_file() or self.player.duration() <= 0:
+            self.time_slider.set_preview(None)
+            return
+        self.time_slider.set_preview(self.previews.request(self.playlist[self.current_index], self.player.duration()))
+
+    def on_preview_ready(self, file_path, preview):
+        if 0 <= self.current_index < len(self.playlist) and self.playlist[self.current_index] == file_path:
+            self.time_slider.set_preview(preview)
+
+    def load_subtitles(self, file_path):
+        self.subtitle_track = None
+        self.set_subtitle_text("")
+        if self.subtitle_loader is not None:
+            self.subtitle_loader.cancel()
+            self.subtitle_loader = None
+        if file_path.lower().endswith(AUDIO_EXTENSIONS):
+            return
+        loader = SubtitleLoader(file_path, parent=self)
+        loader.loaded.connect(self.on_subtitles_loaded)
+        loader.finished.connect(lambda: self.on_subtitle_loader_finished(loader))
+        self.subtitle_loader = loader
+        loader.start()
+
+    def on_subtitle_loader_finished(self, loader):
+        if loader is self.subtitle_loader:
+            self.subtitle_loader = None
+        loader.deleteLater()
+
+    def on_subtitles_loaded(self, file_path, track):
+        if 0 <= self.current_index < len(self.playlist) and self.playlist[self.current_index] == file_path:
+            self.subtitle_track = track
+            self.subtitle_segment = (0, 0)
+            self.update_subtitles(self.player.position())
+
+    def update_subtitles(self, position):
+        if self.subtitle_track is None:
+            return
+        start, end = self.subtitle_segment
+        # most ticks land inside the span already looked up, so they cost two comparisons
+        if start <= position < end:
+            return
+        text, start, end = self.subtitle_track.segment_at(position)
+        self.subtitle_segment = (start, end)
+        self.set_subtitle_text(text)
+
+    def set_subtitle_text(self, text):
+        # the video widget draws the sink's subtitle text over the picture; only a changed cue is sent
+        if text == self.subtitle_text:
+            return
+        self.subtitle_text = text
+        if self.video_widget is not None and self.subtitles_check.isChecked():
+            self.video_widget.videoSink().setSubtitleText(text)
 
     def on_media_status_changed(self, status):
         if status == QMediaPlayer.MediaStatus.InvalidMedia:
             self.artist_label.setText("Invalid media file")
         elif status == QMediaPlayer.MediaStatus.LoadedMedia:
-            self.artist_label.setText("Media loaded successfully")
+            self.show_track_info()
         elif status == QMediaPlayer.MediaStatus.LoadingMedia:
             self.artist_label.setText("Loading media...")
 
@@ -884,6 +1528,7 @@ class MediaPlayer(QWidget):
 
     def toggle_play(self):
         if self.player.playbackState() == QMediaPlayer.PlaybackState.PlayingState:
+            self.crossfade.finish()
             self.player.pause()
         elif self.playlist:
             if self.current_index == -1:
@@ -895,24 +1540,15 @@ class MediaPlayer(QWidget):
         if not self.playlist:
             return
             
+        rows = self.navigation_rows()
         if self.shuffle_enabled:
-            try:
-                current_shuffle_index = self.shuffled_indices.index(self.current_index)
-                if current_shuffle_index < len(self.shuffled_indices) - 1:
-                    next_index = self.shuffled_indices[current_shuffle_index + 1]
-                else:
-                    if self.repeat_mode == 1:
-                        random.shuffle(self.shuffled_indices)
-                        next_index = self.shuffled_indices[0]
-                    else:
-                        return
-            except ValueError:
-                self.toggle_shuffle()
-                self.toggle_shuffle()
-                if self.shuffled_indices:
-                    next_index = self.shuffled_indices[0]
-                else:
-                    return
+            next_index = self.step_shuffled(rows, 1)
+            if next_index is None:
+                return
+        elif rows is not None:
+            next_index = self.step_filtered(rows, 1)
+            if next_index is None:
+                return
         else:
             if self.current_index == len(self.playlist) - 1:
                 if self.repeat_mode == 0:
@@ -930,23 +1566,15 @@ class MediaPlayer(QWidget):
         if not self.playlist:
             return
             
+        rows = self.navigation_rows()
         if self.shuffle_enabled:
-            try:
-                current_shuffle_index = self.shuffled_indices.index(self.current_index)
-                if current_shuffle_index > 0:
-                    prev_index = self.shuffled_indices[current_shuffle_index - 1]
-                else:
-                    if self.repeat_mode == 1:
-                        prev_index = self.shuffled_indices[-1]
-                    else:
-                        return
-            except ValueError:
-                self.toggle_shuffle()
-                self.toggle_shuffle()
-                if self.shuffled_indices:
-                    prev_index = self.shuffled_indices[-1]
-                else:
-                    return
+            prev_index = self.step_shuffled(rows, -1)
+            if prev_index is None:
+                return
+        elif rows is not None:
+            prev_index = self.step_filtered(rows, -1)
+            if prev_index is None:
+                return
         else:
             if self.current_index == 0:
                 if self.repeat_mode == 0:
@@ -963,14 +1591,21 @@ class MediaPlayer(QWidget):
     def set_duration(self, duration):
         self.time_slider.setRange(0, duration)
         self.total_time_label.setText(self.ms_to_time(duration))
-
-    def update_time_slider(self):
-        if not self.time_slider.isSliderDown():
-            self.time_slider.setValue(self.player.position())
+        self.displayed_second = None
+        self.request_preview()
 
     def update_time_display(self, position):
-        self.current_time_label.setText(self.ms_to_time(position))
-        if not self.time_slider.isSliderDown():
+        if position and self.startup.mark("first audio") is not None and self.startup.profile:
+            print(self.startup.summary())
+        second = position // 1000
+        if second != self.displayed_second:
+            self.displayed_second = second
+            self.current_time_label.setText(self.ms_to_time(position))
+        if self.time_slider.isSliderDown():
+            return
+        # only move the handle once the position has advanced by at least one pixel of groove
+        ms_per_pixel = self.time_slider.maximum() // max(1, self.time_slider.width())
+        if abs(position - self.time_slider.value()) > ms_per_pixel:
             self.time_slider.setValue(position)
 
     def seek_position(self, pos):
@@ -984,6 +1619,48 @@ class MediaPlayer(QWidget):
             return f"{int(h):02}:{int(m):02}:{int(s):02}"
         return f"{int(m):02}:{int(s):02}"
 
+    def changeEvent(self, event):
+        if event.type() == QEvent.Type.WindowStateChange:
+            self.update_spectrum_source()
+        super().changeEvent(event)
+
+    def restore_session(self):
+        if self.library is None:
+            return
+        paths = self.library.load_session()
+        if self.folder_watcher is not None:
+            for folder in self.library.watched_folders():
+                self.folder_watcher.watch(folder, check=True)
+        if paths:
+            self.add_files_to_playlist(paths)
+            self.artist_label.setText(f"Restored {len(paths)} tracks from last session")
+
+    def save_session(self):
+        # closing before the deferred restore ran must not overwrite the stored session
+        if self.library is None or not self.startup_finished:
+            return
+        try:
+            self.library.save_session(self.playlist.paths)
+            if self.folder_watcher is not None:
+                self.library.set_watched_folders(self.folder_watcher.roots)
+        except sqlite3.Error as e:
+            print(f"Could not save session playlist: {e}")
+
+    def closeEvent(self, event):
+        for scanner in self.findChildren((FolderScanner, PlaylistImporter, SubtitleLoader)):
+            scanner.cancel()
+            scanner.wait()
+        self.save_session()
+        if self.folder_watcher is not None:
+            self.folder_watcher.shutdown()
+        self.metadata_service.shutdown()
+        self.waveforms.shutdown()
+        self.previews.shutdown()
+        self.thumbnails.shutdown()
+        self.loudness.shutdown()
+        self.spectrum_source.shutdown()
+        super().closeEvent(event)
+
     def keyPressEvent(self, event):
         if event.key() == Qt.Key.Key_Space:
             self.toggle_play()
@@ -1006,7 +1683,14 @@ if __name__ == "__main__":
     app.setApplicationName("Neon Media Player Pro")
     app.setApplicationVersion("2.0")
     
-    player = MediaPlayer()
+    player = MediaPlayer(STARTUP)
     player.show()
+
+    instance_server = SingleInstanceServer(player.handle_remote_command, app)
+    if not instance_server.listen():
+        print("Later launches will open their own window instead of handing files to this one")
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("-")]
+    if args:
+        player.handle_remote_command({"command": "open", "paths": [os.path.abspath(arg) for arg in args]})
     
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,2 @@
+MEDIA_EXTENSIONS = ('.mp3', '.mp4', '.wav', '.avi', '.mkv', '.flac', '.aac', '.ogg', '.mov', '.wmv')
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.flac', '.aac', '.ogg')
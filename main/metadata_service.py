@@ -0,0 +1,125 @@
+import heapq, itertools, os, sqlite3, threading
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from library import MediaLibrary
+from tag_reader import read_tags
+
+VISIBLE_PRIORITY = 0
+CURRENT_PRIORITY = -1
+BACKGROUND_PRIORITY = 1
+
+
+class MetadataService(QObject):
+    metadata_ready = pyqtSignal(str, dict)
+
+    def __init__(self, library_path=None, worker_count=None, parent=None):
+        super().__init__(parent)
+        self.library_path = library_path
+        self.worker_count = worker_count or min(4, os.cpu_count() or 1)
+        self.metadata = {}
+        self.queue = []
+        self.queued_priority = {}
+        self.counter = itertools.count()
+        self.condition = threading.Condition()
+        self.running = True
+        self.active = 0
+        self.workers = []
+
+    def start(self):
+        # paths requested before this wait in the queue
+        if self.workers:
+            return
+        self.workers = [threading.Thread(target=self.work, name=f"metadata-{i}", daemon=True)
+                        for i in range(self.worker_count)]
+        for worker in self.workers:
+            worker.start()
+
+    def get(self, path):
+        return self.metadata.get(path)
+
+    def request(self, paths, priority=BACKGROUND_PRIORITY):
+        with self.condition:
+            for path in paths:
+                if path in self.metadata or self.queued_priority.get(path, priority + 1) <= priority:
+                    continue
+                self.queued_priority[path] = priority
+                heapq.heappush(self.queue, (priority, next(self.counter), path))
+            self.condition.notify_all()
+
+    def clear(self):
+        with self.condition:
+            self.queue.clear()
+            self.queued_priority.clear()
+
+    def is_idle(self):
+        with self.condition:
+            return not self.queue and not self.active
+
+    def shutdown(self):
+        with self.condition:
+            self.running = False
+            self.queue.clear()
+            self.condition.notify_all()
+        for worker in self.workers:
+            worker.join(timeout=2)
+
+    def next_path(self):
+        with self.condition:
+            while self.running:
+                while self.queue:
+                    priority, _, path = heapq.heappop(self.queue)
+                    # a path re-queued at a better priority leaves a stale heap entry behind
+                    if self.queued_priority.get(path) == priority:
+                        del self.queued_priority[path]
+                        self.active += 1
+                        return path
+                self.condition.wait()
+        return None
+
+    def work(self):
+        library = None
+        if self.library_path:
+            try:
+                library = MediaLibrary(self.library_path)
+            except (sqlite3.Error, OSError) as e:
+                print(f"Metadata cache unavailable: {e}")
+        try:
+            while True:
+                path = self.next_path()
+                if path is None:
+                    break
+                try:
+                    metadata = self.probe(library, path)
+                except Exception as e:
+                    # one unreadable file must not take the worker down with the rest of the queue
+                    print(f"Metadata probe failed: {path} - {e!r}")
+                    metadata = {}
+                if metadata is not None:
+                    self.metadata[path] = metadata
+                    self.metadata_ready.emit(path, metadata)
+                with self.condition:
+                    self.active -= 1
+        finally:
+            if library is not None:
+                library.close()
+
+    def probe(self, library, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if library is not None:
+            try:
+                metadata = library.cached_metadata(path, stat.st_size, stat.st_mtime_ns)
+                if metadata is not None:
+                    return metadata
+            except sqlite3.Error as e:
+                print(f"Metadata cache read error: {path} - {e}")
+        metadata = read_tags(path)
+        if library is not None:
+            try:
+                library.store_metadata(path, stat.st_size, stat.st_mtime_ns, metadata)
+            except sqlite3.Error as e:
+                print(f"Metadata cache write error: {path} - {e}")
+        return metadata
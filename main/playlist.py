@@ -0,0 +1,117 @@
+class Playlist:
+    def __init__(self):
+        self.paths = []
+        self.ids = []
+        self.index_by_path = {}
+        self.index_by_id = {}
+        self.current_id = None
+        self.next_id = 1
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __bool__(self):
+        return bool(self.paths)
+
+    def __getitem__(self, index):
+        return self.paths[index]
+
+    def __iter__(self):
+        return iter(self.paths)
+
+    def __contains__(self, file_path):
+        return file_path in self.index_by_path
+
+    def entry_id(self, index):
+        return self.ids[index]
+
+    def index_of(self, file_path):
+        return self.index_by_path.get(file_path, -1)
+
+    def index_of_id(self, entry_id):
+        return self.index_by_id.get(entry_id, -1)
+
+    def path_of_id(self, entry_id):
+        index = self.index_by_id.get(entry_id)
+        if index is None:
+            return None
+        return self.paths[index]
+
+    @property
+    def current_index(self):
+        if self.current_id is None:
+            return -1
+        return self.index_by_id.get(self.current_id, -1)
+
+    @current_index.setter
+    def current_index(self, index):
+        if 0 <= index < len(self.paths):
+            self.current_id = self.ids[index]
+        else:
+            self.current_id = None
+
+    def add(self, file_path):
+        if file_path in self.index_by_path:
+            return -1
+        return self.extend([file_path], deduped=True).start
+
+    def dedupe(self, file_paths):
+        index_by_path = self.index_by_path
+        return [file_path for file_path in dict.fromkeys(file_paths) if file_path not in index_by_path]
+
+    def extend(self, file_paths, deduped=False):
+        if not deduped:
+            file_paths = self.dedupe(file_paths)
+        start = len(self.paths)
+        end = start + len(file_paths)
+        new_ids = range(self.next_id, self.next_id + len(file_paths))
+        self.next_id += len(file_paths)
+        self.paths.extend(file_paths)
+        self.ids.extend(new_ids)
+        self.index_by_path.update(zip(file_paths, range(start, end)))
+        self.index_by_id.update(zip(new_ids, range(start, end)))
+        return range(start, end)
+
+    def rows_of(self, file_paths):
+        index_by_path = self.index_by_path
+        return sorted({index_by_path[file_path] for file_path in file_paths if file_path in index_by_path})
+
+    def remove_range(self, start, stop):
+        for file_path in self.paths[start:stop]:
+            del self.index_by_path[file_path]
+        for entry_id in self.ids[start:stop]:
+            del self.index_by_id[entry_id]
+        del self.paths[start:stop]
+        del self.ids[start:stop]
+        self.reindex(start)
+
+    def remove_rows(self, rows):
+        removed = set(rows)
+        kept = [i for i in range(len(self.paths)) if i not in removed]
+        self.paths = [self.paths[i] for i in kept]
+        self.ids = [self.ids[i] for i in kept]
+        self.index_by_path = {}
+        self.index_by_id = {}
+        self.reindex(0)
+
+    def reindex(self, start):
+        end = len(self.paths)
+        self.index_by_path.update(zip(self.paths[start:], range(start, end)))
+        self.index_by_id.update(zip(self.ids[start:], range(start, end)))
+
+    def rename(self, old_path, new_path):
+        index = self.index_by_path.get(old_path)
+        if index is None or new_path in self.index_by_path:
+            return -1
+        # the entry keeps its id, so a renamed current track stays current
+        del self.index_by_path[old_path]
+        self.paths[index] = new_path
+        self.index_by_path[new_path] = index
+        return index
+
+    def clear(self):
+        self.paths.clear()
+        self.ids.clear()
+        self.index_by_path.clear()
+        self.index_by_id.clear()
+        self.current_id = None
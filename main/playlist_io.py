@@ -0,0 +1,217 @@
+import os, re, tempfile, time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+from urllib.request import url2pathname
+from xml.sax.saxutils import escape
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from media_formats import MEDIA_EXTENSIONS
+
+PLAYLIST_EXTENSIONS = (".m3u", ".m3u8", ".pls", ".xspf")
+PLAYLIST_FILTER = "Playlists (*.m3u *.m3u8 *.pls *.xspf)"
+EXPORT_FILTERS = "M3U8 Playlist (*.m3u8);;M3U Playlist (*.m3u);;PLS Playlist (*.pls);;XSPF Playlist (*.xspf)"
+# characters XML 1.0 cannot carry at all, escaped or not; lone surrogates come from undecodable tags
+INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]")
+
+
+def open_text(path):
+    # surrogateescape keeps undecodable bytes intact so they still map back to the file system name
+    return open(path, encoding="utf-8-sig", errors="surrogateescape", newline=None)
+
+
+def iter_m3u(path):
+    with open_text(path) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+
+
+def iter_pls(path):
+    with open_text(path) as f:
+        for line in f:
+            key, sep, value = line.strip().partition("=")
+            if sep and key.lower().startswith("file") and key[4:].isdigit() and value:
+                yield value
+
+
+def iter_xspf(path):
+    tracklist = None
+    for event, element in ET.iterparse(path, events=("start", "end")):
+        tag = element.tag.rpartition("}")[2]
+        if event == "start":
+            if tag == "trackList":
+                tracklist = element
+        elif tag == "location" and element.text:
+            yield element.text.strip()
+        elif tag == "track" and tracklist is not None:
+            # drop finished tracks so the tree never holds more than the one being parsed
+            tracklist.clear()
+
+
+READERS = {
+    ".m3u": iter_m3u,
+    ".m3u8": iter_m3u,
+    ".pls": iter_pls,
+    ".xspf": iter_xspf,
+}
+
+
+def resolve_location(location, base_dir, uri=False):
+    if not uri and os.path.isabs(location) and "/." not in location and "//" not in location:
+        return location
+    parts = urlsplit(location)
+    scheme = parts.scheme.lower()
+    if scheme == "file":
+        host = parts.netloc
+        if host and host.lower() != "localhost":
+            if os.name != "nt":
+                print(f"Playlist entry on another host skipped: {location}")
+                return None
+            # file://server/share/x.mp3 is the UNC path \\server\share\x.mp3
+            return os.path.normpath(url2pathname(f"//{host}{parts.path}"))
+        return os.path.normpath(url2pathname(parts.path))
+    if len(scheme) > 1:
+        return None
+    if uri:
+        # a scheme-less XSPF location is a relative URI reference, percent-encoded like any other
+        location = unquote(location)
+    if os.sep != "\\":
+        location = location.replace("\\", os.sep)
+    return os.path.normpath(os.path.join(base_dir, location))
+
+
+def iter_playlist(path):
+    reader = READERS.get(os.path.splitext(path)[1].lower())
+    if reader is None:
+        raise ValueError(f"unsupported playlist format: {path}")
+    base_dir = os.path.dirname(os.path.abspath(path))
+    uri = reader is iter_xspf
+    for location in reader(path):
+        yield resolve_location(location, base_dir, uri)
+
+
+class PlaylistImporter(QThread):
+    batch_found = pyqtSignal(list)
+    progress = pyqtSignal(int, int)
+
+    def __init__(self, path, batch_size=2000, batch_interval=0.1, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.entries_read = 0
+        self.files_found = 0
+        self.error = None
+
+    def cancel(self):
+        self.requestInterruption()
+
+    def run(self):
+        batch = []
+        last_flush = time.monotonic()
+        try:
+            for file_path in iter_playlist(self.path):
+                if self.isInterruptionRequested():
+                    return
+                self.entries_read += 1
+                if file_path and file_path.lower().endswith(MEDIA_EXTENSIONS) and os.path.isfile(file_path):
+                    batch.append(file_path)
+                    self.files_found += 1
+
+                now = time.monotonic()
+                if len(batch) >= self.batch_size or now - last_flush >= self.batch_interval:
+                    if batch:
+                        self.batch_found.emit(batch)
+                        batch = []
+                    self.progress.emit(self.entries_read, self.files_found)
+                    last_flush = now
+        except (OSError, ValueError, ET.ParseError) as e:
+            self.error = str(e)
+            print(f"Playlist import error: {self.path} - {e}")
+
+        if batch and not self.isInterruptionRequested():
+            self.batch_found.emit(batch)
+        self.progress.emit(self.entries_read, self.files_found)
+
+
+def write_m3u(f, paths, metadata_lookup):
+    f.write("#EXTM3U\n")
+    for path in paths:
+        metadata = metadata_lookup(path) or {}
+        if metadata:
+            seconds = metadata.get("duration_ms", -1000) // 1000
+            title = " - ".join(filter(None, (metadata.get("artist"), metadata.get("title"))))
+            f.write(f"#EXTINF:{seconds},{title or os.path.basename(path)}\n")
+        f.write(f"{path}\n")
+
+
+def write_pls(f, paths, metadata_lookup):
+    f.write("[playlist]\n")
+    count = 0
+    for count, path in enumerate(paths, 1):
+        f.write(f"File{count}={path}\n")
+        metadata = metadata_lookup(path) or {}
+        if metadata.get("title"):
+            f.write(f"Title{count}={metadata['title']}\n")
+        if metadata.get("duration_ms"):
+            f.write(f"Length{count}={metadata['duration_ms'] // 1000}\n")
+    f.write(f"NumberOfEntries={count}\nVersion=2\n")
+
+
+def write_xspf(f, paths, metadata_lookup):
+    f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<playlist version="1" xmlns="http://xspf.org/ns/0/">\n  <trackList>\n')
+    for path in paths:
+        f.write(f"    <track>\n      <location>{escape(Path(path).as_uri())}</location>\n")
+        metadata = metadata_lookup(path) or {}
+        for key, tag in (("title", "title"), ("artist", "creator"), ("album", "album")):
+            if metadata.get(key):
+                f.write(f"      <{tag}>{escape(INVALID_XML.sub('', metadata[key]))}</{tag}>\n")
+        if metadata.get("duration_ms"):
+            f.write(f"      <duration>{metadata['duration_ms']}</duration>\n")
+        f.write("    </track>\n")
+    f.write("  </trackList>\n</playlist>\n")
+
+
+WRITERS = {
+    ".m3u": write_m3u,
+    ".m3u8": write_m3u,
+    ".pls": write_pls,
+    ".xspf": write_xspf,
+}
+
+
+def file_mode(path):
+    try:
+        return os.stat(path).st_mode & 0o777
+    except OSError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def export_playlist(path, paths, metadata_lookup=None):
+    writer = WRITERS.get(os.path.splitext(path)[1].lower())
+    if writer is None:
+        raise ValueError(f"unsupported playlist format: {path}")
+    metadata_lookup = metadata_lookup or (lambda path: None)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".playlist-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", errors="surrogateescape", newline="\n") as f:
+            writer(f, paths, metadata_lookup)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file private to the user, so give it the usual permissions
+        os.chmod(temp_path, file_mode(path))
+        # readers see either the old playlist or the complete new one, never a partial write
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,159 @@
+import bisect, os
+
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex
+
+# beyond this many separate row ranges a model reset is cheaper than per-range removals
+MAX_REMOVE_RANGES = 16
+
+
+def format_duration(ms):
+    minutes, seconds = divmod(ms // 1000, 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02}:{seconds:02}"
+    return f"{minutes}:{seconds:02}"
+
+
+class PlaylistModel(QAbstractListModel):
+    def __init__(self, playlist, metadata_lookup=None, parent=None, thumbnail_lookup=None):
+        super().__init__(parent)
+        self.playlist = playlist
+        self.metadata_lookup = metadata_lookup
+        self.thumbnail_lookup = thumbnail_lookup
+        self.filter_ids = None
+        self.visible_rows = None
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        if self.visible_rows is not None:
+            return len(self.visible_rows)
+        return len(self.playlist)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.source_row(index.row())
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"{row + 1}. {self.describe(self.playlist[row])}"
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return self.playlist[row]
+        if role == Qt.ItemDataRole.DecorationRole and self.thumbnail_lookup:
+            return self.thumbnail_lookup(self.playlist[row])
+        return None
+
+    def describe(self, file_path):
+        metadata = self.metadata_lookup(file_path) if self.metadata_lookup else None
+        if not metadata or not metadata.get("title"):
+            text = os.path.basename(file_path)
+        elif metadata.get("artist"):
+            text = f"{metadata['artist']} - {metadata['title']}"
+        else:
+            text = metadata["title"]
+        if metadata and metadata.get("duration_ms"):
+            text += f" ({format_duration(metadata['duration_ms'])})"
+        return text
+
+    def is_filtered(self):
+        return self.visible_rows is not None
+
+    def source_row(self, row):
+        if self.visible_rows is None:
+            return row
+        return self.visible_rows[row]
+
+    def view_row(self, source_row):
+        rows = self.visible_rows
+        if rows is None:
+            return source_row
+        row = bisect.bisect_left(rows, source_row)
+        if row < len(rows) and rows[row] == source_row:
+            return row
+        return -1
+
+    def rows_for_ids(self, entry_ids):
+        playlist = self.playlist
+        if len(entry_ids) * 8 < len(playlist):
+            return sorted(row for row in map(playlist.index_of_id, entry_ids) if row >= 0)
+        return [row for row, entry_id in enumerate(playlist.ids) if entry_id in entry_ids]
+
+    def set_filter(self, entry_ids):
+        self.beginResetModel()
+        self.filter_ids = None if entry_ids is None else set(entry_ids)
+        self.visible_rows = None if entry_ids is None else self.rows_for_ids(entry_ids)
+        self.endResetModel()
+
+    def show_rows(self, rows):
+        # rows only ever arrive at the end of the playlist, so they extend the filtered view in order
+        if not rows or self.visible_rows is None:
+            return
+        start = len(self.visible_rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+        self.visible_rows.extend(rows)
+        self.filter_ids.update(self.playlist.ids[row] for row in rows)
+        self.endInsertRows()
+
+    def refresh_path(self, file_path, role=Qt.ItemDataRole.DisplayRole):
+        row = self.view_row(self.playlist.index_of(file_path))
+        if row >= 0:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [role])
+
+    def add_path(self, file_path):
+        added = self.add_paths([file_path])
+        return added.start if added else -1
+
+    def add_paths(self, file_paths):
+        new_paths = self.playlist.dedupe(file_paths)
+        if not new_paths:
+            return range(0)
+        if self.visible_rows is not None:
+            # hidden until the caller decides which of them match the filter
+            return self.playlist.extend(new_paths, deduped=True)
+        start = len(self.playlist)
+        self.beginInsertRows(QModelIndex(), start, start + len(new_paths) - 1)
+        added = self.playlist.extend(new_paths, deduped=True)
+        self.endInsertRows()
+        return added
+
+    def remove_paths(self, file_paths):
+        rows = self.playlist.rows_of(file_paths)
+        if not rows:
+            return rows
+        ranges = []
+        for row in rows:
+            if ranges and ranges[-1][1] == row:
+                ranges[-1][1] = row + 1
+            else:
+                ranges.append([row, row + 1])
+        if self.visible_rows is not None:
+            self.beginResetModel()
+            self.playlist.remove_rows(rows)
+            self.filter_ids.intersection_update(self.playlist.index_by_id)
+            self.visible_rows = self.rows_for_ids(self.filter_ids)
+            self.endResetModel()
+        elif len(ranges) > MAX_REMOVE_RANGES:
+            self.beginResetModel()
+            self.playlist.remove_rows(rows)
+            self.endResetModel()
+        else:
+            for start, stop in reversed(ranges):
+                self.beginRemoveRows(QModelIndex(), start, stop - 1)
+                self.playlist.remove_range(start, stop)
+                self.endRemoveRows()
+        return rows
+
+    def rename_path(self, old_path, new_path):
+        row = self.playlist.rename(old_path, new_path)
+        if self.view_row(row) >= 0:
+            index = self.index(self.view_row(row))
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole])
+        return row
+
+    def clear(self):
+        self.beginResetModel()
+        self.playlist.clear()
+        if self.filter_ids is not None:
+            self.filter_ids = set()
+            self.visible_rows = []
+        self.endResetModel()
@@ -0,0 +1,267 @@
+import math, os, shutil, struct, subprocess
+
+from PyQt6.QtCore import Qt, QObject, pyqtSignal
+from PyQt6.QtGui import QPixmap
+from PyQt6.QtMultimedia import QMediaPlayer
+
+from audio_decode import start_pool, stop_pool
+from disk_cache import cache_key, prune_cache, touch, write_atomic
+from thumbnails import FrameGrabber, encode_jpeg
+
+PREVIEW_WIDTH = 160
+PREVIEW_HEIGHT = 90
+MAX_FRAMES = 300
+MIN_INTERVAL = 2.0
+CACHE_SUFFIX = ".preview"
+CACHE_LIMIT_BYTES = 128 * 1024 * 1024
+MAGIC = b"NPV1"
+# magic, frame box width, frame box height, seconds per frame, frame count; then count + 1 offsets
+HEADER = struct.Struct("<4sHHdI")
+
+
+def preview_interval(duration_ms):
+    return round(max(MIN_INTERVAL, duration_ms / 1000 / MAX_FRAMES), 3)
+
+
+class PreviewIndex:
+    def __init__(self, data, interval, offsets):
+        # JPEG frames back to back; frame k shows the video at k * interval seconds
+        self.data = data
+        self.interval = interval
+        self.offsets = offsets
+        self.pixmaps = {}
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def frame_at(self, position_ms):
+        if not len(self):
+            return None
+        frame = min(len(self) - 1, max(0, int(position_ms / 1000 / self.interval)))
+        pixmap = self.pixmaps.get(frame)
+        if pixmap is None:
+            pixmap = QPixmap()
+            pixmap.loadFromData(self.data[self.offsets[frame]:self.offsets[frame + 1]], "JPG")
+            self.pixmaps[frame] = pixmap
+        return pixmap
+
+
+def frame_offsets(frames):
+    offsets = [0]
+    for frame in frames:
+        offsets.append(offsets[-1] + len(frame))
+    return offsets
+
+
+def write_index(cache_path, frames, interval):
+    offsets = frame_offsets(frames)
+    write_atomic(cache_path, HEADER.pack(MAGIC, PREVIEW_WIDTH, PREVIEW_HEIGHT, interval, len(frames)),
+                 struct.pack(f"<{len(offsets)}I", *offsets), *frames)
+
+
+def load_index(cache_path):
+    try:
+        with open(cache_path, "rb") as f:
+            data = f.read()
+        magic, width, height, interval, count = HEADER.unpack_from(data)
+        offsets = struct.unpack_from(f"<{count + 1}I", data, HEADER.size)
+    except (OSError, struct.error):
+        return None
+    start = HEADER.size + (count + 1) * 4
+    if (magic != MAGIC or (width, height) != (PREVIEW_WIDTH, PREVIEW_HEIGHT) or interval <= 0
+            or len(data) != start + offsets[-1]):
+        return None
+    touch(cache_path)
+    return PreviewIndex(data[start:], interval, offsets)
+
+
+def split_jpegs(data):
+    frames = []
+    start = 0
+    while data.startswith(b"\xff\xd8", start):
+        # step over the marker segments, whose tables may hold any byte, up to the scan
+        pos = start + 2
+        while pos + 4 <= len(data) and data[pos] == 0xFF and data[pos + 1] != 0xDA:
+            pos += 2 + int.from_bytes(data[pos + 2:pos + 4], "big")
+        # inside the scan every 0xFF is stuffed or a restart marker, so the next FF D9 ends the image
+        end = data.find(b"\xff\xd9", pos)
+        if end < 0:
+            break
+        frames.append(data[start:end + 2])
+        start = end + 2
+    return frames
+
+
+def compute_preview(path, cache_path, duration_ms):
+    # runs in a worker process; only key frames are decoded, which is what makes a full pass cheap
+    interval = preview_interval(duration_ms)
+    command = [shutil.which("ffmpeg"), "-nostdin", "-v", "error", "-skip_frame", "nokey", "-i", path,
+               "-an", "-sn", "-dn", "-vf",
+               f"fps=1/{interval},scale={PREVIEW_WIDTH}:{PREVIEW_HEIGHT}:force_original_aspect_ratio=decrease",
+               "-c:v", "mjpeg", "-q:v", "5", "-f", "image2pipe", "pipe:1"]
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    frames = split_jpegs(result.stdout)
+    if result.returncode != 0 and not frames:
+        raise ValueError(f"ffmpeg could not read {path}: {result.stderr.decode(errors='replace').strip()}")
+    write_index(cache_path, frames, interval)
+    prune_cache(os.path.dirname(cache_path), CACHE_LIMIT_BYTES, CACHE_SUFFIX)
+    return cache_path
+
+
+class PreviewGrabber(FrameGrabber):
+    # without ffmpeg the off-screen player seeks to each position in turn; the decoding stays
+    # in the player's own threads and only the small JPEGs are made here
+    # the flag is False when some positions never produced a frame
+    index_grabbed = pyqtSignal(str, str, object, float, bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.frames = None
+        self.positions = []
+
+    def grab(self, path, cache_path, duration_ms):
+        if (self.current is not None and self.current[0] == path) or any(item[0] == path for item in self.queue):
+            return
+        self.queue.append((path, cache_path, duration_ms))
+        self.start_next()
+
+    def abandon_others(self, path):
+        self.keep({path})
+        if self.current is not None and self.current[0] != path:
+            self.frames = None
+            self.finish()
+
+    def start_next(self):
+        if self.current is None and self.queue:
+            interval = preview_interval(self.queue[0][2])
+            self.positions = [round(k * interval * 1000) for k in range(math.ceil(self.queue[0][2] / 1000 / interval))]
+            self.frames = []
+        super().start_next()
+
+    def on_media_status(self, status):
+        if self.current is None:
+            return
+        if status == QMediaPlayer.MediaStatus.LoadedMedia and self.target_ms is None:
+            self.player.play()
+            self.seek_next()
+        elif status == QMediaPlayer.MediaStatus.InvalidMedia:
+            self.finish()
+
+    def seek_next(self):
+        if len(self.frames) >= len(self.positions):
+            self.finish()
+            return
+        self.target_ms = self.positions[len(self.frames)]
+        self.player.setPosition(self.target_ms)
+        self.timeout.start()
+
+    def on_frame(self, frame):
+        if self.current is None or self.target_ms is None or not frame.isValid():
+            return
+        start_ms = frame.startTime() // 1000
+        if 0 <= start_ms < self.target_ms - 500:
+            return
+        image = frame.toImage()
+        if image.isNull():
+            return
+        self.frames.append(encode_jpeg(image.scaled(PREVIEW_WIDTH, PREVIEW_HEIGHT, Qt.AspectRatioMode.KeepAspectRatio,
+                                                    Qt.TransformationMode.SmoothTransformation)))
+        self.seek_next()
+
+    def finish(self, image=None, definite=True):
+        if self.current is None:
+            return
+        path, cache_path, duration_ms = self.current
+        frames = self.frames
+        complete = frames is not None and (len(frames) >= len(self.positions) or (definite and not frames))
+        self.frames = None
+        self.release()
+        if frames is not None:
+            # a position that never produced a frame ends the index early; the last frame covers the rest
+            self.index_grabbed.emit(path, cache_path, frames, preview_interval(duration_ms), complete)
+
+
+class PreviewService(QObject):
+    preview_ready = pyqtSignal(str, object)
+
+    def __init__(self, cache_dir, max_workers=1, parent=None):
+        super().__init__(parent)
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.executor = None
+        self.grabber = None
+        self.pending = {}
+        self.partial = {}
+        self.failed = set()
+        self.running = True
+
+    def request(self, path, duration_ms):
+        # returns the cached index straight away, otherwise builds it and emits preview_ready later
+        try:
+            cache_path = os.path.join(self.cache_dir, cache_key(path, CACHE_SUFFIX))
+        except OSError:
+            return None
+        index = load_index(cache_path)
+        if index is not None or cache_path in self.failed or duration_ms <= 0:
+            return index
+        for other_path, future in list(self.pending.items()):
+            if other_path != cache_path:
+                future.cancel()
+        # a partial index from an earlier grab is shown while the file is grabbed again
+        if cache_path in self.pending or not self.running:
+            return self.partial.get(cache_path)
+        if shutil.which("ffmpeg"):
+            if self.executor is None:
+                self.executor = start_pool(self.max_workers)
+            future = self.executor.submit(compute_preview, path, cache_path, duration_ms)
+            self.pending[cache_path] = future
+            future.add_done_callback(lambda future: self.on_done(path, cache_path, future))
+        else:
+            if self.grabber is None:
+                self.grabber = PreviewGrabber(self)
+                self.grabber.index_grabbed.connect(self.on_index_grabbed)
+            self.grabber.abandon_others(path)
+            self.grabber.grab(path, cache_path, duration_ms)
+        return self.partial.get(cache_path)
+
+    def on_done(self, path, cache_path, future):
+        self.pending.pop(cache_path, None)
+        if future.cancelled() or not self.running:
+            return
+        try:
+            future.result()
+        except Exception as e:
+            self.failed.add(cache_path)
+            print(f"Seek preview unavailable: {path} - {e}")
+            return
+        self.emit_index(path, cache_path)
+
+    def on_index_grabbed(self, path, cache_path, frames, interval, complete):
+        if not complete:
+            # a grab that stopped part-way is kept in memory for the file being played only,
+            # so it is tried again the next time the file is opened
+            index = PreviewIndex(b"".join(frames), interval, frame_offsets(frames))
+            self.partial = {cache_path: index}
+            if self.running:
+                self.preview_ready.emit(path, index)
+            return
+        try:
+            write_index(cache_path, frames, interval)
+        except OSError as e:
+            self.failed.add(cache_path)
+            print(f"Seek preview unavailable: {path} - {e}")
+            return
+        prune_cache(self.cache_dir, CACHE_LIMIT_BYTES, CACHE_SUFFIX)
+        self.emit_index(path, cache_path)
+
+    def emit_index(self, path, cache_path):
+        index = load_index(cache_path)
+        if index is not None and self.running:
+            self.preview_ready.emit(path, index)
+
+    def shutdown(self):
+        self.running = False
+        if self.executor is not None:
+            stop_pool(self.executor)
+        if self.grabber is not None:
+            self.grabber.shutdown()
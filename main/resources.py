@@ -0,0 +1,44 @@
+import os
+
+from PyQt6.QtCore import QSize
+from PyQt6.QtGui import QIcon
+
+RESOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ICON_FILES = (
+    "icon_audio_off.png", "icon_audio_on.png", "icon_clear.png", "icon_next.png",
+    "icon_open_file.png", "icon_open_folder.png", "icon_output.png", "icon_play.png",
+    "icon_playlist.png", "icon_previous.png", "icon_repeat.png", "icon_shuffle.png",
+    "icon_speed.png", "icon_stop.png", "icon_theme.png", "repeat_one.png",
+)
+
+
+class IconCache:
+    def __init__(self, directory=RESOURCE_DIR):
+        self.icons = {}
+        self.pixmaps = {}
+        for name in ICON_FILES:
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                self.icons[name] = QIcon(path)
+
+    def icon(self, name):
+        return self.icons.get(name)
+
+    def pixmap(self, name, size):
+        key = (name, size)
+        pixmap = self.pixmaps.get(key)
+        if pixmap is None and name in self.icons:
+            pixmap = self.icons[name].pixmap(QSize(size, size))
+            self.pixmaps[key] = pixmap
+        return pixmap
+
+
+_icon_cache = None
+
+
+def icon_cache():
+    global _icon_cache
+    if _icon_cache is None:
+        _icon_cache = IconCache()
+    return _icon_cache
@@ -0,0 +1,182 @@
+import os, re
+from collections import deque
+
+TOKEN_RE = re.compile(r"\w+")
+SHORT_QUERY = 3
+
+
+def normalize(text):
+    return " ".join(TOKEN_RE.findall(text.casefold()))
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def prefixes(text):
+    found = set()
+    for token in text.split(" "):
+        found.add(token[:1])
+        found.add(token[:2])
+    found.discard("")
+    return found
+
+
+def document_text(file_path, metadata=None):
+    parts = [os.path.splitext(os.path.basename(file_path))[0]]
+    if metadata:
+        parts.extend(metadata[key] for key in ("title", "artist", "album") if metadata.get(key))
+    return normalize(" ".join(parts))
+
+
+class SearchIndex:
+    def __init__(self, path_lookup, metadata_lookup=None):
+        self.path_lookup = path_lookup
+        self.metadata_lookup = metadata_lookup
+        self.pending = deque()
+        self.texts = {}
+        self.trigram_postings = {}
+        self.prefix_postings = {}
+        self.stale = 0
+        self.version = 0
+        self.last_words = None
+        self.last_matches = None
+        self.last_version = -1
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add(self, entry_id, text):
+        old_text = self.texts.get(entry_id)
+        if old_text == text:
+            return
+        self.version += 1
+        if old_text is None:
+            old_grams, old_prefixes = set(), set()
+        else:
+            # postings are append-only; entries left behind by the old text are filtered out at query time
+            old_grams, old_prefixes = trigrams(old_text), prefixes(old_text)
+            self.stale += 1
+        self.texts[entry_id] = text
+        for gram in trigrams(text) - old_grams:
+            postings = self.trigram_postings.get(gram)
+            if postings is None:
+                postings = self.trigram_postings[gram] = []
+            postings.append(entry_id)
+        for prefix in prefixes(text) - old_prefixes:
+            postings = self.prefix_postings.get(prefix)
+            if postings is None:
+                postings = self.prefix_postings[prefix] = []
+            postings.append(entry_id)
+
+    def queue(self, entry_ids):
+        self.pending.extend(entry_ids)
+
+    def drain(self, limit=None):
+        # queued entries are looked up when drained, so renames and tags that arrived meanwhile are picked up;
+        # returns the entries that were indexed
+        pending = self.pending
+        count = len(pending) if limit is None else min(limit, len(pending))
+        indexed = []
+        for _ in range(count):
+            entry_id = pending.popleft()
+            file_path = self.path_lookup(entry_id)
+            if file_path is not None:
+                self.index_path(entry_id, file_path)
+                indexed.append(entry_id)
+        return indexed
+
+    def index_path(self, entry_id, file_path):
+        metadata = self.metadata_lookup(file_path) if self.metadata_lookup else None
+        self.add(entry_id, document_text(file_path, metadata))
+
+    def refresh(self, entry_id, file_path):
+        if entry_id in self.texts:
+            self.index_path(entry_id, file_path)
+
+    def remove(self, entry_ids):
+        self.version += 1
+        for entry_id in entry_ids:
+            if self.texts.pop(entry_id, None) is not None:
+                self.stale += 1
+        if self.stale > len(self.texts):
+            self.rebuild()
+
+    def rebuild(self):
+        texts = self.texts
+        self.texts = {}
+        self.trigram_postings = {}
+        self.prefix_postings = {}
+        self.stale = 0
+        for entry_id, text in texts.items():
+            self.add(entry_id, text)
+
+    def clear(self):
+        self.version += 1
+        self.pending.clear()
+        self.texts.clear()
+        self.trigram_postings.clear()
+        self.prefix_postings.clear()
+        self.stale = 0
+
+    def postings(self, word):
+        # the rarest posting list that every entry containing the word must appear in
+        if len(word) < SHORT_QUERY:
+            return self.prefix_postings.get(word, ())
+        return min((self.trigram_postings.get(gram, ()) for gram in trigrams(word)), key=len)
+
+    def word_matches(self, word, within=None):
+        postings = self.postings(word)
+        # prefixes and single trigrams are exact until an entry's text changes or it is removed;
+        # longer words only narrow the candidates down, so their text has to be checked anyway
+        exact = len(word) <= SHORT_QUERY and not self.stale
+        # once earlier words have narrowed the candidates, checking their text is cheaper than the postings
+        if within is not None and len(within) * (4 if exact else 1) <= len(postings):
+            return self.containing(word, within)
+        matches = set(postings)
+        if within is not None:
+            matches &= within
+        if matches and not exact:
+            matches = self.containing(word, matches)
+        return matches
+
+    def containing(self, word, entry_ids):
+        texts = self.texts
+        if len(word) < SHORT_QUERY:
+            word = " " + word
+            return {entry_id for entry_id in entry_ids if word in " " + texts.get(entry_id, "")}
+        return {entry_id for entry_id in entry_ids if word in texts.get(entry_id, "")}
+
+    def refines(self, words):
+        if self.last_words is None or self.last_version != self.version or len(words) < len(self.last_words):
+            return False
+        for old, new in zip(self.last_words, words):
+            if len(old) >= SHORT_QUERY:
+                if old not in new:
+                    return False
+            elif len(new) >= SHORT_QUERY or not new.startswith(old):
+                return False
+        return True
+
+    def search(self, query):
+        # only entries indexed so far can match; the rest are checked with matching() once drained
+        words = normalize(query).split()
+        if not words:
+            self.last_words = None
+            return None
+        # typing more of the same query can only narrow the previous matches
+        matches = self.last_matches if self.refines(words) else None
+        for word in sorted(words, key=lambda word: len(self.postings(word))):
+            matches = self.word_matches(word, matches)
+            if not matches:
+                break
+        self.last_words = words
+        self.last_matches = matches
+        self.last_version = self.version
+        return matches
+
+    def matching(self, query, entry_ids):
+        matches = set(entry_ids)
+        for word in normalize(query).split():
+            matches = self.containing(word, matches)
+        return matches
@@ -0,0 +1,42 @@
+from PyQt6.QtCore import QObject, QTimer
+
+
+class SeekController(QObject):
+    def __init__(self, seek, interval_ms=120, parent=None):
+        super().__init__(parent)
+        self.seek = seek
+        self.pending = None
+        self.last_position = None
+        self.requests = 0
+        self.seeks_issued = 0
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.flush)
+
+    def request(self, position):
+        self.requests += 1
+        if self.timer.isActive():
+            self.pending = position
+            return
+        self.send(position)
+        self.timer.start()
+
+    def flush(self):
+        if self.pending is not None:
+            self.send(self.pending)
+            self.timer.start()
+
+    def release(self, position):
+        self.timer.stop()
+        self.pending = None
+        self.last_position = None
+        self.send(position)
+
+    def send(self, position):
+        self.pending = None
+        if position == self.last_position:
+            return
+        self.last_position = position
+        self.seeks_issued += 1
+        self.seek(position)
@@ -0,0 +1,125 @@
+import bisect, random
+
+
+class ShuffleOrder:
+    def __init__(self, size=0, seed=None):
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.order = []
+        self.position = []
+        self.cursor = -1
+        self.pending_order = None
+        self.reset(size)
+
+    def __len__(self):
+        return len(self.order)
+
+    def reset(self, size, first=None):
+        self.order = list(range(size))
+        self.random.shuffle(self.order)
+        self.rebuild_positions()
+        self.cursor = -1
+        self.pending_order = None
+        if first is not None and 0 <= first < size:
+            self.swap(0, self.position[first])
+            self.cursor = 0
+
+    def reseed(self, seed):
+        self.seed = seed
+        self.random = random.Random(seed)
+
+    def rebuild_positions(self):
+        self.position = [0] * len(self.order)
+        for pos, index in enumerate(self.order):
+            self.position[index] = pos
+
+    def swap(self, a, b):
+        order = self.order
+        order[a], order[b] = order[b], order[a]
+        self.position[order[a]] = a
+        self.position[order[b]] = b
+
+    def current(self):
+        if 0 <= self.cursor < len(self.order):
+            return self.order[self.cursor]
+        return None
+
+    def seek(self, index):
+        if not 0 <= index < len(self.position):
+            return
+        pos = self.position[index]
+        self.pending_order = None
+        if pos > self.cursor:
+            self.cursor += 1
+            self.swap(self.cursor, pos)
+        else:
+            self.cursor = pos
+
+    def upcoming_cycle(self):
+        # the next cycle is drawn once and kept aside, so peeking past the end leaves this one intact
+        if self.pending_order is None:
+            order = self.order[:]
+            self.random.shuffle(order)
+            avoid = self.current()
+            if avoid is not None and len(order) > 1 and order[0] == avoid:
+                other = self.random.randrange(1, len(order))
+                order[0], order[other] = order[other], order[0]
+            self.pending_order = order
+        return self.pending_order
+
+    def peek_next(self, wrap=False):
+        if self.cursor + 1 < len(self.order):
+            return self.order[self.cursor + 1]
+        if wrap and self.order:
+            return self.upcoming_cycle()[0]
+        return None
+
+    def upcoming(self, wrap=False):
+        # the tracks next() would return in turn, without moving the cursor
+        for pos in range(self.cursor + 1, len(self.order)):
+            yield self.order[pos]
+        if wrap and self.order:
+            yield from self.upcoming_cycle()
+
+    def next(self, wrap=False):
+        if self.cursor + 1 < len(self.order):
+            self.cursor += 1
+            return self.order[self.cursor]
+        if wrap and self.order:
+            self.order = self.upcoming_cycle()
+            self.pending_order = None
+            self.rebuild_positions()
+            self.cursor = 0
+            return self.order[0]
+        return None
+
+    def prev(self, wrap=False):
+        if self.cursor > 0:
+            self.cursor -= 1
+            return self.order[self.cursor]
+        if wrap and self.order:
+            self.cursor = len(self.order) - 1
+            return self.order[self.cursor]
+        return None
+
+    def remove(self, rows):
+        if not rows:
+            return
+        removed = set(rows)
+        rows = sorted(removed)
+        self.pending_order = None
+        played = sum(1 for pos in range(self.cursor + 1) if self.order[pos] in removed)
+        # surviving tracks shift down by the number of removed tracks that sat before them
+        self.order = [index - bisect.bisect_left(rows, index) for index in self.order if index not in removed]
+        self.cursor -= played
+        self.rebuild_positions()
+
+    def insert(self, indices):
+        self.pending_order = None
+        for index in indices:
+            if index != len(self.position):
+                raise ValueError(f"Shuffle order expects track {len(self.position)}, got {index}")
+            self.order.append(index)
+            self.position.append(len(self.order) - 1)
+            # draw the new track's slot from the part of the order that hasn't been played yet
+            self.swap(len(self.order) - 1, self.random.randint(self.cursor + 1, len(self.order) - 1))
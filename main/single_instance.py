@@ -0,0 +1,207 @@
+import getpass, json, os, socket, stat, sys, tempfile
+
+# kept free of Qt imports at module level so a forwarding launch exits before PyQt6 is loaded
+
+SERVER_NAME = f"neon-media-player-{getpass.getuser()}"
+CONNECT_TIMEOUT = 0.5
+REPLY_TIMEOUT = 2.0
+
+COMMANDS = ("open", "enqueue", "play", "pause", "toggle", "stop", "next", "prev", "seek", "status", "raise")
+
+
+def check_private(directory):
+    # anyone can create a directory in the shared temp directory first; one that is not a real
+    # directory owned by this user and closed to everyone else could hold another user's socket
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"runtime directory {directory} is not private to this user")
+    return directory
+
+
+def runtime_dir():
+    # where QStandardPaths.RuntimeLocation points, worked out without loading Qt, and held to
+    # the same ownership checks
+    directory = os.environ.get("XDG_RUNTIME_DIR")
+    if directory and os.path.isdir(directory):
+        try:
+            return check_private(directory)
+        except OSError:
+            pass
+    if sys.platform == "darwin":
+        return tempfile.gettempdir()
+    directory = os.path.join(tempfile.gettempdir(), f"runtime-{getpass.getuser()}")
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    return check_private(directory)
+
+
+def server_name():
+    # a full path makes Qt bind exactly this Unix socket, which plain Python can then reach
+    if os.name == "nt":
+        return SERVER_NAME
+    return os.path.join(runtime_dir(), f"{SERVER_NAME}.sock")
+
+
+def encode(message):
+    return (json.dumps(message) + "\n").encode("utf-8")
+
+
+def send_unix(messages, timeout):
+    replies = []
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(CONNECT_TIMEOUT)
+        client.connect(server_name())
+        client.settimeout(timeout)
+        stream = client.makefile("rb")
+        for message in messages:
+            client.sendall(encode(message))
+            line = stream.readline()
+            if not line:
+                raise ConnectionError("instance closed the connection")
+            replies.append(json.loads(line))
+    return replies
+
+
+def send_local_socket(messages, timeout):
+    from PyQt6.QtNetwork import QLocalSocket
+
+    client = QLocalSocket()
+    client.connectToServer(server_name())
+    if not client.waitForConnected(int(CONNECT_TIMEOUT * 1000)):
+        raise ConnectionError(client.errorString())
+    replies = []
+    for message in messages:
+        client.write(encode(message))
+        client.flush()
+        while not client.canReadLine():
+            if not client.waitForReadyRead(int(timeout * 1000)):
+                raise ConnectionError(client.errorString())
+        replies.append(json.loads(bytes(client.readLine())))
+    client.disconnectFromServer()
+    return replies
+
+
+def send(messages, timeout=REPLY_TIMEOUT):
+    if hasattr(socket, "AF_UNIX") and os.name != "nt":
+        return send_unix(messages, timeout)
+    return send_local_socket(messages, timeout)
+
+
+def launch_commands(args):
+    paths = [os.path.abspath(arg) for arg in args if not arg.startswith("-")]
+    if paths:
+        return [{"command": "open", "paths": paths}]
+    return [{"command": "raise"}]
+
+
+def forward_to_running_instance(args):
+    if "--new-instance" in args:
+        return False
+    try:
+        send(launch_commands(args))
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+def parse_command(args):
+    name = args[0]
+    if name not in COMMANDS:
+        raise ValueError(f"unknown command: {name}")
+    message = {"command": name}
+    if name in ("open", "enqueue"):
+        message["paths"] = [os.path.abspath(arg) for arg in args[1:]]
+    elif name == "seek":
+        if len(args) != 2:
+            raise ValueError("seek takes a position in seconds")
+        message["position_ms"] = int(float(args[1]) * 1000)
+    return message
+
+
+class SingleInstanceServer:
+    def __init__(self, handler, parent=None):
+        from PyQt6.QtNetwork import QLocalServer
+
+        self.handler = handler
+        self.server = QLocalServer(parent)
+        self.server.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+        self.server.newConnection.connect(self.on_new_connection)
+        self.buffers = {}
+
+    def listen(self):
+        from PyQt6.QtNetwork import QLocalServer
+
+        try:
+            name = server_name()
+        except OSError as e:
+            print(f"Single-instance server unavailable: {e}")
+            return False
+        if self.server.listen(name):
+            return True
+        # a crashed instance leaves its socket behind; only reclaim it when nobody answers
+        try:
+            send([{"command": "status"}])
+            print(f"Single-instance server unavailable: another instance is listening on {name}")
+            return False
+        except (OSError, ValueError):
+            QLocalServer.removeServer(name)
+        if self.server.listen(name):
+            return True
+        print(f"Single-instance server unavailable: {self.server.errorString()}")
+        return False
+
+    def close(self):
+        self.server.close()
+
+    def on_new_connection(self):
+        while self.server.hasPendingConnections():
+            connection = self.server.nextPendingConnection()
+            self.buffers[connection] = b""
+            connection.readyRead.connect(lambda connection=connection: self.on_ready_read(connection))
+            connection.disconnected.connect(lambda connection=connection: self.on_disconnected(connection))
+
+    def on_disconnected(self, connection):
+        self.buffers.pop(connection, None)
+        connection.deleteLater()
+
+    def on_ready_read(self, connection):
+        data = self.buffers.get(connection, b"") + bytes(connection.readAll())
+        *lines, self.buffers[connection] = data.split(b"\n")
+        for line in lines:
+            if line.strip():
+                connection.write(encode(self.dispatch(line)))
+        connection.flush()
+
+    def dispatch(self, line):
+        try:
+            message = json.loads(line)
+        except ValueError as e:
+            return {"ok": False, "error": f"invalid JSON: {e}"}
+        if not isinstance(message, dict) or message.get("command") not in COMMANDS:
+            return {"ok": False, "error": "unknown command"}
+        try:
+            return self.handler(message)
+        except Exception as e:
+            print(f"Remote command failed: {message} - {e}")
+            return {"ok": False, "error": str(e)}
+
+
+def main(args):
+    if not args:
+        print(f"usage: single_instance.py {{{'|'.join(COMMANDS)}}} [paths or seconds]")
+        return 2
+    try:
+        message = parse_command(args)
+    except ValueError as e:
+        print(e)
+        return 2
+    try:
+        reply, = send([message])
+    except (OSError, ValueError) as e:
+        print(f"No running instance: {e}")
+        return 1
+    print(json.dumps(reply))
+    return 0 if reply.get("ok") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
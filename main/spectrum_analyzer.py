@@ -0,0 +1,163 @@
+import numpy as np
+
+from PyQt6.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+from PyQt6.QtMultimedia import QAudioFormat
+
+try:
+    from PyQt6.QtMultimedia import QAudioBufferOutput
+except ImportError:
+    QAudioBufferOutput = None
+
+SAMPLE_DTYPES = {
+    QAudioFormat.SampleFormat.UInt8: np.uint8,
+    QAudioFormat.SampleFormat.Int16: np.int16,
+    QAudioFormat.SampleFormat.Int32: np.int32,
+    QAudioFormat.SampleFormat.Float: np.float32,
+}
+
+
+class SpectrumAnalyzer(QObject):
+    spectrum_ready = pyqtSignal(object)
+
+    def __init__(self, bar_count=32, fft_size=2048, min_freq=40.0, max_freq=16000.0,
+                 floor_db=-70.0, attack=0.6, decay=0.15):
+        super().__init__()
+        self.bar_count = bar_count
+        self.fft_size = fft_size
+        self.min_freq = min_freq
+        self.max_freq = max_freq
+        self.floor_db = floor_db
+        self.attack = attack
+        self.decay = decay
+        self.window = np.hanning(fft_size).astype(np.float32)
+        self.window_gain = self.window.sum() / 2
+        self.samples = np.zeros(fft_size, dtype=np.float32)
+        self.levels = np.zeros(bar_count, dtype=np.float32)
+        self.sample_rate = 0
+        self.band_starts = None
+
+    def build_bands(self, sample_rate):
+        self.sample_rate = sample_rate
+        nyquist = sample_rate / 2
+        bin_count = self.fft_size // 2 + 1
+        max_freq = min(self.max_freq, nyquist)
+        edges = np.geomspace(self.min_freq, max_freq, self.bar_count + 1)
+        bins = np.round(edges * self.fft_size / sample_rate).astype(np.int64)
+        bins = np.clip(bins, 1, bin_count - 1)
+        # every band needs at least one FFT bin, even where low bands are narrower than a bin
+        for i in range(1, len(bins)):
+            bins[i] = max(bins[i], bins[i - 1] + 1)
+        self.band_starts = np.minimum(bins[:-1], bin_count - 1)
+
+    @pyqtSlot(int)
+    def set_bar_count(self, bar_count):
+        self.bar_count = bar_count
+        self.levels = np.zeros(bar_count, dtype=np.float32)
+        self.band_starts = None
+
+    @pyqtSlot()
+    def reset(self):
+        self.samples[:] = 0
+        self.levels[:] = 0
+        self.spectrum_ready.emit(self.levels.copy())
+
+    @pyqtSlot(bytes, str, int, int)
+    def process(self, raw, dtype, channels, sample_rate):
+        data = np.frombuffer(raw, dtype=dtype)
+        if data.dtype == np.uint8:
+            data = (data.astype(np.float32) - 128) / 128
+        elif data.dtype.kind == "i":
+            data = data.astype(np.float32) / np.iinfo(data.dtype).max
+        else:
+            data = data.astype(np.float32, copy=False)
+        if channels > 1:
+            data = data[:len(data) - len(data) % channels].reshape(-1, channels).mean(axis=1)
+        if not len(data):
+            return
+
+        if sample_rate != self.sample_rate or self.band_starts is None:
+            self.build_bands(sample_rate)
+
+        if len(data) >= self.fft_size:
+            self.samples[:] = data[-self.fft_size:]
+        else:
+            self.samples = np.roll(self.samples, -len(data))
+            self.samples[-len(data):] = data
+
+        magnitudes = np.abs(np.fft.rfft(self.samples * self.window)) / self.window_gain
+        bands = np.maximum.reduceat(magnitudes, self.band_starts)
+        db = 20 * np.log10(np.maximum(bands, 1e-9))
+        target = np.clip((db - self.floor_db) / -self.floor_db, 0.0, 1.0).astype(np.float32)
+
+        rate = np.where(target > self.levels, self.attack, self.decay)
+        self.levels += (target - self.levels) * rate
+        self.spectrum_ready.emit(self.levels.copy())
+
+
+class AudioSpectrumSource(QObject):
+    spectrum_ready = pyqtSignal(object)
+    samples_ready = pyqtSignal(bytes, str, int, int)
+    reset_requested = pyqtSignal()
+
+    def __init__(self, bar_count=32, parent=None):
+        super().__init__(parent)
+        self.player = None
+        self.enabled = False
+        self.buffer_output = None
+
+        self.thread = QThread(self)
+        self.analyzer = SpectrumAnalyzer(bar_count)
+        self.analyzer.moveToThread(self.thread)
+        self.samples_ready.connect(self.analyzer.process)
+        self.reset_requested.connect(self.analyzer.reset)
+        self.analyzer.spectrum_ready.connect(self.spectrum_ready)
+        self.thread.finished.connect(self.analyzer.deleteLater)
+
+        if QAudioBufferOutput is not None:
+            audio_format = QAudioFormat()
+            audio_format.setSampleFormat(QAudioFormat.SampleFormat.Float)
+            audio_format.setChannelCount(1)
+            audio_format.setSampleRate(44100)
+            self.buffer_output = QAudioBufferOutput(audio_format, self)
+            self.buffer_output.audioBufferReceived.connect(self.on_audio_buffer)
+
+    def start(self):
+        # buffers sent before this wait in the analyzer thread's event queue
+        if not self.thread.isRunning():
+            self.thread.start()
+
+    def is_available(self):
+        return self.buffer_output is not None
+
+    def attach(self, player):
+        if self.player is not None and self.buffer_output is not None:
+            self.player.setAudioBufferOutput(None)
+        self.player = player
+        self.update_attachment()
+
+    def set_enabled(self, enabled):
+        if enabled == self.enabled:
+            return
+        self.enabled = enabled
+        self.update_attachment()
+        if not enabled:
+            self.reset_requested.emit()
+
+    def update_attachment(self):
+        if self.player is None or self.buffer_output is None:
+            return
+        self.player.setAudioBufferOutput(self.buffer_output if self.enabled else None)
+
+    def on_audio_buffer(self, buffer):
+        if not self.enabled or not buffer.isValid():
+            return
+        audio_format = buffer.format()
+        dtype = SAMPLE_DTYPES.get(audio_format.sampleFormat())
+        if dtype is None:
+            return
+        raw = buffer.constData().asstring(buffer.byteCount())
+        self.samples_ready.emit(raw, np.dtype(dtype).str, audio_format.channelCount(), audio_format.sampleRate())
+
+    def shutdown(self):
+        self.thread.quit()
+        self.thread.wait()
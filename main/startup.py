@@ -0,0 +1,38 @@
+import os, time
+
+STARTED = time.perf_counter()
+
+PHASES = ("import", "construct", "first paint", "interactive", "first audio")
+
+
+class StartupTimeline:
+    def __init__(self, budget_ms=None, started=STARTED):
+        self.started = started
+        if budget_ms is None:
+            budget_ms = float(os.environ.get("NEON_STARTUP_BUDGET_MS", 1000))
+        self.budget_ms = budget_ms
+        # the summary is only printed when asked for
+        self.profile = bool(os.environ.get("NEON_PROFILE_STARTUP"))
+        self.marks = {}
+
+    def mark(self, phase):
+        if phase in self.marks:
+            return None
+        elapsed = (time.perf_counter() - self.started) * 1000
+        self.marks[phase] = elapsed
+        return elapsed
+
+    def over_budget(self):
+        interactive = self.marks.get("interactive")
+        return interactive is not None and interactive > self.budget_ms
+
+    def summary(self):
+        parts = []
+        previous = 0.0
+        for phase in PHASES:
+            if phase in self.marks:
+                elapsed = self.marks[phase]
+                parts.append(f"{phase} {elapsed:.0f} ms (+{elapsed - previous:.0f})")
+                previous = elapsed
+        status = "over" if self.over_budget() else "within"
+        return f"Startup: {', '.join(parts)}; {status} {self.budget_ms:.0f} ms budget"
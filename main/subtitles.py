@@ -0,0 +1,185 @@
+import bisect, codecs, html, os, re, sys
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+SUBTITLE_EXTENSIONS = (".srt", ".vtt", ".ass", ".ssa")
+SNIFF_BYTES = 64 * 1024
+TIMING = re.compile(r"(?:(\d+):)?(\d{1,2}):(\d{1,2})[,.](\d{1,3})\s*-->\s*(?:(\d+):)?(\d{1,2}):(\d{1,2})[,.](\d{1,3})")
+MARKUP = re.compile(r"<[^>]*>|\{\\[^}]*\}")
+ASS_OVERRIDE = re.compile(r"\{[^}]*\}")
+ASS_DRAWING = re.compile(r"\\p[1-9]")
+ASS_FIELDS = ["layer", "start", "end", "style", "name", "marginl", "marginr", "marginv", "effect", "text"]
+
+
+def open_subtitles(path):
+    # sidecar files are often in a legacy code page rather than UTF-8, so sniff the start first
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+    if head.startswith((b"\xff\xfe", b"\xfe\xff")):
+        encoding = "utf-16"
+    else:
+        try:
+            # a character cut off by the end of the sample is not a reason to give up on UTF-8
+            codecs.getincrementaldecoder("utf-8")().decode(head, final=len(head) < SNIFF_BYTES)
+            encoding = "utf-8-sig"
+        except UnicodeDecodeError:
+            encoding = "cp1252"
+    return open(path, encoding=encoding, errors="replace", newline=None)
+
+
+def timestamp_ms(hours, minutes, seconds, fraction):
+    return ((int(hours or 0) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(fraction.ljust(3, "0"))
+
+
+def iter_timed_blocks(f, unescape):
+    # SRT and WebVTT share the layout: a timing line, text lines, then a blank line;
+    # anything before the timing line (cue numbers, ids, WEBVTT and NOTE blocks) is skipped
+    timing = None
+    text = []
+    for line in f:
+        line = line.strip()
+        if not line:
+            if timing is not None:
+                yield timing[0], timing[1], "\n".join(text)
+            timing = None
+            text = []
+        elif timing is None:
+            match = TIMING.match(line)
+            if match:
+                timing = (timestamp_ms(*match.group(1, 2, 3, 4)), timestamp_ms(*match.group(5, 6, 7, 8)))
+        else:
+            line = MARKUP.sub("", line)
+            text.append(html.unescape(line) if unescape else line)
+    if timing is not None:
+        yield timing[0], timing[1], "\n".join(text)
+
+
+def iter_srt(f):
+    return iter_timed_blocks(f, unescape=False)
+
+
+def iter_vtt(f):
+    return iter_timed_blocks(f, unescape=True)
+
+
+def ass_time_ms(value):
+    hours, minutes, seconds = value.strip().split(":")
+    whole, _, fraction = seconds.partition(".")
+    return timestamp_ms(hours, minutes, whole, fraction[:3])
+
+
+def iter_ass(f):
+    in_events = False
+    fields = ASS_FIELDS
+    for line in f:
+        line = line.strip()
+        if line.startswith("["):
+            in_events = line.lower() == "[events]"
+            continue
+        key, sep, value = line.partition(":")
+        if not in_events or not sep:
+            continue
+        key = key.strip().lower()
+        if key == "format":
+            fields = [name.strip().lower() for name in value.split(",")]
+        elif key == "dialogue":
+            # the text is the last field and may itself contain commas
+            row = dict(zip(fields, value.strip().split(",", len(fields) - 1)))
+            text = row.get("text", "")
+            if ASS_DRAWING.search(text):
+                continue
+            try:
+                start, end = ass_time_ms(row["start"]), ass_time_ms(row["end"])
+            except (KeyError, ValueError):
+                continue
+            text = ASS_OVERRIDE.sub("", text).replace("\\N", "\n").replace("\\n", "\n").replace("\\h", " ")
+            yield start, end, text.strip()
+
+
+READERS = {
+    ".srt": iter_srt,
+    ".vtt": iter_vtt,
+    ".ass": iter_ass,
+    ".ssa": iter_ass,
+}
+
+
+def iter_cues(path):
+    reader = READERS.get(os.path.splitext(path)[1].lower())
+    if reader is None:
+        raise ValueError(f"unsupported subtitle format: {path}")
+    with open_subtitles(path) as f:
+        for start, end, text in reader(f):
+            if end > start and text:
+                yield start, end, text
+
+
+def find_sidecar(media_path):
+    # "movie.srt" wins over "movie.en.srt"; SRT wins over the formats whose styling is dropped anyway
+    directory, name = os.path.split(media_path)
+    stem = os.path.splitext(name)[0].lower()
+    candidates = []
+    try:
+        with os.scandir(directory or os.curdir) as it:
+            for entry in it:
+                base, ext = os.path.splitext(entry.name.lower())
+                if ext in READERS and (base == stem or base.startswith(stem + ".")) and entry.is_file():
+                    candidates.append((base != stem, SUBTITLE_EXTENSIONS.index(ext), entry.name, entry.path))
+    except OSError:
+        return None
+    return min(candidates)[3] if candidates else None
+
+
+class SubtitleTrack:
+    def __init__(self, cues):
+        cues = sorted(cues)
+        # the timeline is cut at every cue start and end; between two cuts the set of active
+        # cues cannot change, so each piece stores its finished text once
+        self.bounds = sorted({time for start, end, _ in cues for time in (start, end)})
+        self.texts = []
+        active = []
+        next_cue = 0
+        for time in self.bounds:
+            active = [cue for cue in active if cue[1] > time]
+            while next_cue < len(cues) and cues[next_cue][0] == time:
+                active.append(cues[next_cue])
+                next_cue += 1
+            self.texts.append("\n".join(cue[2] for cue in active))
+        self.cue_count = len(cues)
+
+    def __len__(self):
+        return self.cue_count
+
+    def segment_at(self, position_ms):
+        # returns the text shown at the position and the span [start, end) it stays valid for
+        piece = bisect.bisect_right(self.bounds, position_ms) - 1
+        start = self.bounds[piece] if piece >= 0 else -sys.maxsize
+        end = self.bounds[piece + 1] if piece + 1 < len(self.bounds) else sys.maxsize
+        return (self.texts[piece] if piece >= 0 else ""), start, end
+
+
+class SubtitleLoader(QThread):
+    loaded = pyqtSignal(str, object)
+
+    def __init__(self, media_path, parent=None):
+        super().__init__(parent)
+        self.media_path = media_path
+
+    def cancel(self):
+        self.requestInterruption()
+
+    def run(self):
+        path = find_sidecar(self.media_path)
+        if path is None:
+            return
+        cues = []
+        try:
+            for cue in iter_cues(path):
+                if self.isInterruptionRequested():
+                    return
+                cues.append(cue)
+        except (OSError, ValueError) as e:
+            print(f"Subtitle load error: {path} - {e}")
+            return
+        print(f"Subtitles: {os.path.basename(path)} ({len(cues)} cues)")
+        self.loaded.emit(self.media_path, SubtitleTrack(cues))
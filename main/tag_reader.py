@@ -0,0 +1,380 @@
+import base64, binascii, os, struct
+
+MP3_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MP3_SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 2.5: [11025, 12000, 8000]}
+
+ID3_FRAMES = {
+    "TIT2": "title", "TPE1": "artist", "TALB": "album",
+    "TT2": "title", "TP1": "artist", "TAL": "album",
+}
+VORBIS_FIELDS = {"TITLE": "title", "ARTIST": "artist", "ALBUM": "album"}
+MP4_FIELDS = {b"\xa9nam": "title", b"\xa9ART": "artist", b"\xa9alb": "album"}
+RIFF_FIELDS = {b"INAM": "title", b"IART": "artist", b"IPRD": "album"}
+MP4_CONTAINERS = {b"moov", b"udta", b"trak", b"mdia", b"minf", b"stbl", b"ilst"}
+# real files nest a handful of levels; anything deeper is corrupt or crafted
+MP4_MAX_DEPTH = 16
+FRONT_COVER = 3
+
+
+def read_tags(path):
+    extension = os.path.splitext(path)[1].lower()
+    reader = READERS.get(extension)
+    tags = {"codec": extension.lstrip(".")}
+    if reader is None:
+        return tags
+    try:
+        with open(path, "rb") as f:
+            reader(f, os.fstat(f.fileno()).st_size, tags)
+    except (OSError, struct.error, ValueError, IndexError) as e:
+        print(f"Tag read error: {path} - {e}")
+    return {key: value for key, value in tags.items() if value not in (None, "")}
+
+
+def read_cover_art(path):
+    reader = READERS.get(os.path.splitext(path)[1].lower())
+    if reader is None:
+        return None
+    pictures = []
+    try:
+        with open(path, "rb") as f:
+            reader(f, os.fstat(f.fileno()).st_size, {}, pictures)
+    except (OSError, struct.error, ValueError, IndexError) as e:
+        print(f"Cover art read error: {path} - {e}")
+    # (picture type, image bytes); the front cover wins over whatever else is embedded
+    for picture_type, data in pictures:
+        if picture_type == FRONT_COVER:
+            return data
+    return pictures[0][1] if pictures else None
+
+
+def decode_text(data, encoding):
+    if encoding == 0:
+        text = data.decode("latin-1")
+    elif encoding == 1:
+        text = data.decode("utf-16", errors="replace")
+    elif encoding == 2:
+        text = data.decode("utf-16-be", errors="replace")
+    else:
+        text = data.decode("utf-8", errors="replace")
+    return text.split("\x00")[0].strip()
+
+
+def syncsafe(data):
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+
+def parse_id3_picture(data, version):
+    encoding = data[0]
+    if version == 2:
+        pos = 4
+    else:
+        pos = data.index(b"\x00", 1) + 1
+    picture_type = data[pos]
+    pos += 1
+    # the description ends with a terminator as wide as its encoding
+    terminator = b"\x00\x00" if encoding in (1, 2) else b"\x00"
+    end = data.find(terminator, pos)
+    while terminator == b"\x00\x00" and end >= 0 and (end - pos) % 2:
+        end = data.find(terminator, end + 1)
+    if end < 0:
+        raise ValueError("unterminated picture description")
+    return picture_type, data[end + len(terminator):]
+
+
+def read_id3v2(f, tags, pictures=None):
+    header = f.read(10)
+    if len(header) < 10 or header[:3] != b"ID3":
+        f.seek(0)
+        return 0
+    version = header[3]
+    tag_size = syncsafe(header[6:10])
+    body = f.read(tag_size)
+    pos = 0
+    id_size, header_size = (3, 6) if version == 2 else (4, 10)
+    if version >= 3 and header[5] & 0x40:
+        extended = syncsafe(body[:4]) if version == 4 else struct.unpack(">I", body[:4])[0] + 4
+        pos = extended
+    while pos + header_size <= len(body):
+        frame_id = body[pos:pos + id_size]
+        if not frame_id.strip(b"\x00"):
+            break
+        if version == 2:
+            size = int.from_bytes(body[pos + 3:pos + 6], "big")
+        elif version == 4:
+            size = syncsafe(body[pos + 4:pos + 8])
+        else:
+            size = struct.unpack(">I", body[pos + 4:pos + 8])[0]
+        data = body[pos + header_size:pos + header_size + size]
+        key = ID3_FRAMES.get(frame_id.decode("latin-1"))
+        if key and data and not tags.get(key):
+            tags[key] = decode_text(data[1:], data[0])
+        elif pictures is not None and frame_id in (b"APIC", b"PIC") and data:
+            pictures.append(parse_id3_picture(data, version))
+        pos += header_size + size
+    return 10 + tag_size
+
+
+def read_id3v1(f, file_size, tags):
+    if file_size < 128:
+        return
+    f.seek(file_size - 128)
+    data = f.read(128)
+    if data[:3] != b"TAG":
+        return
+    for key, start, end in (("title", 3, 33), ("artist", 33, 63), ("album", 63, 93)):
+        if not tags.get(key):
+            tags[key] = data[start:end].split(b"\x00")[0].decode("latin-1").strip()
+
+
+def read_mp3(f, file_size, tags, pictures=None):
+    audio_start = read_id3v2(f, tags, pictures)
+    if pictures is not None:
+        return
+    f.seek(audio_start)
+    data = f.read(64 * 1024)
+    read_id3v1(f, file_size, tags)
+    tags["codec"] = "mp3"
+
+    for i in range(len(data) - 4):
+        if data[i] != 0xFF or data[i + 1] & 0xE0 != 0xE0:
+            continue
+        version_bits = (data[i + 1] >> 3) & 3
+        layer_bits = (data[i + 1] >> 1) & 3
+        bitrate_index = data[i + 2] >> 4
+        rate_index = (data[i + 2] >> 2) & 3
+        if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+            continue
+        version = {3: 1, 2: 2, 0: 2.5}[version_bits]
+        layer = 4 - layer_bits
+        sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+        bitrate = MP3_BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+        samples_per_frame = 384 if layer == 1 else 1152 if version == 1 or layer == 2 else 576
+        mono = (data[i + 3] >> 6) == 3
+        side_info = (17 if mono else 32) if version == 1 else (9 if mono else 17)
+
+        xing = i + 4 + side_info
+        if data[xing:xing + 4] in (b"Xing", b"Info") and data[xing + 7] & 1:
+            frames = struct.unpack(">I", data[xing + 8:xing + 12])[0]
+            tags["duration_ms"] = frames * samples_per_frame * 1000 // sample_rate
+        elif data[i + 36:i + 40] == b"VBRI":
+            frames = struct.unpack(">I", data[i + 50:i + 54])[0]
+            tags["duration_ms"] = frames * samples_per_frame * 1000 // sample_rate
+        elif bitrate:
+            tags["duration_ms"] = (file_size - audio_start - i) * 8 * 1000 // bitrate
+        return
+
+
+def parse_flac_picture(data):
+    picture_type, mime_length = struct.unpack(">II", data[:8])
+    pos = 8 + mime_length
+    description_length = struct.unpack(">I", data[pos:pos + 4])[0]
+    pos += 4 + description_length + 16
+    length = struct.unpack(">I", data[pos:pos + 4])[0]
+    return picture_type, data[pos + 4:pos + 4 + length]
+
+
+def parse_vorbis_comment(data, tags, pictures=None):
+    vendor_length = struct.unpack("<I", data[:4])[0]
+    pos = 4 + vendor_length
+    count = struct.unpack("<I", data[pos:pos + 4])[0]
+    pos += 4
+    for _ in range(count):
+        length = struct.unpack("<I", data[pos:pos + 4])[0]
+        comment = data[pos + 4:pos + 4 + length].decode("utf-8", errors="replace")
+        pos += 4 + length
+        name, _, value = comment.partition("=")
+        key = VORBIS_FIELDS.get(name.upper())
+        if key and not tags.get(key):
+            tags[key] = value.strip()
+        elif pictures is not None and name.upper() == "METADATA_BLOCK_PICTURE":
+            try:
+                pictures.append(parse_flac_picture(base64.b64decode(value)))
+            except binascii.Error:
+                pass
+
+
+def read_flac(f, file_size, tags, pictures=None):
+    audio_start = read_id3v2(f, tags, pictures)
+    f.seek(audio_start)
+    if f.read(4) != b"fLaC":
+        return
+    tags["codec"] = "flac"
+    last = False
+    while not last:
+        header = f.read(4)
+        if len(header) < 4:
+            break
+        last = bool(header[0] & 0x80)
+        block_type = header[0] & 0x7F
+        length = int.from_bytes(header[1:4], "big")
+        if block_type == 0:
+            data = f.read(length)
+            sample_rate = int.from_bytes(data[10:13], "big") >> 4
+            total_samples = int.from_bytes(data[13:18], "big") & 0xFFFFFFFFF
+            if sample_rate:
+                tags["duration_ms"] = total_samples * 1000 // sample_rate
+        elif block_type == 4:
+            parse_vorbis_comment(f.read(length), tags, pictures)
+        elif block_type == 6 and pictures is not None:
+            pictures.append(parse_flac_picture(f.read(length)))
+        else:
+            f.seek(length, os.SEEK_CUR)
+
+
+def ogg_packets(data):
+    pos = 0
+    packet = b""
+    while pos + 27 <= len(data) and data[pos:pos + 4] == b"OggS":
+        segment_count = data[pos + 26]
+        table = data[pos + 27:pos + 27 + segment_count]
+        pos += 27 + segment_count
+        for lacing in table:
+            packet += data[pos:pos + lacing]
+            pos += lacing
+            if lacing < 255:
+                yield packet
+                packet = b""
+
+
+def read_ogg(f, file_size, tags, pictures=None):
+    # embedded pictures make the comment header span many pages
+    data = f.read(256 * 1024 if pictures is None else 16 * 1024 * 1024)
+    sample_rate = 0
+    for packet in ogg_packets(data):
+        if packet.startswith(b"\x01vorbis"):
+            tags["codec"] = "vorbis"
+            sample_rate = struct.unpack("<I", packet[12:16])[0]
+        elif packet.startswith(b"OpusHead"):
+            tags["codec"] = "opus"
+            sample_rate = 48000
+        elif packet.startswith(b"\x03vorbis"):
+            parse_vorbis_comment(packet[7:], tags, pictures)
+            break
+        elif packet.startswith(b"OpusTags"):
+            parse_vorbis_comment(packet[8:], tags, pictures)
+            break
+    if pictures is not None:
+        return
+
+    f.seek(max(0, file_size - 64 * 1024))
+    tail = f.read()
+    last_page = tail.rfind(b"OggS")
+    if sample_rate and last_page >= 0 and last_page + 14 <= len(tail):
+        granule = struct.unpack("<q", tail[last_page + 6:last_page + 14])[0]
+        if granule > 0:
+            tags["duration_ms"] = granule * 1000 // sample_rate
+
+
+def mp4_atoms(f, start, end):
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, kind = struct.unpack(">I4s", header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            size = end - pos
+        if size < header_size:
+            return
+        yield kind, pos + header_size, pos + size
+        pos += size
+
+
+def read_mp4_tree(f, start, end, tags, pictures=None, depth=0):
+    if depth > MP4_MAX_DEPTH:
+        raise ValueError("MP4 atoms nested too deeply")
+    for kind, body_start, body_end in mp4_atoms(f, start, end):
+        if kind in MP4_CONTAINERS:
+            read_mp4_tree(f, body_start, body_end, tags, pictures, depth + 1)
+        elif kind == b"meta":
+            read_mp4_tree(f, body_start + 4, body_end, tags, pictures, depth + 1)
+        elif kind == b"covr" and pictures is not None:
+            for child, data_start, data_end in mp4_atoms(f, body_start, body_end):
+                if child == b"data":
+                    f.seek(data_start + 8)
+                    pictures.append((FRONT_COVER, f.read(data_end - data_start - 8)))
+        elif kind == b"mvhd":
+            f.seek(body_start)
+            version = f.read(4)[0]
+            if version == 1:
+                f.seek(16, os.SEEK_CUR)
+                timescale, duration = struct.unpack(">IQ", f.read(12))
+            else:
+                f.seek(8, os.SEEK_CUR)
+                timescale, duration = struct.unpack(">II", f.read(8))
+            if timescale:
+                tags["duration_ms"] = duration * 1000 // timescale
+        elif kind == b"stsd" and "stream_codec" not in tags:
+            f.seek(body_start + 12)
+            tags["stream_codec"] = f.read(4).decode("latin-1").strip()
+        elif kind in MP4_FIELDS:
+            for child, data_start, data_end in mp4_atoms(f, body_start, body_end):
+                if child == b"data":
+                    f.seek(data_start + 8)
+                    tags[MP4_FIELDS[kind]] = f.read(data_end - data_start - 8).decode("utf-8", errors="replace")
+                    break
+
+
+def read_mp4(f, file_size, tags, pictures=None):
+    tags["codec"] = "mp4"
+    read_mp4_tree(f, 0, file_size, tags, pictures)
+    stream_codec = tags.pop("stream_codec", None)
+    if stream_codec:
+        tags["codec"] = stream_codec
+
+
+def read_wav(f, file_size, tags, pictures=None):
+    header = f.read(12)
+    if header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return
+    byte_rate = 0
+    while True:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            break
+        kind, size = struct.unpack("<4sI", chunk)
+        if kind == b"fmt ":
+            data = f.read(size)
+            audio_format, channels, sample_rate, byte_rate = struct.unpack("<HHII", data[:12])
+            tags["codec"] = "pcm" if audio_format in (1, 0xFFFE) else f"wav-{audio_format:#x}"
+        elif kind == b"data":
+            if byte_rate:
+                tags["duration_ms"] = size * 1000 // byte_rate
+            f.seek(size, os.SEEK_CUR)
+        elif kind == b"LIST":
+            data = f.read(size)
+            if data[:4] == b"INFO":
+                pos = 4
+                while pos + 8 <= len(data):
+                    field, length = struct.unpack("<4sI", data[pos:pos + 8])
+                    key = RIFF_FIELDS.get(field)
+                    if key:
+                        tags[key] = data[pos + 8:pos + 8 + length].split(b"\x00")[0].decode("latin-1").strip()
+                    pos += 8 + length + (length & 1)
+        else:
+            f.seek(size, os.SEEK_CUR)
+        if size & 1:
+            f.seek(1, os.SEEK_CUR)
+
+
+READERS = {
+    ".mp3": read_mp3,
+    ".flac": read_flac,
+    ".ogg": read_ogg,
+    ".mp4": read_mp4,
+    ".m4a": read_mp4,
+    ".mov": read_mp4,
+    ".wav": read_wav,
+}
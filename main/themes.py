@@ -0,0 +1,207 @@
+from string import Template
+
+from PyQt6.QtGui import QColor, QPalette
+
+THEMES = {
+    "dark": {
+        "window": "#1a1a1a", "text": "#ffffff", "panel": "#2d2d2d", "panel_border": "none",
+        "panel_radius": "10px", "button": "#3d3d3d", "button_text": "#ffffff", "button_border": "none",
+        "button_hover": "#4d4d4d", "button_hover_text": "#ffffff", "button_pressed": "#2d2d2d",
+        "button_pressed_border": "none", "groove": "#3d3d3d", "groove_height": "6px", "groove_radius": "3px",
+        "handle": "#4ecdc4", "handle_border": "none", "handle_size": "18px", "handle_margin": "-6px 0",
+        "handle_radius": "9px", "list_border": "none", "item_hover": "#3d3d3d", "item_hover_border": "none",
+        "input": "#3d3d3d", "input_border": "none", "indicator": "#3d3d3d",
+        "accent": "#4ecdc4", "accent_text": "#000000", "alert": "#ff6b6b", "alert_text": "#000000",
+    },
+    "light": {
+        "window": "#f5f5f5", "text": "#333333", "panel": "#ffffff", "panel_border": "1px solid #e0e0e0",
+        "panel_radius": "10px", "button": "#e3f2fd", "button_text": "#1976d2", "button_border": "2px solid #1976d2",
+        "button_hover": "#1976d2", "button_hover_text": "#ffffff", "button_pressed": "#1565c0",
+        "button_pressed_border": "2px solid #1565c0", "groove": "#e0e0e0", "groove_height": "6px",
+        "groove_radius": "3px", "handle": "#1976d2", "handle_border": "none", "handle_size": "18px",
+        "handle_margin": "-6px 0", "handle_radius": "9px", "list_border": "1px solid #e0e0e0",
+        "item_hover": "#e3f2fd", "item_hover_border": "none", "input": "#ffffff",
+        "input_border": "1px solid #e0e0e0", "indicator": "#e0e0e0",
+        "accent": "#1976d2", "accent_text": "#ffffff", "alert": "#e53935", "alert_text": "#ffffff",
+    },
+    "neon": {
+        "window": "#0a0a0a", "text": "#00ffff", "panel": "#1a0d1a", "panel_border": "2px solid #ff00ff",
+        "panel_radius": "15px", "button": "#2d1b2d", "button_text": "#00ffff", "button_border": "2px solid #00ffff",
+        "button_hover": "#00ffff", "button_hover_text": "#0a0a0a", "button_pressed": "#ff00ff",
+        "button_pressed_border": "2px solid #ff00ff", "groove": "#2d1b2d", "groove_height": "8px",
+        "groove_radius": "4px",
+        "handle": "qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 #ff00ff, stop:1 #00ffff)",
+        "handle_border": "2px solid #ffffff", "handle_size": "20px", "handle_margin": "-8px 0",
+        "handle_radius": "12px", "list_border": "2px solid #ff00ff", "item_hover": "#2d1b2d",
+        "item_hover_border": "1px solid #00ffff", "input": "#2d1b2d", "input_border": "2px solid #00ffff",
+        "indicator": "#2d1b2d",
+        "accent": "#ff00ff", "accent_text": "#000000", "alert": "#00ffff", "alert_text": "#0a0a0a",
+    },
+}
+
+# window and text colours come from the palette, so no rule has to match every widget
+STYLESHEET = Template("""
+QFrame {
+    background-color: $panel;
+    border: $panel_border;
+    border-radius: $panel_radius;
+    padding: 10px;
+    margin: 5px;
+}
+
+QPushButton {
+    background-color: $button;
+    color: $button_text;
+    border: $button_border;
+    border-radius: 25px;
+    padding: 10px;
+    font-weight: bold;
+}
+
+QPushButton:hover {
+    background-color: $button_hover;
+    color: $button_hover_text;
+}
+
+QPushButton:pressed {
+    background-color: $button_pressed;
+    border: $button_pressed_border;
+}
+
+QPushButton[state="on"] {
+    background-color: $accent;
+    color: $accent_text;
+}
+
+QPushButton[state="one"] {
+    background-color: $alert;
+    color: $alert_text;
+}
+
+QSlider::groove:horizontal {
+    border: none;
+    height: $groove_height;
+    background: $groove;
+    border-radius: $groove_radius;
+}
+
+QSlider::handle:horizontal {
+    background: $handle;
+    border: $handle_border;
+    width: $handle_size;
+    height: $handle_size;
+    margin: $handle_margin;
+    border-radius: $handle_radius;
+}
+
+QSlider::sub-page:horizontal {
+    background: $handle;
+    border-radius: $groove_radius;
+}
+
+QSlider[state="waveform"]::groove:horizontal, QSlider[state="waveform"]::sub-page:horizontal {
+    background: transparent;
+}
+
+QLabel#seekPreview {
+    background-color: $panel;
+    border: 2px solid $accent;
+    padding: 2px;
+}
+
+QListView {
+    background-color: $panel;
+    border: $list_border;
+    border-radius: 10px;
+    padding: 5px;
+}
+
+QListView::item {
+    padding: 8px;
+    border-radius: 5px;
+    margin: 2px;
+}
+
+QListView::item:selected {
+    background-color: $accent;
+    color: $accent_text;
+}
+
+QListView::item:hover {
+    background-color: $item_hover;
+    border: $item_hover_border;
+}
+
+QComboBox, QSpinBox {
+    background-color: $input;
+    border: $input_border;
+    border-radius: 5px;
+    padding: 5px;
+    color: $text;
+}
+
+QComboBox::drop-down {
+    border: none;
+}
+
+QCheckBox {
+    spacing: 5px;
+}
+
+QCheckBox::indicator {
+    width: 18px;
+    height: 18px;
+    border-radius: 3px;
+    background-color: $indicator;
+}
+
+QCheckBox::indicator:checked {
+    background-color: $accent;
+}
+""")
+
+PALETTE_ROLES = (
+    (QPalette.ColorRole.Window, "window"),
+    (QPalette.ColorRole.WindowText, "text"),
+    (QPalette.ColorRole.Base, "panel"),
+    (QPalette.ColorRole.AlternateBase, "button"),
+    (QPalette.ColorRole.Text, "text"),
+    (QPalette.ColorRole.Button, "button"),
+    (QPalette.ColorRole.ButtonText, "button_text"),
+    (QPalette.ColorRole.Highlight, "accent"),
+    (QPalette.ColorRole.HighlightedText, "accent_text"),
+    (QPalette.ColorRole.ToolTipBase, "panel"),
+    (QPalette.ColorRole.ToolTipText, "text"),
+)
+
+
+def build_palette(tokens):
+    palette = QPalette()
+    for role, token in PALETTE_ROLES:
+        palette.setColor(role, QColor(tokens[token]))
+    return palette
+
+
+class ThemeEngine:
+    def __init__(self, themes=THEMES):
+        self.stylesheets = {name: STYLESHEET.substitute(tokens) for name, tokens in themes.items()}
+        self.palettes = {name: build_palette(tokens) for name, tokens in themes.items()}
+        self.current = None
+
+    def apply(self, widget, name):
+        if name == self.current or name not in self.stylesheets:
+            return False
+        widget.setPalette(self.palettes[name])
+        widget.setStyleSheet(self.stylesheets[name])
+        self.current = name
+        return True
+
+
+def set_state(widget, state):
+    if widget.property("state") == state:
+        return
+    widget.setProperty("state", state)
+    # dynamic properties are only matched at polish time
+    style = widget.style()
+    style.unpolish(widget)
+    style.polish(widget)
@@ -0,0 +1,247 @@
+import os, threading
+from collections import OrderedDict, deque
+
+from PyQt6.QtCore import Qt, QObject, QBuffer, QByteArray, QIODevice, QTimer, QUrl, pyqtSignal
+from PyQt6.QtGui import QImage, QPixmap
+from PyQt6.QtMultimedia import QMediaPlayer, QVideoSink
+
+from disk_cache import cache_key, prune_cache, touch, write_atomic
+from media_formats import AUDIO_EXTENSIONS
+from tag_reader import read_cover_art
+
+ICON_SIZE = 32
+# stored at twice the row icon size so high-DPI screens get a sharp image too
+THUMBNAIL_SIZE = 64
+CACHE_SUFFIX = ".thumb"
+CACHE_LIMIT_BYTES = 64 * 1024 * 1024
+PRUNE_EVERY = 100
+MEMORY_LIMIT = 512
+FRAME_TIMEOUT_MS = 8000
+FRAME_SEEK_MS = 30000
+
+
+def scale_thumbnail(image):
+    return image.scaled(THUMBNAIL_SIZE, THUMBNAIL_SIZE, Qt.AspectRatioMode.KeepAspectRatio,
+                        Qt.TransformationMode.SmoothTransformation)
+
+
+def encode_jpeg(image):
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    image.convertToFormat(QImage.Format.Format_RGB32).save(buffer, "JPG", 85)
+    buffer.close()
+    return bytes(data)
+
+
+class FrameGrabber(QObject):
+    # the flag is False when the grab gave up early, so an empty image is no verdict on the file
+    frame_grabbed = pyqtSignal(str, str, QImage, bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.player = None
+        self.sink = None
+        self.queue = deque()
+        self.current = None
+        self.target_ms = None
+        self.timeout = QTimer(self)
+        self.timeout.setSingleShot(True)
+        self.timeout.setInterval(FRAME_TIMEOUT_MS)
+        self.timeout.timeout.connect(lambda: self.finish(QImage(), definite=False))
+
+    def ensure_player(self):
+        if self.player is not None:
+            return
+        # no audio output is attached, so grabbing a frame never makes a sound
+        self.player = QMediaPlayer(self)
+        self.sink = QVideoSink(self)
+        self.player.setVideoSink(self.sink)
+        self.sink.videoFrameChanged.connect(self.on_frame)
+        self.player.mediaStatusChanged.connect(self.on_media_status)
+        self.player.errorOccurred.connect(lambda error, message: self.finish(QImage(), definite=False))
+
+    def grab(self, path, cache_path):
+        if (self.current is not None and self.current[0] == path) or any(item[0] == path for item in self.queue):
+            return
+        self.queue.append((path, cache_path))
+        self.start_next()
+
+    def keep(self, paths):
+        self.queue = deque(item for item in self.queue if item[0] in paths)
+
+    def start_next(self):
+        if self.current is not None or not self.queue:
+            return
+        self.ensure_player()
+        self.current = self.queue.popleft()
+        self.target_ms = None
+        self.player.setSource(QUrl.fromLocalFile(self.current[0]))
+        self.timeout.start()
+
+    def on_media_status(self, status):
+        if self.current is None:
+            return
+        if status == QMediaPlayer.MediaStatus.LoadedMedia and self.target_ms is None:
+            if not self.player.hasVideo():
+                self.finish(QImage())
+                return
+            duration = self.player.duration()
+            # a tenth of the way in skips black leaders and studio logos
+            self.target_ms = min(FRAME_SEEK_MS, duration // 10) if duration > 0 else 0
+            if self.target_ms:
+                self.player.setPosition(self.target_ms)
+            self.player.play()
+        elif status == QMediaPlayer.MediaStatus.InvalidMedia:
+            self.finish(QImage())
+
+    def on_frame(self, frame):
+        if self.current is None or self.target_ms is None or not frame.isValid():
+            return
+        start_ms = frame.startTime() // 1000
+        if 0 <= start_ms < self.target_ms - 1000:
+            return
+        image = frame.toImage()
+        if not image.isNull():
+            self.finish(image)
+
+    def finish(self, image, definite=True):
+        if self.current is None:
+            return
+        path, cache_path = self.current
+        self.release()
+        self.frame_grabbed.emit(path, cache_path, image, definite)
+
+    def release(self):
+        self.current = None
+        self.timeout.stop()
+        self.player.stop()
+        self.player.setSource(QUrl())
+        QTimer.singleShot(0, self.start_next)
+
+    def shutdown(self):
+        self.queue.clear()
+        self.current = None
+        self.timeout.stop()
+        if self.player is not None:
+            self.player.stop()
+
+
+class ThumbnailService(QObject):
+    thumbnail_ready = pyqtSignal(str)
+    image_ready = pyqtSignal(str, QImage)
+    frame_needed = pyqtSignal(str, str)
+
+    def __init__(self, cache_dir, memory_limit=MEMORY_LIMIT, parent=None):
+        super().__init__(parent)
+        self.cache_dir = cache_dir
+        self.memory_limit = memory_limit
+        self.memory = OrderedDict()
+        self.placeholder = QPixmap(ICON_SIZE, ICON_SIZE)
+        self.placeholder.fill(Qt.GlobalColor.transparent)
+        self.pending = deque()
+        self.frames = deque()
+        self.stored = 0
+        self.condition = threading.Condition()
+        self.running = True
+
+        self.grabber = FrameGrabber(self)
+        self.grabber.frame_grabbed.connect(self.on_frame_grabbed)
+        self.frame_needed.connect(self.grabber.grab)
+        self.image_ready.connect(self.on_image_ready)
+        self.worker = None
+
+    def start(self):
+        if self.worker is None:
+            self.worker = threading.Thread(target=self.work, name="thumbnails", daemon=True)
+            self.worker.start()
+
+    def get(self, path):
+        # rows without a thumbnail get a blank one so every title starts at the same indent
+        if path in self.memory:
+            self.memory.move_to_end(path)
+            pixmap = self.memory[path]
+            if pixmap is not None:
+                return pixmap
+        return self.placeholder
+
+    def request(self, paths):
+        wanted = [path for path in paths if path not in self.memory]
+        with self.condition:
+            # only the rows on screen are wanted, so whatever was queued for rows scrolled away is dropped
+            self.pending = deque(wanted)
+            self.condition.notify()
+        self.grabber.keep(set(wanted))
+
+    def clear(self):
+        with self.condition:
+            self.pending.clear()
+        self.grabber.keep(set())
+
+    def shutdown(self):
+        with self.condition:
+            self.running = False
+            self.pending.clear()
+            self.frames.clear()
+            self.condition.notify()
+        self.grabber.shutdown()
+        if self.worker is not None:
+            self.worker.join(timeout=2)
+
+    def on_frame_grabbed(self, path, cache_path, image, definite):
+        with self.condition:
+            self.frames.append((path, cache_path, image, definite))
+            self.condition.notify()
+
+    def on_image_ready(self, path, image):
+        self.memory[path] = None if image.isNull() else QPixmap.fromImage(image)
+        self.memory.move_to_end(path)
+        while len(self.memory) > self.memory_limit:
+            self.memory.popitem(last=False)
+        if not image.isNull():
+            self.thumbnail_ready.emit(path)
+
+    def work(self):
+        while True:
+            with self.condition:
+                while self.running and not self.frames and not self.pending:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                frame = self.frames.popleft() if self.frames else None
+                path = frame[0] if frame else self.pending.popleft()
+            try:
+                if frame is not None:
+                    self.store(*frame)
+                else:
+                    self.load(path)
+            except OSError as e:
+                print(f"Thumbnail unavailable: {path} - {e}")
+                self.image_ready.emit(path, QImage())
+
+    def load(self, path):
+        cache_path = os.path.join(self.cache_dir, cache_key(path, CACHE_SUFFIX))
+        if os.path.exists(cache_path):
+            touch(cache_path)
+            # an empty entry records that the file has nothing to show
+            image = QImage(cache_path) if os.path.getsize(cache_path) else QImage()
+            self.image_ready.emit(path, image)
+            return
+        data = read_cover_art(path)
+        image = QImage.fromData(data) if data else QImage()
+        if image.isNull() and not path.lower().endswith(AUDIO_EXTENSIONS):
+            self.frame_needed.emit(path, cache_path)
+            return
+        self.store(path, cache_path, image)
+
+    def store(self, path, cache_path, image, definite=True):
+        if not image.isNull():
+            image = scale_thumbnail(image)
+        # a grab that timed out or hit a player error is tried again next session rather than
+        # being recorded as having nothing to show
+        if definite or not image.isNull():
+            write_atomic(cache_path, b"" if image.isNull() else encode_jpeg(image))
+            self.stored += 1
+            if self.stored % PRUNE_EVERY == 0:
+                prune_cache(self.cache_dir, CACHE_LIMIT_BYTES, CACHE_SUFFIX)
+        self.image_ready.emit(path, image)
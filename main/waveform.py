@@ -0,0 +1,171 @@
+import os, struct
+
+import numpy as np
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from audio_decode import decode, start_pool, stop_pool
+from disk_cache import cache_key, prune_cache, touch, write_atomic
+
+DECODE_RATE = 8000
+PEAKS_PER_SECOND = 25
+CACHE_SUFFIX = ".peaks"
+CACHE_LIMIT_BYTES = 256 * 1024 * 1024
+MAGIC = b"NWF1"
+# magic, peak columns, reserved, peaks per second, peak count
+HEADER = struct.Struct("<4sHHdQ")
+COLUMNS = 3
+
+
+class Waveform:
+    def __init__(self, peaks, peak_rate):
+        # int16 rows of (min, max, rms) scaled to +-32767
+        self.peaks = peaks
+        self.peak_rate = peak_rate
+
+    def __len__(self):
+        return len(self.peaks)
+
+    def duration_ms(self):
+        return int(len(self.peaks) * 1000 / self.peak_rate)
+
+    def columns(self, width, duration_ms=None):
+        # one (min, max, rms) triple per pixel column, as floats in [-1, 1]
+        count = len(self.peaks)
+        if not count or width <= 0:
+            return np.zeros((0, COLUMNS), dtype=np.float32)
+        span = duration_ms * self.peak_rate / 1000 if duration_ms else count
+        starts = (np.arange(width) * (span / width)).astype(np.int64)
+        starts = starts[starts < count]
+        if not len(starts):
+            return np.zeros((0, COLUMNS), dtype=np.float32)
+        peaks = self.peaks[:starts[-1] + max(1, int(span / width) + 1)]
+        columns = np.stack((
+            np.minimum.reduceat(peaks[:, 0], starts),
+            np.maximum.reduceat(peaks[:, 1], starts),
+            np.maximum.reduceat(peaks[:, 2], starts),
+        ), axis=1)
+        return columns.astype(np.float32) / 32767
+
+
+class PeakReducer:
+    def __init__(self, samples_per_peak):
+        self.samples_per_peak = samples_per_peak
+        self.leftover = np.zeros(0, dtype=np.float32)
+        self.chunks = []
+
+    def feed(self, samples):
+        if len(self.leftover):
+            samples = np.concatenate((self.leftover, samples))
+        usable = len(samples) - len(samples) % self.samples_per_peak
+        if usable:
+            self.chunks.append(self.reduce(samples[:usable].reshape(-1, self.samples_per_peak)))
+        self.leftover = samples[usable:].copy()
+
+    def reduce(self, frames):
+        peaks = np.stack((frames.min(axis=1), frames.max(axis=1),
+                          np.sqrt(np.mean(np.square(frames), axis=1))), axis=1)
+        return np.round(np.clip(peaks, -1, 1) * 32767).astype("<i2")
+
+    def finish(self):
+        if len(self.leftover):
+            self.chunks.append(self.reduce(self.leftover.reshape(1, -1)))
+            self.leftover = self.leftover[:0]
+        if not self.chunks:
+            return np.zeros((0, COLUMNS), dtype="<i2")
+        return np.concatenate(self.chunks)
+
+
+def write_waveform(cache_path, peaks, peak_rate):
+    write_atomic(cache_path, HEADER.pack(MAGIC, COLUMNS, 0, peak_rate, len(peaks)),
+                 peaks.astype("<i2", copy=False).tobytes())
+
+
+def load_waveform(cache_path):
+    try:
+        with open(cache_path, "rb") as f:
+            magic, columns, _, peak_rate, count = HEADER.unpack(f.read(HEADER.size))
+            size = os.fstat(f.fileno()).st_size
+    except (OSError, struct.error):
+        return None
+    if magic != MAGIC or columns != COLUMNS or peak_rate <= 0 or size != HEADER.size + count * COLUMNS * 2:
+        return None
+    touch(cache_path)
+    if not count:
+        return Waveform(np.zeros((0, COLUMNS), dtype="<i2"), peak_rate)
+    # mapped rather than read, so a three-hour file opens without loading its peaks up front
+    return Waveform(np.memmap(cache_path, dtype="<i2", mode="r", offset=HEADER.size, shape=(count, COLUMNS)),
+                    peak_rate)
+
+
+def compute_waveform(path, cache_path):
+    # runs in a worker process; only the cache path travels back, the peaks go through the file
+    state = {}
+
+    def consume(block, rate):
+        reducer = state.get("reducer")
+        if reducer is None:
+            reducer = state["reducer"] = PeakReducer(max(1, round(rate / PEAKS_PER_SECOND)))
+            state["peak_rate"] = rate / reducer.samples_per_peak
+        reducer.feed(block[:, 0])
+
+    decode(path, consume, sample_rate=DECODE_RATE, mono=True)
+    if "reducer" not in state:
+        raise ValueError(f"no audio decoded from {path}")
+    write_waveform(cache_path, state["reducer"].finish(), state["peak_rate"])
+    prune_cache(os.path.dirname(cache_path), CACHE_LIMIT_BYTES, CACHE_SUFFIX)
+    return cache_path
+
+
+class WaveformService(QObject):
+    waveform_ready = pyqtSignal(str, object)
+
+    def __init__(self, cache_dir, max_workers=None, parent=None):
+        super().__init__(parent)
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers or max(1, min(2, (os.cpu_count() or 1) - 1))
+        self.executor = None
+        self.pending = {}
+        self.failed = set()
+        self.running = True
+
+    def request(self, path):
+        # returns the cached waveform straight away, otherwise schedules it and emits waveform_ready later
+        try:
+            cache_path = os.path.join(self.cache_dir, cache_key(path, CACHE_SUFFIX))
+        except OSError:
+            return None
+        waveform = load_waveform(cache_path)
+        if waveform is not None or cache_path in self.failed:
+            return waveform
+        for other_path, future in list(self.pending.items()):
+            # only the track being played needs its waveform, so drop the ones skipped past;
+            # a cancelled future runs on_done, which forgets it
+            if other_path != cache_path:
+                future.cancel()
+        if cache_path not in self.pending and self.running:
+            if self.executor is None:
+                self.executor = start_pool(self.max_workers)
+            future = self.executor.submit(compute_waveform, path, cache_path)
+            self.pending[cache_path] = future
+            future.add_done_callback(lambda future: self.on_done(path, cache_path, future))
+        return None
+
+    def on_done(self, path, cache_path, future):
+        self.pending.pop(cache_path, None)
+        if future.cancelled() or not self.running:
+            return
+        try:
+            future.result()
+        except Exception as e:
+            self.failed.add(cache_path)
+            print(f"Waveform unavailable: {path} - {e}")
+            return
+        waveform = load_waveform(cache_path)
+        if waveform is not None:
+            self.waveform_ready.emit(path, waveform)
+
+    def shutdown(self):
+        self.running = False
+        if self.executor is not None:
+            stop_pool(self.executor)
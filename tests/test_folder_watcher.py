@@ -0,0 +1,87 @@
+import os
+
+from folder_watcher import DeltaWorker, pair_renames
+from library import MediaLibrary
+
+
+def touch(path, data=b"x"):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def bump_mtime(directory):
+    stat = os.stat(directory)
+    os.utime(directory, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def scanned_tree(tmp_path):
+    music = str(tmp_path / "music")
+    os.makedirs(os.path.join(music, "album"))
+    touch(os.path.join(music, "keep.mp3"), b"k")
+    touch(os.path.join(music, "old name.mp3"), b"renamed")
+    touch(os.path.join(music, "gone.mp3"), b"gone")
+    touch(os.path.join(music, "album", "track.flac"), b"t")
+    db_path = str(tmp_path / "library.sqlite3")
+    library = MediaLibrary(db_path)
+    library.scan_directory(music)
+    library.scan_directory(os.path.join(music, "album"))
+    library.close()
+    return music, db_path
+
+
+def deltas(db_path, directories):
+    worker = DeltaWorker(db_path, directories, [], 0)
+    worker.run()
+    return worker
+
+
+def test_pair_renames_needs_a_unique_match():
+    added = {"/new/a.mp3": (10, 1), "/new/b.mp3": (20, 2), "/new/c.mp3": (20, 2)}
+    removed = {"/old/a.mp3": (10, 1), "/old/b.mp3": (20, 2)}
+    assert pair_renames(added, removed) == [("/old/a.mp3", "/new/a.mp3")]
+    assert sorted(added) == ["/new/b.mp3", "/new/c.mp3"]
+    assert list(removed) == ["/old/b.mp3"]
+
+
+def test_detects_added_removed_and_renamed_files(tmp_path):
+    music, db_path = scanned_tree(tmp_path)
+    os.rename(os.path.join(music, "old name.mp3"), os.path.join(music, "new name.mp3"))
+    os.remove(os.path.join(music, "gone.mp3"))
+    touch(os.path.join(music, "fresh.ogg"), b"fresh file")
+    bump_mtime(music)
+    worker = deltas(db_path, [music])
+    assert worker.added == [os.path.join(music, "fresh.ogg")]
+    assert worker.removed == [os.path.join(music, "gone.mp3")]
+    assert worker.renamed == [(os.path.join(music, "old name.mp3"), os.path.join(music, "new name.mp3"))]
+    # a second pass finds the library already up to date
+    assert deltas(db_path, [music]).added == []
+
+
+def test_unchanged_directory_reports_nothing(tmp_path):
+    music, db_path = scanned_tree(tmp_path)
+    worker = deltas(db_path, [music])
+    assert (worker.added, worker.removed, worker.renamed, worker.gone_dirs) == ([], [], [], [])
+
+
+def test_vanished_directory_removes_its_tracks(tmp_path):
+    music, db_path = scanned_tree(tmp_path)
+    album = os.path.join(music, "album")
+    os.remove(os.path.join(album, "track.flac"))
+    os.rmdir(album)
+    bump_mtime(music)
+    worker = deltas(db_path, [music, album])
+    assert worker.removed == [os.path.join(album, "track.flac")]
+    assert album in worker.gone_dirs
+    library = MediaLibrary(db_path)
+    assert library.subtree_directories(album) == []
+    library.close()
+
+
+def test_new_subdirectory_is_walked(tmp_path):
+    music, db_path = scanned_tree(tmp_path)
+    os.makedirs(os.path.join(music, "new album", "disc 2"))
+    touch(os.path.join(music, "new album", "disc 2", "song.wav"), b"new song")
+    bump_mtime(music)
+    worker = deltas(db_path, [music])
+    assert worker.added == [os.path.join(music, "new album", "disc 2", "song.wav")]
+    assert os.path.join(music, "new album", "disc 2") in worker.new_dirs
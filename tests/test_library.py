@@ -0,0 +1,69 @@
+import os
+
+from library import MediaLibrary
+
+
+def touch(path, data=b"x"):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def bump_mtime(directory):
+    # a fresh mtime even when the filesystem's clock is coarse
+    stat = os.stat(directory)
+    os.utime(directory, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def make_tree(root):
+    os.makedirs(os.path.join(root, "music", "album"))
+    touch(os.path.join(root, "music", "a.mp3"))
+    touch(os.path.join(root, "music", "notes.txt"))
+    touch(os.path.join(root, "music", "album", "b.flac"))
+    return os.path.join(root, "music")
+
+
+def test_scan_lists_media_and_reuses_unchanged_directories(tmp_path):
+    music = make_tree(str(tmp_path))
+    library = MediaLibrary(str(tmp_path / "library.sqlite3"))
+    files, subdirs = library.scan_directory(music)
+    assert files == [os.path.join(music, "a.mp3")]
+    assert subdirs == [os.path.join(music, "album")]
+    assert library.dirs_rescanned == 1
+    assert library.scan_directory(music) == (files, subdirs)
+    assert library.dirs_reused == 1
+    library.close()
+
+
+def test_rescan_picks_up_changes_and_forgets_vanished_subdirectories(tmp_path):
+    music = make_tree(str(tmp_path))
+    album = os.path.join(music, "album")
+    library = MediaLibrary(str(tmp_path / "library.sqlite3"))
+    library.scan_directory(music)
+    library.scan_directory(album)
+    kept = os.path.join(music, "a.mp3")
+    stat = os.stat(kept)
+    library.store_metadata(kept, stat.st_size, stat.st_mtime_ns, {"codec": "mp3", "title": "A"})
+
+    os.remove(os.path.join(album, "b.flac"))
+    os.rmdir(album)
+    touch(os.path.join(music, "c.ogg"))
+    bump_mtime(music)
+    files, subdirs = library.scan_directory(music)
+    assert files == [kept, os.path.join(music, "c.ogg")]
+    assert subdirs == []
+    assert library.subtree_directories(album) == []
+    assert library.directory_tracks(music, recursive=True).keys() == set(files)
+    # the unchanged file keeps the metadata probed earlier
+    assert library.cached_metadata(kept, stat.st_size, stat.st_mtime_ns)["title"] == "A"
+    library.close()
+
+
+def test_scan_of_missing_directory_forgets_it(tmp_path):
+    music = make_tree(str(tmp_path))
+    library = MediaLibrary(str(tmp_path / "library.sqlite3"))
+    library.scan_directory(music)
+    os.rename(music, str(tmp_path / "moved"))
+    assert library.scan_directory(music) == ([], [])
+    assert library.directory_mtime(music) is None
+    assert library.directory_tracks(music, recursive=True) == {}
+    library.close()
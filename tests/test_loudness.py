@@ -0,0 +1,67 @@
+import math
+
+import numpy as np
+
+from loudness import (LoudnessMeter, TruePeakMeter, gain_factor, histogram_loudness, pack_histogram,
+                      unpack_histogram)
+
+RATE = 48000
+
+
+def sine(frequency, seconds, amplitude, channels=2, phase=0.0):
+    t = np.arange(int(RATE * seconds)) / RATE
+    wave = (amplitude * np.sin(2 * math.pi * frequency * t + phase)).astype(np.float32)
+    return np.repeat(wave[:, None], channels, axis=1)
+
+
+def measure(samples, block=4096):
+    meter = LoudnessMeter(RATE, samples.shape[1])
+    for start in range(0, len(samples), block):
+        meter.feed(samples[start:start + block])
+    return meter.finish()
+
+
+def test_stereo_sine_reads_its_level():
+    # a 1 kHz tone in both channels reads its peak level in LUFS
+    loudness, peak, histogram = measure(sine(1000, 5, 10 ** (-23 / 20)))
+    assert abs(loudness - -23.0) < 0.1
+    assert abs(20 * math.log10(peak) - -23.0) < 0.1
+    assert abs(histogram_loudness(histogram) - loudness) < 0.1
+
+
+def test_silence_is_gated_out():
+    # twice as much silence as tone would read 4.8 dB quieter without the absolute gate;
+    # only the few blocks straddling the end of the tone still count
+    tone = sine(1000, 10, 10 ** (-20 / 20))
+    with_silence = np.concatenate((tone, np.zeros_like(tone), np.zeros_like(tone)))
+    assert abs(measure(with_silence)[0] - measure(tone)[0]) < 0.1
+    loudness, peak, _ = measure(np.zeros((RATE * 2, 2), dtype=np.float32))
+    assert loudness is None and peak == 0.0
+
+
+def test_too_short_to_measure():
+    loudness, _, histogram = measure(sine(1000, 0.2, 0.5))
+    assert loudness is None
+    assert not histogram.any()
+
+
+def test_true_peak_finds_inter_sample_peaks():
+    # a quarter-rate tone sampled 45 degrees off its crests never has a sample at the crest
+    samples = sine(RATE / 4, 1, 0.5, channels=1, phase=math.pi / 4)
+    assert np.abs(samples).max() < 0.36
+    meter = TruePeakMeter(1)
+    for start in range(0, len(samples), 1000):
+        meter.feed(samples[start:start + 1000])
+    assert abs(meter.finish() - 0.5) < 0.02
+
+
+def test_histogram_round_trip():
+    histogram = np.zeros(1000, dtype=np.int64)
+    histogram[[3, 500, 999]] = [7, 1, 70000]
+    assert np.array_equal(unpack_histogram(pack_histogram(histogram)), histogram)
+
+
+def test_gain_never_clips():
+    assert gain_factor(None, 0.5) == 1.0
+    assert math.isclose(gain_factor(-24.0, 0.1), 10 ** (6 / 20))
+    assert gain_factor(-40.0, 0.5) == 2.0
@@ -0,0 +1,63 @@
+from playlist import Playlist
+
+
+def consistent(playlist):
+    assert playlist.index_by_path == {path: row for row, path in enumerate(playlist.paths)}
+    assert playlist.index_by_id == {entry_id: row for row, entry_id in enumerate(playlist.ids)}
+
+
+def make(count):
+    playlist = Playlist()
+    playlist.extend([f"/m/{i}.mp3" for i in range(count)])
+    return playlist
+
+
+def test_extend_skips_duplicates():
+    playlist = make(3)
+    added = playlist.extend(["/m/1.mp3", "/m/new.mp3", "/m/new.mp3"])
+    assert added == range(3, 4)
+    assert playlist.add("/m/0.mp3") == -1
+    assert playlist.add("/m/other.mp3") == 4
+    assert len(playlist.ids) == len(set(playlist.ids)) == 5
+    consistent(playlist)
+
+
+def test_remove_range_and_rows_keep_current_entry():
+    playlist = make(10)
+    playlist.current_index = 6
+    current = playlist[6]
+    playlist.remove_range(1, 3)
+    consistent(playlist)
+    assert playlist[playlist.current_index] == current
+    playlist.remove_rows(playlist.rows_of(["/m/0.mp3", "/m/9.mp3", "/m/missing.mp3"]))
+    consistent(playlist)
+    assert playlist.paths == [f"/m/{i}.mp3" for i in (3, 4, 5, 6, 7, 8)]
+    assert playlist[playlist.current_index] == current
+
+
+def test_removing_current_entry_clears_it():
+    playlist = make(3)
+    playlist.current_index = 1
+    playlist.remove_rows([1])
+    assert playlist.current_index == -1
+
+
+def test_rename_keeps_row_and_id():
+    playlist = make(3)
+    playlist.current_index = 1
+    entry_id = playlist.entry_id(1)
+    assert playlist.rename("/m/1.mp3", "/m/renamed.mp3") == 1
+    assert playlist.rename("/m/0.mp3", "/m/2.mp3") == -1
+    assert playlist.path_of_id(entry_id) == "/m/renamed.mp3"
+    assert playlist.current_index == 1
+    assert "/m/1.mp3" not in playlist
+    consistent(playlist)
+
+
+def test_ids_are_not_reused_after_clear():
+    playlist = make(2)
+    old_ids = set(playlist.ids)
+    playlist.clear()
+    playlist.extend(["/m/a.mp3"])
+    assert not old_ids & set(playlist.ids)
+    consistent(playlist)
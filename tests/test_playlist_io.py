@@ -0,0 +1,54 @@
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from playlist_io import export_playlist, iter_playlist, resolve_location
+
+
+@pytest.fixture
+def music(tmp_path):
+    folder = tmp_path / "music dir"
+    folder.mkdir()
+    paths = [str(folder / name) for name in ("a b.mp3", "ünï #1.flac", "100% done.ogg")]
+    for path in paths:
+        open(path, "wb").close()
+    return paths
+
+
+@pytest.mark.parametrize("extension", [".m3u", ".m3u8", ".pls", ".xspf"])
+def test_export_round_trip(tmp_path, music, extension):
+    playlist = str(tmp_path / f"list{extension}")
+    metadata = {music[0]: {"title": "Bad\x01title\x0b", "artist": "A & B", "duration_ms": 61000}}
+    export_playlist(playlist, music, metadata.get)
+    assert list(iter_playlist(playlist)) == music
+    if extension == ".xspf":
+        title = ET.parse(playlist).getroot().find(".//{http://xspf.org/ns/0/}title")
+        assert title.text == "Badtitle"
+
+
+def test_m3u_relative_paths(tmp_path, music):
+    playlist = tmp_path / "list.m3u"
+    playlist.write_text("#EXTM3U\nmusic dir/a b.mp3\n./music dir/../music dir/ünï #1.flac\n", encoding="utf-8")
+    assert list(iter_playlist(str(playlist))) == music[:2]
+
+
+def test_xspf_relative_percent_encoded_locations(tmp_path, music):
+    playlist = tmp_path / "list.xspf"
+    playlist.write_text(
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<playlist version="1" xmlns="http://xspf.org/ns/0/"><trackList>'
+        "<track><location>music%20dir/a%20b.mp3</location></track>"
+        "<track><location>music%20dir/%C3%BCn%C3%AF%20%231.flac</location></track>"
+        "<track><location>music dir/100%25 done.ogg</location></track>"
+        "</trackList></playlist>\n", encoding="utf-8")
+    assert list(iter_playlist(str(playlist))) == music
+
+
+def test_file_uri_hosts(tmp_path):
+    base = str(tmp_path)
+    assert resolve_location("file:///music/a%20b.mp3", base) == os.path.normpath("/music/a b.mp3")
+    assert resolve_location("file://localhost/music/a.mp3", base) == os.path.normpath("/music/a.mp3")
+    if os.name != "nt":
+        assert resolve_location("file://server/share/a.mp3", base) is None
+    assert resolve_location("http://example.com/a.mp3", base) is None
@@ -0,0 +1,57 @@
+from search_index import SearchIndex
+
+
+def build(paths):
+    index = SearchIndex(paths.get)
+    index.queue(paths)
+    index.drain()
+    return index
+
+
+def test_matches_prefixes_and_substrings():
+    index = build({1: "/music/foo song.mp3", 2: "/music/other.mp3"})
+    assert index.search("fo") == {1}
+    assert index.search("foo") == {1}
+    assert index.search("song") == {1}
+    assert index.search("ong") == {1}
+    assert index.search("foo ther") == set()
+
+
+def test_refresh_after_rename_drops_old_text():
+    paths = {1: "/music/foo song.mp3", 2: "/music/food.mp3"}
+    index = build(paths)
+    paths[1] = "/music/bar tune.mp3"
+    index.refresh(1, paths[1])
+    for query in ("f", "fo", "foo", "song"):
+        assert 1 not in (index.search(query) or set()), query
+    assert index.search("fo") == {2}
+    assert index.search("ba") == {1}
+    assert index.search("bar") == {1}
+    assert index.search("tune") == {1}
+
+
+def test_removed_entries_do_not_match():
+    index = build({1: "/a/alpha.mp3", 2: "/a/alpine.mp3", 3: "/a/beta.mp3"})
+    index.remove([1])
+    assert index.search("al") == {2}
+    assert index.search("alp") == {2}
+    assert index.search("alpha") == set()
+
+
+def test_search_covers_only_indexed_entries():
+    paths = {1: "/music/foo song.mp3", 2: "/music/foo bar.mp3", 3: "/music/other.mp3"}
+    index = SearchIndex(paths.get)
+    index.queue([1, 2, 3])
+    assert index.drain(1) == [1]
+    assert index.search("foo") == {1}
+    indexed = index.drain()
+    assert indexed == [2, 3]
+    assert index.matching("foo", indexed) == {2}
+    assert index.search("foo") == {1, 2}
+
+
+def test_rarest_word_narrows_first():
+    paths = {i: f"/music/track {i}.mp3" for i in range(1, 200)}
+    index = build(paths)
+    assert index.search("track 123") == {123}
+    assert index.search("tr 12") == {12} | set(range(120, 130))
@@ -0,0 +1,58 @@
+import time
+
+from PyQt6.QtCore import QCoreApplication
+
+from seek_controller import SeekController
+
+app = QCoreApplication.instance() or QCoreApplication([])
+
+
+def make(interval_ms=10000):
+    seeks = []
+    return SeekController(seeks.append, interval_ms), seeks
+
+
+def test_drag_seeks_are_coalesced_latest_wins():
+    controller, seeks = make()
+    for position in range(0, 5000, 100):
+        controller.request(position)
+    assert seeks == [0]
+    assert controller.pending == 4900
+    controller.flush()
+    assert seeks == [0, 4900]
+    assert controller.requests == 50
+    assert controller.seeks_issued == 2
+
+
+def test_flush_without_new_requests_sends_nothing():
+    controller, seeks = make()
+    controller.request(100)
+    controller.flush()
+    assert seeks == [100]
+    controller.request(100)
+    controller.flush()
+    assert seeks == [100]
+
+
+def test_release_always_sends_the_final_position():
+    controller, seeks = make()
+    controller.request(100)
+    controller.request(200)
+    controller.release(100)
+    assert seeks == [100, 100]
+    assert controller.pending is None
+    assert not controller.timer.isActive()
+    controller.request(300)
+    assert seeks == [100, 100, 300]
+
+
+def test_timer_sends_the_pending_seek():
+    controller, seeks = make(interval_ms=20)
+    controller.request(100)
+    controller.request(200)
+    controller.request(300)
+    deadline = time.monotonic() + 2
+    while seeks != [100, 300] and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.005)
+    assert seeks == [100, 300]
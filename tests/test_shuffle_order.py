@@ -0,0 +1,67 @@
+from shuffle_order import ShuffleOrder
+
+
+def play_cycle(order):
+    return [order.next() for _ in range(len(order))]
+
+
+def test_cycle_visits_every_track_once():
+    order = ShuffleOrder(10, seed=1)
+    assert sorted(play_cycle(order)) == list(range(10))
+    assert order.next() is None
+
+
+def test_peek_next_is_idempotent_at_wrap():
+    order = ShuffleOrder(6, seed=2)
+    played = play_cycle(order)
+    state = (list(order.order), order.cursor)
+    upcoming = order.peek_next(wrap=True)
+    assert order.peek_next(wrap=True) == upcoming
+    assert (order.order, order.cursor) == state
+    # history of the finished cycle is still there after peeking
+    assert order.prev() == played[-2]
+    assert order.next() == played[-1]
+    assert order.next(wrap=True) == upcoming
+
+
+def test_wrap_starts_new_cycle_without_repeating_last_track():
+    for seed in range(20):
+        order = ShuffleOrder(5, seed=seed)
+        last = play_cycle(order)[-1]
+        first = order.next(wrap=True)
+        assert first != last
+        assert sorted([first] + [order.next() for _ in range(4)]) == list(range(5))
+
+
+def test_insert_and_remove_discard_peeked_cycle():
+    order = ShuffleOrder(3, seed=3)
+    play_cycle(order)
+    order.peek_next(wrap=True)
+    order.insert([3])
+    # the added track has not been played, so it comes before any new cycle
+    assert order.peek_next(wrap=True) == 3
+    assert order.next(wrap=True) == 3
+    order.peek_next(wrap=True)
+    order.remove([0])
+    assert order.pending_order is None
+    assert order.next(wrap=True) in (0, 1, 2)
+    assert sorted(order.order) == [0, 1, 2]
+
+
+def test_prev_wraps_to_end():
+    order = ShuffleOrder(4, seed=4)
+    first = order.next()
+    assert order.prev() is None
+    assert order.prev(wrap=True) == order.order[-1]
+    assert first == order.order[0]
+
+
+def test_upcoming_follows_next_without_moving_cursor():
+    order = ShuffleOrder(5, seed=5)
+    order.next()
+    order.next()
+    cursor = order.cursor
+    upcoming = list(order.upcoming(wrap=True))
+    assert order.cursor == cursor
+    assert len(upcoming) == 3 + 5
+    assert [order.next(wrap=True) for _ in range(len(upcoming))] == upcoming
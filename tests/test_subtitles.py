@@ -0,0 +1,81 @@
+import pytest
+
+from subtitles import SubtitleTrack, find_sidecar, iter_cues
+
+SRT = """1
+00:00:01,000 --> 00:00:04,000
+<i>First</i>
+
+2
+00:00:03,000 --> 00:00:06,500
+Second
+line two
+
+3
+00:00:10,5 --> 00:00:12,000
+Third
+"""
+
+VTT = """WEBVTT
+
+NOTE overlapping cues follow
+
+intro
+00:01.000 --> 00:04.000 align:start
+<v Ann>First &amp; foremost</v>
+
+00:03.000 --> 00:06.500
+Second
+"""
+
+ASS = """[Script Info]
+Title: test
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+Dialogue: 0,0:00:01.00,0:00:04.00,Default,,0,0,0,,{\\i1}First, yes{\\i0}\\NAgain
+Dialogue: 0,0:00:03.00,0:00:06.50,Default,,0,0,0,,Second
+Dialogue: 0,0:00:02.00,0:00:03.00,Default,,0,0,0,,{\\p1}m 0 0 l 10 10{\\p0}
+"""
+
+
+@pytest.mark.parametrize("name, content, first", [
+    ("a.srt", SRT, "First"),
+    ("a.vtt", VTT, "First & foremost"),
+    ("a.ass", ASS, "First, yes\nAgain"),
+])
+def test_overlapping_cues(tmp_path, name, content, first):
+    path = tmp_path / name
+    path.write_text(content, encoding="utf-8")
+    cues = list(iter_cues(str(path)))
+    assert cues[0] == (1000, 4000, first)
+    track = SubtitleTrack(cues)
+    assert track.segment_at(500) == ("", track.segment_at(500)[1], 1000)
+    assert track.segment_at(1000)[0] == first
+    text, start, end = track.segment_at(3500)
+    assert text.split("\n")[:len(first.split("\n"))] == first.split("\n")
+    assert "Second" in text
+    assert (start, end) == (3000, 4000)
+    assert track.segment_at(4000)[0].startswith("Second")
+    assert track.segment_at(6500)[0] == ""
+
+
+def test_segment_matches_brute_force():
+    cues = [(start, start + length, f"c{start}") for start, length in
+            [(0, 500), (100, 50), (100, 900), (400, 200), (2000, 10), (2005, 1)]]
+    track = SubtitleTrack(cues)
+    for position in range(-10, 2100):
+        text, start, end = track.segment_at(position)
+        expected = "\n".join(cue[2] for cue in sorted(cues) if cue[0] <= position < cue[1])
+        assert text == expected
+        assert start <= position < end
+
+
+def test_legacy_encoding_and_sidecar_choice(tmp_path):
+    (tmp_path / "movie.mkv").write_bytes(b"")
+    (tmp_path / "movie.en.srt").write_text(SRT, encoding="utf-8")
+    (tmp_path / "movie.vtt").write_text(VTT, encoding="utf-8")
+    assert find_sidecar(str(tmp_path / "movie.mkv")) == str(tmp_path / "movie.vtt")
+    (tmp_path / "movie.srt").write_bytes(b"1\r\n00:00:01,000 --> 00:00:02,000\r\nCaf\xe9\r\n")
+    assert find_sidecar(str(tmp_path / "movie.mkv")) == str(tmp_path / "movie.srt")
+    assert list(iter_cues(str(tmp_path / "movie.srt"))) == [(1000, 2000, "Café")]
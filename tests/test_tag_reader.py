@@ -0,0 +1,83 @@
+import struct
+
+from tag_reader import MP4_MAX_DEPTH, read_cover_art, read_tags
+
+
+def syncsafe_bytes(value):
+    return bytes((value >> shift) & 0x7F for shift in (21, 14, 7, 0))
+
+
+def id3_frame(frame_id, data):
+    return frame_id + struct.pack(">I", len(data)) + b"\x00\x00" + data
+
+
+def id3_tag(*frames):
+    body = b"".join(frames)
+    return b"ID3\x03\x00\x00" + syncsafe_bytes(len(body)) + body
+
+
+def atom(kind, body):
+    return struct.pack(">I", 8 + len(body)) + kind + body
+
+
+def test_id3v2_text_and_cover(tmp_path):
+    path = tmp_path / "song.mp3"
+    picture = b"\x00image/png\x00" + b"\x00" + b"back\x00" + b"BACK"
+    front = b"\x00image/png\x00" + b"\x03" + b"\x00" + b"FRONT"
+    path.write_bytes(id3_tag(id3_frame(b"TIT2", b"\x00Title"),
+                             id3_frame(b"TPE1", b"\x01" + "Ärtist".encode("utf-16")),
+                             id3_frame(b"APIC", picture), id3_frame(b"APIC", front)))
+    tags = read_tags(str(path))
+    assert tags["codec"] == "mp3"
+    assert tags["title"] == "Title"
+    assert tags["artist"] == "Ärtist"
+    assert read_cover_art(str(path)) == b"FRONT"
+
+
+def test_flac_vorbis_comments_and_duration(tmp_path):
+    path = tmp_path / "song.flac"
+    # 44100 Hz and 88200 samples in the packed STREAMINFO fields
+    streaminfo = bytes(10) + (44100 << 44 | 88200).to_bytes(8, "big") + bytes(16)
+    comments = [b"TITLE=Title", b"artist=Artist"]
+    vorbis = struct.pack("<I", 3) + b"neo" + struct.pack("<I", len(comments))
+    vorbis += b"".join(struct.pack("<I", len(c)) + c for c in comments)
+    path.write_bytes(b"fLaC" + b"\x00" + len(streaminfo).to_bytes(3, "big") + streaminfo
+                     + b"\x84" + len(vorbis).to_bytes(3, "big") + vorbis)
+    assert read_tags(str(path)) == {"codec": "flac", "duration_ms": 2000, "title": "Title", "artist": "Artist"}
+
+
+def test_wav_info_chunk(tmp_path):
+    path = tmp_path / "song.wav"
+    fmt = struct.pack("<HHIIHH", 1, 2, 44100, 176400, 4, 16)
+    info = b"INFO" + b"INAM" + struct.pack("<I", 5) + b"Name\x00\x00" + b"IART" + struct.pack("<I", 2) + b"Me"
+    chunks = (b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"LIST" + struct.pack("<I", len(info)) + info
+              + b"data" + struct.pack("<I", 176400) + bytes(176400))
+    path.write_bytes(b"RIFF" + struct.pack("<I", 4 + len(chunks)) + b"WAVE" + chunks)
+    assert read_tags(str(path)) == {"codec": "pcm", "title": "Name", "artist": "Me", "duration_ms": 1000}
+
+
+def test_mp4_title_inside_meta(tmp_path):
+    path = tmp_path / "song.m4a"
+    title = atom(b"\xa9nam", atom(b"data", bytes(8) + b"Title"))
+    path.write_bytes(atom(b"ftyp", b"M4A ") + atom(b"moov", atom(b"udta", atom(b"meta", bytes(4) + atom(b"ilst", title)))))
+    assert read_tags(str(path)) == {"codec": "mp4", "title": "Title"}
+
+
+def test_deeply_nested_mp4_is_rejected(tmp_path):
+    path = tmp_path / "deep.mp4"
+    body = b""
+    for _ in range(MP4_MAX_DEPTH + 10):
+        body = atom(b"trak", body)
+    path.write_bytes(body)
+    assert read_tags(str(path)) == {"codec": "mp4"}
+    assert read_cover_art(str(path)) is None
+
+
+def test_truncated_and_unknown_files(tmp_path):
+    truncated = tmp_path / "cut.flac"
+    truncated.write_bytes(b"fLaC\x84\x00\x01\x00" + struct.pack("<I", 100))
+    assert read_tags(str(truncated)) == {"codec": "flac"}
+    unknown = tmp_path / "notes.txt"
+    unknown.write_bytes(b"ID3")
+    assert read_tags(str(unknown)) == {"codec": "txt"}
+    assert read_cover_art(str(unknown)) is None
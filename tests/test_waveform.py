@@ -0,0 +1,88 @@
+import os, stat, sys, wave
+
+import numpy as np
+import pytest
+
+from audio_decode import decode_ffmpeg
+from waveform import PeakReducer, Waveform, compute_waveform, load_waveform, write_waveform
+
+
+def test_peak_reducer_is_independent_of_block_sizes():
+    samples = np.sin(np.linspace(0, 40, 1003)).astype(np.float32)
+    whole = PeakReducer(10)
+    whole.feed(samples)
+    pieces = PeakReducer(10)
+    for start in range(0, len(samples), 37):
+        pieces.feed(samples[start:start + 37])
+    peaks = whole.finish()
+    assert peaks.shape == (101, 3)
+    assert np.array_equal(peaks, pieces.finish())
+    assert peaks[:, 0].min() < -32000 and peaks[:, 1].max() > 32000
+
+
+def test_peak_reducer_values():
+    reducer = PeakReducer(4)
+    reducer.feed(np.array([0.5, -0.5, 0.5, -0.5, 1.0, 1.0], dtype=np.float32))
+    peaks = reducer.finish()
+    assert peaks.tolist() == [[-16384, 16384, 16384], [32767, 32767, 32767]]
+
+
+def test_columns_pick_extremes_per_pixel():
+    peaks = np.array([[-100, 100, 50], [-200, 300, 80], [-50, 50, 10], [-10, 20, 5]], dtype="<i2")
+    waveform = Waveform(peaks, peak_rate=4)
+    columns = waveform.columns(2)
+    assert columns.shape == (2, 3)
+    assert np.allclose(columns * 32767, [[-200, 300, 80], [-50, 50, 10]])
+    # a longer duration leaves the columns past the end of the peaks out
+    assert len(waveform.columns(4, duration_ms=2000)) == 2
+    assert len(Waveform(peaks[:0], 4).columns(10)) == 0
+
+
+def test_cache_round_trip(tmp_path):
+    peaks = np.arange(30, dtype="<i2").reshape(10, 3)
+    cache_path = str(tmp_path / "a.peaks")
+    write_waveform(cache_path, peaks, 25.0)
+    waveform = load_waveform(cache_path)
+    assert waveform.peak_rate == 25.0
+    assert np.array_equal(waveform.peaks, peaks)
+    assert waveform.duration_ms() == 400
+    with open(cache_path, "r+b") as f:
+        f.truncate(os.path.getsize(cache_path) - 2)
+    assert load_waveform(cache_path) is None
+
+
+def test_compute_waveform_from_wav(tmp_path):
+    path = str(tmp_path / "tone.wav")
+    rate = 8000
+    tone = (np.sin(2 * np.pi * 440 * np.arange(rate) / rate) * 16000).astype("<i2")
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(tone.tobytes())
+    cache_path = compute_waveform(path, str(tmp_path / "tone.peaks"))
+    waveform = load_waveform(cache_path)
+    assert len(waveform) == 25
+    assert abs(waveform.duration_ms() - 1000) <= 40
+    assert abs(waveform.peaks[:, 1].max() - 16000) < 50
+
+
+@pytest.mark.skipif(os.name == "nt", reason="the stand-in ffmpeg is a script")
+def test_ffmpeg_error_flood_does_not_stall(tmp_path, monkeypatch):
+    # a stand-in ffmpeg that logs far more than a pipe buffer holds before writing any audio
+    script = tmp_path / "ffmpeg"
+    script.write_text(f"#!{sys.executable}\n"
+                      "import sys\n"
+                      "sys.stderr.write('Header missing\\n' * 20000)\n"
+                      "sys.stdout.buffer.write(bytes(4 * 1000))\n"
+                      "sys.exit(1)\n")
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", str(tmp_path) + os.pathsep + os.environ.get("PATH", ""))
+    frames = []
+    try:
+        decode_ffmpeg("/damaged.mp3", lambda block, rate: frames.append(len(block)), None, True)
+    except ValueError as e:
+        assert str(e).endswith("Header missing")
+    else:
+        raise AssertionError("a failed decode should raise")
+    assert sum(frames) == 1000